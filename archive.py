@@ -0,0 +1,310 @@
+import bisect
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from message_store import Frame
+
+SEGMENT_BYTES = 16 << 20        # Size of a log segment before a new one is started
+MAX_ARCHIVE_BYTES = 256 << 20   # Size of the archive above which the oldest segments are deleted
+RECORD_HEADER = struct.Struct("<QdBI")     # seq, timestamp, type, payload length
+INDEX_ENTRY_SIZE = 8            # Each index entry is the offset of a record in its log segment
+
+# region Segment
+
+class _Segment:
+    """
+    Log file of consecutive messages with its offset index.
+    The n-th record of the segment holds the message first_seq + n.
+    """
+
+    def __init__(self, directory, first_seq):
+        """
+        Open a segment, creating its files if needed and dropping a partially written last record.
+
+        Args:
+            directory (str): Archive directory
+            first_seq (int): Sequence id of the first message of the segment
+        """
+        self.first_seq = first_seq
+        self.log_path = os.path.join(directory, f"{first_seq:020d}.log")
+        self.index_path = os.path.join(directory, f"{first_seq:020d}.idx")
+        self.offsets = array('Q')
+        self._map: mmap.mmap = None
+
+        self._log = open(self.log_path, "a+b")
+        self._index = open(self.index_path, "a+b")
+        self._recover()
+
+    @property
+    def next_seq(self):
+        return self.first_seq + len(self.offsets)
+
+    @property
+    def size(self):
+        return self._log.tell()
+
+    def _recover(self):
+        """
+        Load the index and make it match the log: records written to the log but not indexed
+        are indexed again, and the bytes of an incomplete record are removed.
+        """
+        self._index.seek(0)
+        data = self._index.read()
+        self.offsets.frombytes(data[:len(data) - len(data) % INDEX_ENTRY_SIZE])
+        if sys.byteorder == "big":
+            self.offsets.byteswap()
+
+        log_size = os.path.getsize(self.log_path)
+        while self.offsets and self.offsets[-1] + RECORD_HEADER.size > log_size:
+            self.offsets.pop()  # Index entry written before its record
+
+        end = self._record_end(self.offsets[-1], log_size) if self.offsets else 0
+        indexed = len(self.offsets)
+        if end is None:
+            self.offsets.pop()
+            end = self.offsets[-1] + self._record_size(self.offsets[-1]) if self.offsets else 0
+            indexed = len(self.offsets)
+        while (next_end := self._record_end(end, log_size)) is not None:
+            self.offsets.append(end)
+            end = next_end
+
+        self._log.truncate(end)
+        self._log.seek(end)
+        if indexed != len(self.offsets) or len(data) != indexed * INDEX_ENTRY_SIZE:
+            self._index.truncate(0)
+            self._index.write(self._index_bytes(self.offsets))
+            self._index.flush()
+
+    def _record_end(self, offset, log_size):
+        """
+        Get the end of the record at an offset, if it is complete and holds the expected message.
+
+        Returns:
+            int | None: Offset following the record, None if it is incomplete or not the expected one
+        """
+        if offset + RECORD_HEADER.size > log_size:
+            return None
+        self._log.seek(offset)
+        seq, _, _, length = RECORD_HEADER.unpack(self._log.read(RECORD_HEADER.size))
+        end = offset + RECORD_HEADER.size + length
+        if seq != self.first_seq + bisect.bisect_left(self.offsets, offset) or end > log_size:
+            return None
+        return end
+
+    def _record_size(self, offset):
+        self._log.seek(offset)
+        return RECORD_HEADER.size + RECORD_HEADER.unpack(self._log.read(RECORD_HEADER.size))[3]
+
+    def append(self, record):
+        """
+        Write a message at the end of the segment.
+
+        Args:
+            record (Frame): Message holding the next sequence id of the segment
+        """
+        offset = self._log.tell()
+        self._log.write(RECORD_HEADER.pack(record.seq, record.timestamp, record.type, len(record.payload)))
+        self._log.write(record.payload)
+        self._log.flush()   # Written to the system before being indexed, mmap readers see it
+        self.offsets.append(offset)
+        self._index.write(self._index_bytes(self.offsets[-1:]))
+        self._index.flush()
+
+    def read(self, seq):
+        """
+        Read a message of the segment through the memory map of the log.
+
+        Args:
+            seq (int): Sequence id, between first_seq and next_seq
+
+        Returns:
+            Frame: The message
+        """
+        offset = self.offsets[seq - self.first_seq]
+        header_end = offset + RECORD_HEADER.size
+        if self._map is None or len(self._map) < header_end:
+            self._remap()
+        seq, timestamp, message_type, length = RECORD_HEADER.unpack_from(self._map, offset)
+        if len(self._map) < header_end + length:
+            self._remap()
+        return Frame(seq, message_type, timestamp, self._map[header_end:header_end + length])
+
+    def _remap(self):
+        """
+        Map the log again, it grew since it was mapped.
+        """
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._log.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """
+        Close the files and the memory map.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._log.close()
+        self._index.close()
+
+    def delete(self):
+        """
+        Close and delete the segment files.
+        """
+        self.close()
+        os.remove(self.log_path)
+        os.remove(self.index_path)
+
+    @staticmethod
+    def _index_bytes(offsets):
+        if sys.byteorder == "big":
+            offsets = array('Q', offsets)
+            offsets.byteswap()
+        return offsets.tobytes()
+
+# endregion
+
+# region Message Archive
+
+class MessageArchive:
+    """
+    Append-only archive of the received messages, kept on disk from one session to the next.
+    Messages are written to log segments with an offset index per segment, and read back through memory maps.
+    A message is found in O(1) from its sequence id whatever the number of messages archived.
+    """
+
+    def __init__(self, directory, segment_bytes=SEGMENT_BYTES, max_bytes=MAX_ARCHIVE_BYTES):
+        """
+        Open the archive, creating the directory if needed.
+
+        Args:
+            directory (str): Directory holding the segments
+            segment_bytes (int, optional): Size of a segment before a new one is started. Defaults to SEGMENT_BYTES.
+            max_bytes (int, optional): Size above which the oldest segments are deleted. Defaults to MAX_ARCHIVE_BYTES.
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        first_seqs = sorted(int(name[:-4]) for name in os.listdir(directory)
+                            if name.endswith(".log") and name[:-4].isdigit())
+        self._segments = [_Segment(directory, first_seq) for first_seq in first_seqs]
+        if not self._segments:
+            self._segments.append(_Segment(directory, 0))
+        self._first_seqs = [segment.first_seq for segment in self._segments]
+
+    @property
+    def first_seq(self):
+        """
+        Sequence id of the oldest message archived.
+        """
+        with self._lock:
+            return self._segments[0].first_seq
+
+    @property
+    def next_seq(self):
+        """
+        Sequence id of the next message, the stores numbering the messages continue from it.
+        """
+        with self._lock:
+            return self._segments[-1].next_seq
+
+    def append(self, record):
+        """
+        Archive a message.
+
+        Args:
+            record (Frame): Message, its sequence id must be next_seq
+
+        Raises:
+            ValueError: If the sequence id doesn't follow the last message archived
+        """
+        with self._lock:
+            segment = self._segments[-1]
+            if record.seq != segment.next_seq:
+                raise ValueError(f"Message #{record.seq} doesn't follow #{segment.next_seq - 1}")
+            if segment.size and segment.size + RECORD_HEADER.size + len(record.payload) > self.segment_bytes:
+                segment = self._rotate()
+            segment.append(record)
+
+    def get(self, seq):
+        """
+        Get a message by sequence id.
+
+        Args:
+            seq (int): Sequence id
+
+        Returns:
+            Frame | None: The message, None if unknown or deleted
+        """
+        with self._lock:
+            if not self._segments[0].first_seq <= seq < self._segments[-1].next_seq:
+                return None
+            # Segments are few (max_bytes / segment_bytes), the search doesn't depend on the number of messages
+            segment = self._segments[bisect.bisect_right(self._first_seqs, seq) - 1]
+            return segment.read(seq)
+
+    def __getitem__(self, index):
+        """
+        Get a message by position, 0 being the oldest archived and -1 the latest.
+
+        Raises:
+            IndexError: If there is no message at this position
+        """
+        with self._lock:
+            first, end = self._segments[0].first_seq, self._segments[-1].next_seq
+        seq = (end if index < 0 else first) + index
+        record = self.get(seq) if first <= seq < end else None
+        if record is None:
+            raise IndexError("Message index out of range")
+        return record
+
+    def __len__(self):
+        with self._lock:
+            return self._segments[-1].next_seq - self._segments[0].first_seq
+
+    def stats(self):
+        """
+        Get the archive statistics.
+
+        Returns:
+            dict: Number of messages and segments, size in bytes
+        """
+        with self._lock:
+            return {"messages": self._segments[-1].next_seq - self._segments[0].first_seq,
+                    "segments": len(self._segments),
+                    "bytes": sum(segment.size for segment in self._segments)}
+
+    def close(self):
+        """
+        Close every segment.
+        """
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+
+    def _rotate(self):
+        """
+        Start a new segment and delete the oldest ones if the archive is over its size cap, with the lock held.
+
+        Returns:
+            _Segment: The new segment
+        """
+        segment = _Segment(self.directory, self._segments[-1].next_seq)
+        self._segments.append(segment)
+        self._first_seqs.append(segment.first_seq)
+
+        total = sum(s.size for s in self._segments)
+        while len(self._segments) > 1 and total > self.max_bytes:
+            oldest = self._segments.pop(0)
+            self._first_seqs.pop(0)
+            total -= oldest.size
+            oldest.delete()
+        return segment
+
+# endregion
@@ -0,0 +1,427 @@
+import asyncio
+import random
+import threading
+import codec, framing, ciphers, rsa_cipher, offload
+import server_interaction
+from metrics import metrics
+
+_frames_sent = metrics.counter("frames_sent_total", "Frames written to the server")
+_bytes_sent = metrics.counter("bytes_sent_total", "Bytes written to the server")
+
+# region Async Engine
+
+class AsyncEngine:
+    """
+    asyncio based client engine.
+    A single event loop, running in one background thread, handles the reads, writes, timeouts and tasks
+    of the connection. Events are handed to the UI through the callbacks of server_interaction.client.
+    """
+
+    def __init__(self):
+        """
+        Initialize the engine. The event loop is started on first use.
+        """
+        self.loop: asyncio.AbstractEventLoop = None
+        self._thread: threading.Thread = None
+        self._reader: asyncio.StreamReader = None
+        self._writer: asyncio.StreamWriter = None
+        self._messages_changed: asyncio.Condition = None    # Notified when a server message is received
+        self._dialogue_lock: asyncio.Lock = None            # Only one task talks to the server at a time
+        self._tasks = set()                                 # Running task coroutines
+
+    def start(self):
+        """
+        Start the event loop thread if it isn't running yet.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True, name="isc-asyncio")
+        self._thread.start()
+
+    def _run_loop(self):
+        """
+        Run the event loop until it is stopped.
+        """
+        asyncio.set_event_loop(self.loop)
+        self._messages_changed = asyncio.Condition()
+        self._dialogue_lock = asyncio.Lock()
+        self.loop.run_forever()
+
+    def call(self, coroutine):
+        """
+        Schedule a coroutine on the event loop from any thread.
+
+        Args:
+            coroutine (coroutine): Coroutine to run
+
+        Returns:
+            concurrent.futures.Future: Future of the coroutine result
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    # region Connection
+
+    def open_connection(self, host, port, timeout=10):
+        """
+        Establish a connection to the server.
+
+        Args:
+            host (str): Server address
+            port (int): Server port
+            timeout (int, optional): Maximum time to connect in seconds. Defaults to 10.
+
+        Returns:
+            concurrent.futures.Future: Future resolved when the connection attempt completes
+        """
+        return self.call(self._connect(host, port, timeout))
+
+    async def _connect(self, host, port, timeout):
+        """
+        Coroutine establishing the connection and starting the reception.
+        """
+        server_interaction.client.set_connection_state(-1)
+        try:
+            self._reader, self._writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        except (OSError, asyncio.TimeoutError):
+            print("[CONNECTION] The connection couldn't be established.")
+            server_interaction.client.set_connection_state(0)
+            server_interaction.client.on_connection_result()
+            return
+
+        print("[CONNECTION] Open")
+        server_interaction.client.set_connection_state(1)
+        server_interaction.client.on_connection_result()
+        self._spawn(self._receive())
+
+    def close_connection(self):
+        """
+        Close the connection to the server and cancel the running tasks.
+        """
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._close)
+
+    def _close(self):
+        """
+        Close the connection from the event loop.
+        """
+        for task in list(self._tasks):
+            task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def _receive(self):
+        """
+        Coroutine receiving and dispatching the frames sent by the server.
+        """
+        try:
+            while True:
+                header = await self._reader.readexactly(codec.HEADER_SIZE)
+                message_type, size = codec.parse_header(header)
+                data = await self._reader.readexactly(framing.payload_size(message_type, size))
+                server_interaction._handle_frame(message_type, size, data)
+                if message_type == ord('s'):
+                    async with self._messages_changed:
+                        self._messages_changed.notify_all()
+        except (asyncio.IncompleteReadError, OSError):
+            if server_interaction.client.connection_state == 1:
+                server_interaction.client.set_connection_state(-1)
+                server_interaction.client.on_chat_message("<INFO> Connection closed by server")
+                server_interaction.client.on_connection_closed()
+            self._close()
+        except asyncio.CancelledError:
+            pass
+
+    def send_frame(self, frame):
+        """
+        Queue a complete frame for sending. Can be called from any thread.
+
+        Args:
+            frame (bytes): Encoded frame
+        """
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._write, frame)
+
+    def _write(self, frame):
+        """
+        Write a frame from the event loop.
+        """
+        if self._writer is not None:
+            self._writer.write(frame)
+            _frames_sent.inc()
+            _bytes_sent.inc(len(frame))
+
+    # endregion
+
+    # region Tasks
+
+    def submit_task(self, text):
+        """
+        Run a task command on the event loop.
+
+        Args:
+            text (str): Task command string (e.g., "task shift encode 10")
+        """
+        self.start()
+        self.loop.call_soon_threadsafe(self._spawn, self._run_task(text))
+
+    def _spawn(self, coroutine):
+        """
+        Start a coroutine as a tracked task of the event loop.
+        """
+        task = self.loop.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(self._report_error)
+        return task
+
+    @staticmethod
+    def _report_error(task):
+        """
+        Show the error of a coroutine that raised, it would be lost otherwise.
+
+        Args:
+            task (asyncio.Task): Finished task
+        """
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[ASYNC] {task.get_coro().__name__} failed: {task.exception()!r}")
+            server_interaction.show_error_message(f"Task failed: {task.exception()}")
+
+    async def _run_task(self, text):
+        """
+        Coroutine parsing the task command and running the matching dialogue.
+
+        Args:
+            text (str): Task command string
+        """
+        command = text.split(' ')
+        del command[0]  # Remove "task" from command
+
+        if server_interaction.missing_task_arguments(command):
+            return
+
+        match (command[0]):
+            case "shift" | "vigenere" if command[1] == "encode":
+                dialogue = self._shift_vigenere_encode(command[0], command)
+            case "shift" | "vigenere" if command[1] == "decode":
+                server_interaction.shift_vigenere_decode(command[0], command)
+                return
+            case "RSA" if command[1] == "encode":
+                dialogue = self._rsa_encode(command)
+            case "RSA" if command[1] == "decode":
+                dialogue = self._rsa_decode(command)
+            case "hash" if command[1] == "verify":
+                dialogue = self._hash_verify(command)
+            case "hash" if command[1] == "hash":
+                dialogue = self._hash_hash(command)
+            case "hash":
+                server_interaction.show_error_message(f"Unknown command \"{command[1]}\"")
+                return
+            case "DifHel":
+                dialogue = self._difhel(command)
+            case "shift" | "vigenere" | "RSA":
+                return
+            case _:
+                server_interaction.show_error_message(f"Unknown task \"{command[0]}\"")
+                return
+
+        await dialogue
+
+    def _send_server_message(self, text):
+        """
+        Send a message directly to the server from the event loop.
+
+        Args:
+            text (str): Message text to send to server
+        """
+        server_interaction.client.on_chat_message("<You to Server> " + text)
+        self._write(codec.encode_frame('s', text))
+
+    def _send_server_payload(self, payload):
+        """
+        Send a pre-encoded payload to the server from the event loop.
+
+        Args:
+            payload (bytes): Encoded payload
+        """
+        server_interaction.client.on_chat_message("<You to Server> " + codec.decode_text(payload))
+        self._write(codec.build_frame('s', payload))
+
+    async def _run_blocking(self, function, *args):
+        """
+        Run blocking work (key generation, ciphering, hashing) in a worker thread, so the event loop keeps
+        reading and writing meanwhile. Pass offload.run as the function to use the worker processes when the
+        offload pool is running.
+
+        Args:
+            function (callable): Function to run
+            *args: Arguments of the function
+
+        Returns:
+            Any: Result of the function
+        """
+        return await self.loop.run_in_executor(None, function, *args)
+
+    async def wait_server_messages(self, number_of_messages, max_time=2, clear=True) -> bool:
+        """
+        Wait for a specified number of server messages.
+
+        Args:
+            number_of_messages (int): Number of messages to wait for
+            max_time (int, optional): Maximum time to wait in seconds. Defaults to 2.
+            clear (bool, optional): Clear the previous messages first. Defaults to True.
+
+        Returns:
+            bool: True if messages received, False if timeout
+        """
+        if clear:
+            server_interaction.server_messages.clear()
+        try:
+            with server_interaction.step_wait_time.time():
+                async with self._messages_changed:
+                    await asyncio.wait_for(
+                        self._messages_changed.wait_for(lambda: len(server_interaction.server_messages) >= number_of_messages),
+                        max_time)
+        except asyncio.TimeoutError:
+            server_interaction.step_timeouts.inc()
+            server_interaction.show_no_info_from_server()
+            return False
+        return True
+
+    async def _start_sized_task(self, text_array) -> bool:
+        """
+        Validate the task size and send the task request to the server.
+
+        Args:
+            text_array (list): Command parameters
+
+        Returns:
+            bool: True if the task was sent, False if invalid
+        """
+        if not server_interaction.valid_task_size(text_array):
+            return False
+        self._send_server_message(f"task {' '.join(text_array)}")
+        return True
+
+    async def _shift_vigenere_encode(self, encryption_type, text_array):
+        """
+        Shift/Vigenere encoding dialogue, see server_interaction.shift_vigenere_encode.
+        """
+        async with self._dialogue_lock:
+            if not await self._start_sized_task(text_array): return
+            if not await self.wait_server_messages(2): return
+
+            messages = server_interaction.server_messages
+            key = messages[0].text.split(' ')[-1]
+            values = messages[1].codepoints
+            self._send_server_payload(await self._run_blocking(
+                offload.run, ciphers.shift_vigenere_crypt, encryption_type, key, values))
+
+            await self.wait_server_messages(1)
+
+    async def _rsa_encode(self, text_array):
+        """
+        RSA encoding dialogue, see server_interaction.rsa_encode.
+        """
+        async with self._dialogue_lock:
+            if not await self._start_sized_task(text_array): return
+            if not await self.wait_server_messages(2): return
+
+            messages = server_interaction.server_messages
+            key = server_interaction.parse_rsa_public_key(messages[0].text)
+            values = messages[1].codepoints
+            self._send_server_payload(await self._run_blocking(offload.run, rsa_cipher.encrypt, values, key))
+
+            await self.wait_server_messages(1)
+
+    async def _rsa_decode(self, text_array):
+        """
+        RSA decoding dialogue, see server_interaction.rsa_decode.
+        """
+        async with self._dialogue_lock:
+            if not await self._start_sized_task(text_array): return
+
+            key = await self._run_blocking(server_interaction.generate_rsa_keys)
+
+            if not await self.wait_server_messages(1): return
+            self._send_server_message(f"{key.n},{key.e}")
+
+            if not await self.wait_server_messages(1): return
+            values = server_interaction.server_messages[0].codepoints
+            self._send_server_payload(await self._run_blocking(offload.run, rsa_cipher.decrypt, values, key))
+
+            await self.wait_server_messages(1)
+
+    async def _hash_verify(self, command):
+        """
+        Hash verification dialogue, see server_interaction.hash_command_verify.
+        """
+        async with self._dialogue_lock:
+            server_interaction.server_messages.clear()
+            self._send_server_message(f"task {' '.join(command)}")
+            if not await self.wait_server_messages(3, clear=False): return
+
+            messages = server_interaction.server_messages
+            message, hash = messages[1].payload, messages[2]
+            messages.clear()
+
+            rslt = str(await self._run_blocking(offload.sha256_payload, message) == hash.text.strip().lower())
+            self._send_server_message(rslt.lower())
+
+            await self.wait_server_messages(1, clear=False)
+
+    async def _hash_hash(self, command):
+        """
+        Hashing dialogue, see server_interaction.hash_command_hash.
+        """
+        async with self._dialogue_lock:
+            self._send_server_message(f"task {' '.join(command)}")
+            if not await self.wait_server_messages(2): return
+
+            message_to_hash = server_interaction.server_messages[1].payload
+            self._send_server_message(await self._run_blocking(offload.sha256_payload, message_to_hash))
+
+            await self.wait_server_messages(1)
+
+    async def _difhel(self, text_array):
+        """
+        Diffie-Hellman key exchange dialogue, see server_interaction.difhel.
+        """
+        bits = server_interaction.parse_difhel_size(text_array)
+        if bits is None: return
+
+        # Taken before the server waits for it
+        p, g = await self._run_blocking(server_interaction.generate_difhel_group, bits)
+
+        async with self._dialogue_lock:
+            messages = server_interaction.server_messages
+            messages.clear()
+            self._send_server_message("task " + text_array[0])
+            if not await self.wait_server_messages(1, clear=False): return
+
+            messages.clear()
+            self._send_server_message(f"{p},{g}")
+            if not await self.wait_server_messages(2, clear=False): return
+
+            if "accepted" not in messages[0].text:
+                print("Error, try again")
+                messages.clear()
+                return
+
+            server_half_key = int(messages[1].text)
+            my_secret_key = random.randint(2, p - 2)
+            self._send_server_message(str(pow(g, my_secret_key, p)))  # g^a mod p
+
+            if not await self.wait_server_messages(1): return
+
+            messages.clear()
+            self._send_server_message(str(pow(server_half_key, my_secret_key, p)))  # B^a mod p
+            await self.wait_server_messages(1, clear=False)
+
+    # endregion
+
+engine = AsyncEngine()  # Global engine instance, used when server_interaction.async_engine_enabled is set
+
+# endregion
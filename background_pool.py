@@ -0,0 +1,67 @@
+import threading
+import time
+import offload
+
+# region Background Pool
+
+class BackgroundPool:
+    """
+    Base of the pools of values generated in the background, e.g. RSA key pairs and Diffie-Hellman groups.
+    Holds the condition guarding the pool and its refill thread, which runs _work().
+    The values are generated through the offload pool, a failure is retried until offload.stop() is called.
+    """
+
+    def __init__(self, label, thread_name):
+        """
+        Initialize the pool. The refill thread is started by _start_refill().
+
+        Args:
+            label (str): Prefix of the log messages (e.g. "RSA KEYS")
+            thread_name (str): Name of the refill thread
+        """
+        self.label = label
+        self.thread_name = thread_name
+        self._changed = threading.Condition()   # Guards the pool, notified when it changes
+        self._thread: threading.Thread = None
+
+    def _start_refill(self):
+        """
+        Start the refill thread, with the condition held. Does nothing if it is running.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work, daemon=True, name=self.thread_name)
+            self._thread.start()
+
+    def _work(self):
+        """
+        Refill thread function, keeps the pool filled.
+        """
+        raise NotImplementedError
+
+    def _generate(self, function, *args):
+        """
+        Generate a value, spread over the worker processes when the offload pool is running.
+        If a worker process died (BrokenProcessPool), the generation is retried after offload.RETRY_DELAY.
+
+        Args:
+            function (callable): Function generating the value
+            *args: Arguments of the function
+
+        Returns:
+            tuple | None: (value, seconds) value and its generation time, None once offload.stop() was called:
+                          the refill thread must end
+        """
+        while True:
+            start = time.perf_counter()
+            try:
+                value = offload.run(function, *args)
+            except RuntimeError as e:
+                # Also raised when the interpreter exits, before offload.stop() is called
+                if offload.stopped.wait(offload.RETRY_DELAY):
+                    return None
+                # take() gets its values some other way meanwhile
+                print(f"[{self.label}] Generation failed, retrying: {e!r}")
+                continue
+            return value, time.perf_counter() - start
+
+# endregion
@@ -0,0 +1,97 @@
+import threading
+import time
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+FLUSH_DELAY_MS = 30             # Time lines are collected before being shown
+MIN_FLUSH_INTERVAL_MS = 50      # Minimum time between two updates of a display (maximum refresh rate)
+MAX_BATCH_LINES = 500           # Number of pending lines triggering an update without waiting for the delay
+
+# region Line Batcher
+
+class LineBatcher(QObject):
+    """
+    Collects lines from any thread and shows them in the UI as a single block update.
+    A burst of messages costs one queued signal and one display update per batch instead of one per line.
+    Must be created in the GUI thread.
+    """
+
+    _wake = pyqtSignal()    # Asks the GUI thread to schedule a flush
+
+    def __init__(self, sink, delay_ms=FLUSH_DELAY_MS, min_interval_ms=MIN_FLUSH_INTERVAL_MS,
+                 max_lines=MAX_BATCH_LINES, parent=None):
+        """
+        Initialize the batcher.
+
+        Args:
+            sink (callable): Called in the GUI thread with the lines of a batch joined by newlines
+            delay_ms (int, optional): Time lines are collected before being shown. Defaults to FLUSH_DELAY_MS.
+            min_interval_ms (int, optional): Minimum time between two flushes. Defaults to MIN_FLUSH_INTERVAL_MS.
+            max_lines (int, optional): Number of lines flushed without waiting for the delay. Defaults to MAX_BATCH_LINES.
+            parent (QObject, optional): Parent object. Defaults to None.
+        """
+        super().__init__(parent)
+        self.sink = sink
+        self.delay_ms = delay_ms
+        self.min_interval_ms = min_interval_ms
+        self.max_lines = max_lines
+
+        self._lines = []
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._wake.connect(self._schedule)
+
+    def push(self, line):
+        """
+        Add a line to the next batch. Thread-safe.
+
+        Args:
+            line (str): Line to show
+        """
+        with self._lock:
+            self._lines.append(line)
+            count = len(self._lines)
+
+        # Only the first line and the size threshold need the GUI thread, the others wait for the flush
+        if count == 1 or count == self.max_lines:
+            self._wake.emit()
+
+    def _schedule(self):
+        """
+        Start the flush timer, in the GUI thread.
+        """
+        with self._lock:
+            count = len(self._lines)
+        if count == 0:
+            return
+
+        since_last = (time.monotonic() - self._last_flush) * 1000
+        wait = max(self.min_interval_ms - since_last, 0)
+        if count < self.max_lines:
+            wait = max(wait, self.delay_ms)
+
+        if not self._timer.isActive() or self._timer.remainingTime() > wait:
+            self._timer.start(int(wait))
+
+    def flush(self):
+        """
+        Show the pending lines now, in the GUI thread.
+        """
+        with self._lock:
+            lines, self._lines = self._lines, []
+        if lines:
+            self._last_flush = time.monotonic()
+            self.sink('\n'.join(lines))
+
+    def clear(self):
+        """
+        Drop the pending lines.
+        """
+        with self._lock:
+            self._lines.clear()
+        self._timer.stop()
+
+# endregion
@@ -0,0 +1,203 @@
+import argparse
+import contextlib
+import queue
+import subprocess
+import sys
+import time
+import offload
+import dh_groups
+import rsa_keys
+import server_interaction
+from client import Client
+from metrics import metrics
+
+# Task types measured by default, the sized ones get the number of words appended
+TASKS = ("shift encode", "vigenere encode", "RSA encode", "RSA decode", "hash verify", "hash hash", "DifHel")
+SIZED_TASKS = ("shift", "vigenere", "RSA")
+
+# region Benchmark
+
+def _ignore(*args):
+    """
+    Callback hiding the chat messages during the benchmark.
+    """
+
+def percentile(values, q):
+    """
+    Get a percentile with the nearest-rank method.
+
+    Args:
+        values (list[float]): Measures
+        q (float): Percentile, between 0 and 100
+
+    Returns:
+        float: Value of the percentile, 0 if there is no measure
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(len(ordered) * q / 100 + 0.5), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+@contextlib.contextmanager
+def timed_steps(durations):
+    """
+    Record the time spent waiting for the server at each step of the tasks.
+
+    Args:
+        durations (list[float]): List receiving the durations in milliseconds
+    """
+    wait = server_interaction.wait_server_messages_no_empty
+
+    def timed_wait(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return wait(*args, **kwargs)
+        finally:
+            durations.append((time.perf_counter() - start) * 1000)
+
+    server_interaction.wait_server_messages_no_empty = timed_wait
+    try:
+        yield durations
+    finally:
+        server_interaction.wait_server_messages_no_empty = wait
+
+def run_task_type(command, iterations, pipelined=False):
+    """
+    Run a task several times and measure it.
+
+    Args:
+        command (str): Task command without "/task " (e.g. "shift encode 100")
+        iterations (int): Number of runs
+        pipelined (bool, optional): Queue every run on the task scheduler at once. Defaults to False.
+
+    Returns:
+        dict: Measures of the task type
+    """
+    steps = []
+    failed = 0
+    with timed_steps(steps):
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        if pipelined:
+            scheduler = server_interaction.task_scheduler
+            tasks = []
+            while len(tasks) < iterations:
+                try:
+                    tasks.append(scheduler.submit(f"task {command}", server_interaction.server_task_command, f"task {command}"))
+                except queue.Full:
+                    next(task for task in tasks if not task.finished).wait()    # Let the queue drain
+            failed = sum(not task.wait() for task in tasks)
+        else:
+            for _ in range(iterations):
+                if server_interaction.client.connection_state != 1:
+                    failed += 1
+                    continue
+                if not server_interaction.server_task_command(f"task {command}"):
+                    failed += 1
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+
+    return {
+        "task": command,
+        "iterations": iterations,
+        "failed": failed,
+        "tasks_per_second": iterations / elapsed if elapsed else 0.0,
+        "step_p50_ms": percentile(steps, 50),
+        "step_p90_ms": percentile(steps, 90),
+        "step_p99_ms": percentile(steps, 99),
+        "cpu_ms_per_task": cpu * 1000 / iterations,
+    }
+
+def print_results(results):
+    """
+    Print the measures as a table.
+
+    Args:
+        results (list[dict]): Measures returned by run_task_type
+    """
+    print(f"{'task':<24} {'runs':>5} {'failed':>6} {'tasks/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'CPU ms':>8}")
+    for r in results:
+        print(f"{r['task']:<24} {r['iterations']:>5} {r['failed']:>6} {r['tasks_per_second']:>9.1f} "
+              f"{r['step_p50_ms']:>8.2f} {r['step_p90_ms']:>8.2f} {r['step_p99_ms']:>8.2f} {r['cpu_ms_per_task']:>8.2f}")
+
+def start_mock_server(args):
+    """
+    Start the mock server in another process, so its CPU time is not counted.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments
+
+    Returns:
+        tuple: (process, port)
+    """
+    process = subprocess.Popen(
+        [sys.executable, "mock_server.py", "--port", "0", "--latency", str(args.latency),
+         "--jitter", str(args.jitter), "--segment-size", str(args.segment_size)],
+        stdout=subprocess.PIPE, text=True, cwd=sys.path[0] or None)
+    line = process.stdout.readline()
+    if not line:
+        process.wait()
+        raise RuntimeError("The mock server couldn't be started")
+    return process, int(line.rsplit(':', 1)[1])
+
+def main(argv=None):
+    """
+    Run the benchmark suite against the mock server, or an existing server.
+
+    Args:
+        argv (list[str], optional): Command line arguments. Defaults to sys.argv.
+
+    Returns:
+        int: Exit code
+    """
+    parser = argparse.ArgumentParser(description="Measure the task throughput against a local mock ISC server.")
+    parser.add_argument("tasks", nargs="*", default=TASKS, help='task types to run, e.g. "shift encode"')
+    parser.add_argument("-n", "--iterations", type=int, default=20, help="runs per task type")
+    parser.add_argument("-w", "--words", type=int, default=100, help="number of words of the sized tasks (1-10000)")
+    parser.add_argument("--latency", type=float, default=0.0, help="mock server delay before each reply, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="mock server random delay added to the latency")
+    parser.add_argument("--segment-size", type=int, default=0, help="mock server writes frames in pieces of this size")
+    parser.add_argument("--pipelined", action="store_true", help="queue the runs on the task scheduler")
+    parser.add_argument("--processes", type=int, help="run the crypto in a pool of worker processes (0 for one per CPU)")
+    parser.add_argument("--metrics", help="write the client metrics to this file (.json, Prometheus text otherwise)")
+    parser.add_argument("--host", help="benchmark an existing server instead of starting the mock server")
+    parser.add_argument("--port", type=int, default=6000, help="port of the existing server")
+    args = parser.parse_args(argv)
+
+    process = None
+    host, port = args.host, args.port
+    if host is None:
+        process, port = start_mock_server(args)
+        host = "127.0.0.1"
+
+    if args.processes is not None:
+        offload.start(args.processes or None)
+    dh_groups.groups.start()
+    rsa_keys.keys.start()
+    client = Client(host, port, on_chat_message=_ignore, on_decoded_message=_ignore)
+    server_interaction.set_client(client)
+    server_interaction.async_engine_enabled = False     # Tasks are run one by one from this thread
+    try:
+        if not client.open_connection():
+            return 2
+        results = []
+        for task in args.tasks:
+            command = f"{task} {args.words}" if task.split(' ')[0] in SIZED_TASKS else task
+            results.append(run_task_type(command, args.iterations, args.pipelined))
+        server_interaction.close_connection()
+        print_results(results)
+        if args.metrics:
+            with open(args.metrics, "w", encoding="utf-8") as f:
+                f.write(metrics.to_json() if args.metrics.endswith(".json") else metrics.to_prometheus())
+    finally:
+        offload.stop()
+        if process:
+            process.terminate()
+            process.wait()
+    return 1 if any(r["failed"] for r in results) else 0
+
+# endregion
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+from array import array
+from itertools import cycle, repeat
+from operator import add
+import codec
+
+try:
+    import numpy as np
+except ImportError:
+    np = None   # Pure Python fallback is used
+
+MAX_VALUE = 0xFFFFFFFF      # Largest value fitting in a 4 bytes word
+
+# region Key Schedules
+
+def vigenere_key_schedule(key, direction=1):
+    """
+    Compute the shift applied by each character of a Vigenere key, once for the whole message.
+
+    Args:
+        key (str): Key word
+        direction (int, optional): 1 to encode, -1 to decode. Defaults to 1.
+
+    Returns:
+        list[int]: Shift of each key character
+
+    Raises:
+        ValueError: If the key is empty
+    """
+    if len(key) == 0:
+        raise ValueError("Vigenere key can't be empty")
+    # Key characters are worth their ISC word value, as for the message characters
+    return [c * direction for c in codec.decode_codepoints(codec.encode_text(key))]
+
+# endregion
+
+# region Cipher Kernels
+
+def shift_encode(values, shift):
+    """
+    Add the same shift to every value.
+
+    Args:
+        values (array | iterable[int]): Values to cipher
+        shift (int): Shift to add (negative to decode)
+
+    Returns:
+        bytes: Encoded payload
+
+    Raises:
+        OverflowError: If a result doesn't fit in a 4 bytes word
+    """
+    if np is not None:
+        return _encode_checked(_as_numpy(values) + shift)
+    return codec.encode_codepoints(map(add, values, repeat(shift)))
+
+def vigenere_encode(values, schedule):
+    """
+    Add the key schedule, repeated over the message, to the values.
+
+    Args:
+        values (array | iterable[int]): Values to cipher
+        schedule (list[int]): Key schedule, see vigenere_key_schedule
+
+    Returns:
+        bytes: Encoded payload
+
+    Raises:
+        OverflowError: If a result doesn't fit in a 4 bytes word
+    """
+    if np is not None:
+        values = _as_numpy(values)
+        return _encode_checked(values + np.resize(np.asarray(schedule, dtype=np.int64), len(values)))
+    return codec.encode_codepoints(map(add, values, cycle(schedule)))
+
+def shift_vigenere_crypt(encryption_type, key, values, direction=1):
+    """
+    Apply a shift or Vigenere cipher to integer values.
+
+    Args:
+        encryption_type (str): "shift" or "vigenere"
+        key (str): Shift size for shift, key word for vigenere
+        values (array | iterable[int]): Values to cipher
+        direction (int, optional): 1 to encode, -1 to decode. Defaults to 1.
+
+    Returns:
+        bytes: Encoded payload
+    """
+    match encryption_type:
+        case "shift":
+            return shift_encode(values, int(key) * direction)
+        case "vigenere":
+            return vigenere_encode(values, vigenere_key_schedule(key, direction))
+    return b''
+
+def _as_numpy(values):
+    """
+    Get the values as a signed 64 bits NumPy array, large enough to hold the ciphered values.
+
+    Args:
+        values (array | iterable[int]): Values
+
+    Returns:
+        numpy.ndarray: Values as int64
+    """
+    if isinstance(values, array) and values.typecode == codec.WORD_TYPECODE:
+        return np.frombuffer(values, dtype=np.uint32).astype(np.int64)
+    return np.fromiter(values, dtype=np.int64)
+
+def _encode_checked(values):
+    """
+    Encode NumPy values to an ISC payload after checking their range.
+
+    Args:
+        values (numpy.ndarray): Ciphered values
+
+    Returns:
+        bytes: Encoded payload
+
+    Raises:
+        OverflowError: If a value doesn't fit in a 4 bytes word
+    """
+    if len(values) and (values.min() < 0 or values.max() > MAX_VALUE):
+        raise OverflowError("Ciphered value out of the 4 bytes range")
+    return values.astype('>u4').tobytes()
+
+# endregion
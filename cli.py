@@ -0,0 +1,116 @@
+import argparse
+import sys
+import time
+import offload
+import dh_groups
+import rsa_keys
+import server_interaction
+from client import Client, DEFAULT_HOST, DEFAULT_PORT
+
+RECONNECT_WAIT = 10.0   # Time a command waits for a lost connection to come back, in seconds
+
+# region Batch Mode
+
+def _ignore(*args):
+    """
+    Callback hiding the chat messages when not in verbose mode.
+    """
+
+def read_commands(args):
+    """
+    Gather the commands to run from the arguments and the optional commands file.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments
+
+    Returns:
+        list[str]: Commands, each one starting with '/' or being a chat message
+    """
+    commands = list(args.commands)
+    if args.file:
+        with (sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")) as f:
+            commands += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return commands * args.repeat
+
+def run_batch(commands):
+    """
+    Run the commands one after the other and print the time taken by each task.
+
+    Args:
+        commands (list[str]): Commands to run
+
+    Returns:
+        tuple: (failed (int), skipped (int)) number of tasks that failed and of commands not run
+    """
+    failed = skipped = 0
+    timings = []
+    for i, text in enumerate(commands):
+        if not server_interaction.client.wait_connected(RECONNECT_WAIT):
+            skipped = len(commands) - i
+            print(f"Connection lost, the remaining {skipped} commands are skipped")
+            break
+
+        if not text.startswith("/task"):
+            server_interaction.send_message(text)
+            server_interaction.task_scheduler.join()    # /crypt and /decrypt run on the task scheduler
+            continue
+
+        start = time.perf_counter()
+        ok = server_interaction.server_task_command(text[1:])
+        elapsed = (time.perf_counter() - start) * 1000
+        timings.append(elapsed)
+        failed += 0 if ok else 1
+        print(f"[{i + 1:>4}] {text[1:]:<32} {'ok' if ok else 'FAILED':<6} {elapsed:10.1f} ms")
+
+    if timings:
+        print(f"{len(timings)} tasks, {len(timings) - failed} ok, {failed} failed, "
+              f"total {sum(timings):.1f} ms, mean {sum(timings) / len(timings):.1f} ms, max {max(timings):.1f} ms")
+    return failed, skipped
+
+def main(argv=None):
+    """
+    Entry point of the headless client.
+
+    Args:
+        argv (list[str], optional): Command line arguments. Defaults to sys.argv.
+
+    Returns:
+        int: Exit code
+    """
+    parser = argparse.ArgumentParser(description="Run ISC chat commands and tasks without the GUI.")
+    parser.add_argument("commands", nargs="*", help='commands to run, e.g. "/task shift encode 10"')
+    parser.add_argument("-f", "--file", help="file with one command per line ('-' for stdin)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="server address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="server port")
+    parser.add_argument("--encoding", default="shift", help="encoding used by /crypt and /decrypt")
+    parser.add_argument("--repeat", type=int, default=1, help="number of times the commands are run")
+    parser.add_argument("--processes", type=int, help="run the crypto in a pool of worker processes (0 for one per CPU)")
+    parser.add_argument("--archive", default=server_interaction.ARCHIVE_DIR,
+                        help="keep the received messages in this directory, /decrypt can use them in the next runs")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the chat messages")
+    args = parser.parse_args(argv)
+
+    client = Client(args.host, args.port, on_chat_message=print if args.verbose else _ignore)
+    client.encoding = args.encoding
+    server_interaction.set_client(client)
+    server_interaction.async_engine_enabled = False     # Tasks are run one by one from this thread
+
+    if args.processes is not None:
+        offload.start(args.processes or None)
+    dh_groups.groups.start()
+    rsa_keys.keys.start()
+    if args.archive:
+        server_interaction.open_archive(args.archive)
+    if not client.open_connection():
+        return 2
+    try:
+        failed, skipped = run_batch(read_commands(args))
+    finally:
+        server_interaction.close_connection()
+        offload.stop()
+    return 1 if failed or skipped else 0
+
+# endregion
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,395 @@
+import random
+import select
+import socket
+import threading
+import time
+import framing
+from metrics import metrics
+from outbound import OutboundWriter, MAX_PENDING_BYTES
+
+DEFAULT_HOST = "vlbelintrocrypto.hevs.ch"   # Default server host
+DEFAULT_PORT = 6000                         # Default server port
+CONNECT_TIMEOUT = 5.0                       # Maximum time to establish a connection, in seconds
+DNS_CACHE_TTL = 300.0                       # Time a resolved server address is reused, in seconds
+DNS_RETRY_AGE = 30.0                        # Age of the cached addresses resolved again when none of them answers
+KEEPALIVE_IDLE = 10                         # Idle time before the first TCP keepalive probe, in seconds
+KEEPALIVE_INTERVAL = 3                      # Time between two keepalive probes, in seconds
+KEEPALIVE_PROBES = 3                        # Unanswered probes before the connection is considered lost
+RECONNECT_ATTEMPTS = 8                      # Reconnection attempts after the connection is lost, 0 to disable
+RECONNECT_BASE_DELAY = 0.05                 # Backoff delay before the second attempt, doubled after each failure
+RECONNECT_MAX_DELAY = 5.0                   # Maximum backoff delay between two attempts, in seconds
+
+_dns_cache = {}             # (host, port) -> (resolution time, addresses)
+_dns_lock = threading.Lock()
+
+_connections = metrics.counter("connections_total", "Connection attempts to the server, by result", result="open")
+_connection_failures = metrics.counter("connections_total", "Connection attempts to the server, by result", result="failed")
+_server_closes = metrics.counter("connections_closed_by_server_total", "Connections closed by the server")
+_connections_lost = metrics.counter("connections_lost_total", "Connections lost without being closed by either side")
+_reconnect_time = metrics.histogram("reconnect_seconds", "Time from the loss of the connection to the next one")
+_dns_lookups = metrics.counter("dns_lookups_total", "Server address resolutions, by cache result", cache="miss")
+_dns_hits = metrics.counter("dns_lookups_total", "Server address resolutions, by cache result", cache="hit")
+
+# region Address Resolution
+
+def resolve(host, port, max_age=DNS_CACHE_TTL):
+    """
+    Resolve a server address, the result is cached.
+
+    Args:
+        host (str): Host name or address
+        port (int): Port
+        max_age (float, optional): Maximum age of a cached result, in seconds. Defaults to DNS_CACHE_TTL.
+
+    Returns:
+        list: (family, socket address) tuples to try in order
+
+    Raises:
+        OSError: If the name can't be resolved
+    """
+    key = (host, port)
+    with _dns_lock:
+        cached = _dns_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            _dns_hits.inc()
+            return cached[1]
+
+    _dns_lookups.inc()
+    addresses = [(family, address) for family, _, _, _, address
+                 in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+    with _dns_lock:
+        _dns_cache[key] = (time.monotonic(), addresses)
+    return addresses
+
+# endregion
+
+# region Client
+
+def _ignore(*args):
+    """
+    Default callback, does nothing.
+    """
+
+class Client:
+    """
+    Headless connection to an ISC server.
+    Holds the socket, the connection state and the reception thread, and reports every event
+    through injected callbacks so it can run with or without the GUI.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, on_frame=_ignore, on_chat_message=print,
+                 on_decoded_message=print, on_connection_result=_ignore, on_connection_closed=_ignore,
+                 on_clear_chat=_ignore, get_encoding=None, on_image=_ignore, on_progress=_ignore, ui_thread=None,
+                 tcp_nodelay=True, send_buffer_size=None, receive_buffer_size=None,
+                 max_pending_bytes=MAX_PENDING_BYTES, connect_timeout=CONNECT_TIMEOUT, read_timeout=None,
+                 keepalive=True, reconnect_attempts=RECONNECT_ATTEMPTS):
+        """
+        Initialize the client. No connection is opened yet.
+
+        Args:
+            host (str, optional): Server address. Defaults to DEFAULT_HOST.
+            port (int, optional): Server port. Defaults to DEFAULT_PORT.
+            on_frame (callable, optional): Called with (message_type, size, payload) for every received frame
+            on_chat_message (callable, optional): Called with a line to show in the chat. Defaults to print.
+            on_decoded_message (callable, optional): Called with a decoded message. Defaults to print.
+            on_connection_result (callable, optional): Called when a connection attempt completes
+            on_connection_closed (callable, optional): Called when the server closes the connection
+            on_clear_chat (callable, optional): Called by the /clear command
+            get_encoding (callable, optional): Returns the encoding used by /crypt and /decrypt.
+                                               Defaults to returning the encoding attribute.
+            on_image (callable, optional): Called with (width, height, rgb_payload) for every received image
+            on_progress (callable, optional): Called with (task_id, command, fraction) while a long command runs
+            ui_thread (threading.Thread, optional): Thread that must never wait for the network when sending
+            tcp_nodelay (bool, optional): Disable Nagle's algorithm. Defaults to True.
+            send_buffer_size (int, optional): Socket send buffer size (SO_SNDBUF). Defaults to the system default.
+            receive_buffer_size (int, optional): Socket receive buffer size (SO_RCVBUF). Defaults to the system default.
+            max_pending_bytes (int, optional): Bytes queued for sending before the senders are held back.
+                                               Defaults to MAX_PENDING_BYTES.
+            connect_timeout (float, optional): Maximum time to establish a connection. Defaults to CONNECT_TIMEOUT.
+            read_timeout (float, optional): Time without receiving anything after which the connection is considered
+                                            lost. Defaults to None (no limit, the server can stay silent).
+            keepalive (bool, optional): Enable TCP keepalive to detect dead connections. Defaults to True.
+            reconnect_attempts (int, optional): Reconnection attempts when the connection is lost, 0 to disable.
+                                                Defaults to RECONNECT_ATTEMPTS.
+        """
+        self.host = host
+        self.port = port
+        self.encoding = "shift"                 # Encoding used when no get_encoding callback is given
+        self.on_frame = on_frame
+        self.on_chat_message = on_chat_message
+        self.on_decoded_message = on_decoded_message
+        self.on_connection_result = on_connection_result
+        self.on_connection_closed = on_connection_closed
+        self.on_clear_chat = on_clear_chat
+        self.get_encoding = get_encoding or (lambda: self.encoding)
+        self.on_image = on_image
+        self.on_progress = on_progress
+        self.ui_thread = ui_thread
+        self.tcp_nodelay = tcp_nodelay
+        self.send_buffer_size = send_buffer_size
+        self.receive_buffer_size = receive_buffer_size
+        self.max_pending_bytes = max_pending_bytes
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.keepalive = keepalive
+        self.reconnect_attempts = reconnect_attempts
+
+        self.stop_event = threading.Event()     # Event to signal thread termination
+        self.connection: socket.socket = None   # Socket connection to server
+        self.writer: OutboundWriter = None      # Send queue of the connection, kept across reconnections
+        self.connection_state = -1              # Connection states: -1 (not connected), 0 (failed), 1 (connected), 2 (reconnecting)
+        self.connected_event = threading.Event()    # Set while the connection state is 1
+
+    def open_connection(self):
+        """
+        Establish a connection to the server and start the message reception thread.
+
+        Returns:
+            bool: True if connected, False otherwise
+        """
+        self.set_connection_state(-1)
+        self.stop_event.clear()
+        try:
+            self.connection = self._connect()
+        except OSError:
+            print("[CONNECTION] The connection couldn't be established.")
+            _connection_failures.inc()
+            self.set_connection_state(0)
+            self.on_connection_result()
+            return False
+
+        print("[CONNECTION] Open")
+        _connections.inc()
+        self.writer = OutboundWriter(self.connection, self.max_pending_bytes, on_error=self._write_failed)
+        self.set_connection_state(1)
+        self.on_connection_result()
+
+        threading.Thread(target=self.handle_message_reception, args=(self.connection,), daemon=True).start()
+        return True
+
+    def close_connection(self):
+        """
+        Close the connection to the server.
+        Signals the message reception thread to stop and closes the socket.
+        """
+        self.stop_event.set()
+        if self.writer:
+            # The UI thread doesn't wait for the queued frames to be written
+            self.writer.close(0 if threading.current_thread() is self.ui_thread else 0.5)
+        if self.connection:  # Check if connection exists
+            _close_socket(self.connection)
+        self.set_connection_state(-1)
+        print("[CONNECTION] Closed")
+
+    def wait_connected(self, timeout=None) -> bool:
+        """
+        Wait for the connection to be up, e.g. while reconnecting.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds. Defaults to None (no limit).
+
+        Returns:
+            bool: True if connected
+        """
+        return self.connected_event.wait(timeout)
+
+    def set_connection_state(self, state):
+        """
+        Change the connection state, connected_event follows it.
+
+        Args:
+            state (int): -1 (not connected), 0 (failed), 1 (connected) or 2 (reconnecting)
+        """
+        self.connection_state = state
+        if state == 1:
+            self.connected_event.set()
+        else:
+            self.connected_event.clear()
+
+    def _connect(self):
+        """
+        Connect to the server, trying every resolved address in turn.
+        The cached addresses are resolved again if none of them answers and they are older than DNS_RETRY_AGE.
+
+        Returns:
+            socket.socket: Connected socket
+
+        Raises:
+            OSError: If no address accepts the connection
+        """
+        error = OSError("No address to connect to")
+        tried = set()
+        for max_age in (DNS_CACHE_TTL, DNS_RETRY_AGE):
+            for family, address in resolve(self.host, self.port, max_age):
+                if address in tried:
+                    continue
+                tried.add(address)
+                connection = socket.socket(family, socket.SOCK_STREAM)
+                try:
+                    self._configure_socket(connection)
+                    connection.settimeout(self.connect_timeout)
+                    connection.connect(address)
+                    connection.settimeout(None)     # Reads and writes block, the threads handle the waiting
+                    return connection
+                except OSError as e:
+                    connection.close()
+                    error = e
+        raise error
+
+    def _configure_socket(self, connection):
+        """
+        Apply the socket options, buffer sizes are set before connecting so the TCP window can use them.
+
+        Args:
+            connection (socket.socket): Socket not connected yet
+        """
+        if self.tcp_nodelay:
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.send_buffer_size:
+            connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer_size)
+        if self.receive_buffer_size:
+            connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer_size)
+        if self.keepalive:
+            connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            # The probe timings aren't available on every platform, the system defaults are used there
+            for option, value in (("TCP_KEEPIDLE", KEEPALIVE_IDLE), ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+                                  ("TCP_KEEPCNT", KEEPALIVE_PROBES)):
+                if hasattr(socket, option):
+                    connection.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+    def handle_message_reception(self, connection):
+        """
+        Background thread function to continuously receive frames from server.
+        Runs until stop_event is set, reconnecting when the connection is lost.
+
+        Args:
+            connection (socket.socket): Connected socket to read from
+        """
+        try:
+            while connection is not None:
+                closed_by_server = self._receive_frames(connection)
+                if self.stop_event.is_set():
+                    break
+                (_server_closes if closed_by_server else _connections_lost).inc()
+                connection = self._reconnect(closed_by_server)
+        except:
+            pass
+
+    def _receive_frames(self, connection):
+        """
+        Receive and dispatch the frames of a connection until it ends.
+
+        Args:
+            connection (socket.socket): Connected socket to read from
+
+        Returns:
+            bool: True if the server closed the connection, False if it was lost or stopped
+        """
+        reader = framing.FrameReader(connection)
+        while not self.stop_event.is_set():  # Continue until stop is requested
+            try:
+                if self.read_timeout and not select.select([connection], [], [], self.read_timeout)[0]:
+                    return False    # Nothing received for too long
+                frames = reader.receive()
+            except (ConnectionAbortedError, OSError, ValueError):
+                return False
+
+            if frames is None:
+                return True     # Connection closed by the server
+
+            for message_type, size, data in frames:
+                self.on_frame(message_type, size, data)
+        return False
+
+    def _reconnect(self, closed_by_server):
+        """
+        Connect again after the connection was lost, with exponential backoff and full jitter between the attempts.
+        The first attempt is immediate. The queued frames are kept and sent on the new connection.
+
+        Args:
+            closed_by_server (bool): True if the server closed the connection
+
+        Returns:
+            socket.socket | None: New connection, None if every attempt failed or the client was stopped
+        """
+        lost_at = time.perf_counter()
+        if self.writer:
+            self.writer.detach()
+        _close_socket(self.connection)
+
+        if self.reconnect_attempts:
+            self.set_connection_state(2)
+            self.on_chat_message("<INFO> Connection lost, reconnecting ...")
+            self.on_connection_result()
+
+        for attempt in range(self.reconnect_attempts):
+            delay = 0 if attempt == 0 else random.uniform(0, min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** (attempt - 1)))
+            if self.stop_event.wait(delay):
+                return None
+            try:
+                connection = self._connect()
+            except OSError:
+                continue
+            if self.stop_event.is_set():
+                _close_socket(connection)
+                return None
+
+            self.connection = connection
+            self.writer.attach(connection)
+            elapsed = time.perf_counter() - lost_at
+            _reconnect_time.observe(elapsed)
+            self.set_connection_state(1)
+            self.on_chat_message(f"<INFO> Reconnected to server in {elapsed * 1000:.0f} ms")
+            self.on_connection_result()
+            return connection
+
+        if self.writer:
+            self.writer.close(0)
+        self.set_connection_state(-1)
+        print("[CONNECTION] Closed")
+        if self.reconnect_attempts:
+            self.on_chat_message("<INFO> Connection lost, the server can't be reached")
+        else:
+            self.on_chat_message("<INFO> Connection closed by server" if closed_by_server else "<INFO> Connection lost")
+        self.on_connection_closed()
+        return None
+
+    def _write_failed(self, connection, error):
+        """
+        Called by the writer thread when a write fails, wakes the reception thread up so it reconnects.
+        """
+        if connection is self.connection:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def send_frame(self, frame, block=None) -> bool:
+        """
+        Queue a complete frame for sending. The frame is written by the writer thread.
+
+        Args:
+            frame (bytes): Encoded frame
+            block (bool, optional): Wait for room if the send queue is full.
+                                    Defaults to True, except on the UI thread.
+
+        Returns:
+            bool: True if the frame is queued, False if not connected or the send queue is full
+        """
+        if self.writer is None:
+            return False
+        if block is None:
+            block = threading.current_thread() is not self.ui_thread
+        return self.writer.send(frame, block)
+
+def _close_socket(connection):
+    """
+    Shut a socket down and close it, ignoring the errors of an already closed socket.
+    """
+    try:
+        connection.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    connection.close()
+
+# endregion
@@ -0,0 +1,196 @@
+import sys
+from array import array
+
+# region Constants
+
+HEADER = b'ISC'             # Magic bytes starting every frame
+HEADER_SIZE = 6             # 'ISC' + type (1 byte) + size (2 bytes)
+WORD_SIZE = 4               # Each character is stored on 4 bytes
+
+# Array typecode holding unsigned 32 bits integers on this platform
+WORD_TYPECODE = 'I' if array('I').itemsize == WORD_SIZE else 'L'
+
+_BIG_ENDIAN_HOST = sys.byteorder == 'big'
+
+CHAR_CACHE_SIZE = 4096      # Most characters kept by each cache, the first ones met stay cached
+
+_char_words = {}            # Cache of already encoded non-ASCII characters
+_word_chars = {}            # Cache of already decoded non-ASCII words, the invalid ones aren't kept
+
+# endregion
+
+# region Encoding
+
+def _char_word(char):
+    """
+    Encode a single character to UTF-8 right-aligned on 4 bytes, using a cache.
+
+    Args:
+        char (str): Single character to encode
+
+    Returns:
+        bytes: Encoded character with padding to 4 bytes
+    """
+    word = _char_words.get(char)
+    if word is None:
+        word = char.encode('utf-8').rjust(WORD_SIZE, b'\x00')
+        if len(_char_words) < CHAR_CACHE_SIZE:
+            _char_words[char] = word
+    return word
+
+def encode_text(string):
+    """
+    Encode a string to an ISC payload (one 4 bytes word per character).
+
+    Args:
+        string (str): Text to encode
+
+    Returns:
+        bytes: Encoded payload
+    """
+    if string.isascii():
+        # ASCII characters only use the last byte of each word
+        payload = bytearray(len(string) * WORD_SIZE)
+        payload[WORD_SIZE - 1::WORD_SIZE] = string.encode('ascii')
+        return bytes(payload)
+
+    return b''.join(map(_char_word, string))
+
+def encode_codepoints(values):
+    """
+    Encode integer values to an ISC payload (big-endian 4 bytes words).
+
+    Args:
+        values (iterable[int]): Values to encode, each must fit in 4 bytes
+
+    Returns:
+        bytes: Encoded payload
+
+    Raises:
+        OverflowError: If a value doesn't fit in 4 bytes
+    """
+    words = values if isinstance(values, array) and values.typecode == WORD_TYPECODE else array(WORD_TYPECODE, values)
+    if not _BIG_ENDIAN_HOST:
+        words = array(WORD_TYPECODE, words)     # Copy to keep the caller's array untouched
+        words.byteswap()
+    return words.tobytes()
+
+def build_frame(type, payload):
+    """
+    Build a complete ISC frame from an already encoded payload.
+
+    Args:
+        type (str): Message type identifier
+        payload (bytes): Encoded payload (length must be a multiple of 4)
+
+    Returns:
+        bytes: Complete frame
+    """
+    return HEADER + type.encode('utf-8') + (len(payload) // WORD_SIZE).to_bytes(2, byteorder='big') + payload
+
+def encode_frame(type, string):
+    """
+    Encode a string message using the ISC protocol format.
+
+    Args:
+        type (str): Message type identifier
+        string (str): Message content to encode
+
+    Returns:
+        bytes: Complete frame
+    """
+    return build_frame(type, encode_text(string))
+
+# endregion
+
+# region Decoding
+
+def _word_char(word):
+    """
+    Decode a single 4 bytes word to text, using a cache.
+
+    Args:
+        word (bytes): 4 bytes word
+
+    Returns:
+        str: Decoded text, or '*' if the word isn't valid UTF-8
+    """
+    char = _word_chars.get(word)
+    if char is None:
+        try:
+            char = word.decode('utf-8')
+        except UnicodeDecodeError:
+            return '*'  # RSA ciphertexts are full of invalid words, caching them would only grow the cache
+        if len(_word_chars) < CHAR_CACHE_SIZE:
+            _word_chars[word] = char
+    return char
+
+def decode_text(payload):
+    """
+    Decode an ISC payload to a string, ignoring the padding bytes.
+
+    Args:
+        payload (bytes | bytearray | memoryview): Encoded payload
+
+    Returns:
+        str: Decoded text, invalid words are replaced by '*'
+    """
+    payload = bytes(payload) if isinstance(payload, memoryview) else payload
+    if payload.isascii():
+        # Every byte is a character by itself, the whole payload can be decoded at once
+        return payload.decode('ascii').replace('\x00', '')
+
+    words = [payload[i:i + WORD_SIZE] for i in range(0, len(payload), WORD_SIZE)]
+    return ''.join(map(_word_char, words)).replace('\x00', '')
+
+def iter_utf8(payload, chunk_words=4096):
+    """
+    Convert an ISC payload to UTF-8 chunk by chunk, the same bytes as decode_text(payload).encode('utf-8').
+
+    Args:
+        payload (bytes | bytearray | memoryview): Encoded payload
+        chunk_words (int, optional): Number of words converted at a time. Defaults to 4096.
+
+    Returns:
+        generator: UTF-8 bytes of consecutive chunks of the payload
+    """
+    view = memoryview(payload)
+    step = chunk_words * WORD_SIZE
+    for start in range(0, len(view), step):
+        chunk = bytes(view[start:start + step])
+        if chunk.isascii():
+            # The UTF-8 of ASCII words is their last byte, only the padding has to go
+            yield chunk.replace(b'\x00', b'')
+        else:
+            yield decode_text(chunk).encode('utf-8')
+
+def decode_codepoints(payload):
+    """
+    Decode an ISC payload to its integer values.
+
+    Args:
+        payload (bytes | bytearray | memoryview): Encoded payload
+
+    Returns:
+        array: Unsigned 32 bits values, one per word
+    """
+    usable = len(payload) - len(payload) % WORD_SIZE
+    words = array(WORD_TYPECODE)
+    words.frombytes(payload[:usable])
+    if not _BIG_ENDIAN_HOST:
+        words.byteswap()
+    return words
+
+def parse_header(header):
+    """
+    Extract the type and size fields of a frame header.
+
+    Args:
+        header (bytes): First 6 bytes of a frame
+
+    Returns:
+        tuple: (type (int), size (bytes)) as found in the header
+    """
+    return header[3], header[4:HEADER_SIZE]
+
+# endregion
@@ -0,0 +1,279 @@
+import math
+import codec
+
+try:
+    import numpy as np
+except ImportError:
+    np = None   # /crack is unavailable
+
+MAX_KEY_LENGTH = 32         # Longest Vigenere key looked for
+MIN_COLUMN_SIZE = 8         # Fewest values per column for a key length to be tried
+IOC_TOLERANCE = 0.9         # Shortest key length whose index of coincidence is this close to the best one
+PERIOD_AGREEMENT = 0.75     # Share of the key shifts a shorter period must repeat to replace the key length
+CANDIDATE_VALUES = 8        # Most frequent ciphered values tried against the likely characters
+LIKELY_CHARACTERS = 12      # Most frequent plaintext characters they are tried against
+ASCII_WINDOW = 256          # Every shift is tried when the printable ASCII shifts are at most this many
+
+# Frequency of the lowercase letters in English text, the space is counted apart
+LETTER_FREQUENCIES = {
+    'a': 8.2, 'b': 1.5, 'c': 2.8, 'd': 4.3, 'e': 12.7, 'f': 2.2, 'g': 2.0, 'h': 6.1, 'i': 7.0, 'j': 0.15,
+    'k': 0.77, 'l': 4.0, 'm': 2.4, 'n': 6.7, 'o': 7.5, 'p': 1.9, 'q': 0.095, 'r': 6.0, 's': 6.3, 't': 9.1,
+    'u': 2.8, 'v': 0.98, 'w': 2.4, 'x': 0.15, 'y': 2.0, 'z': 0.074,
+}
+SPACE_FREQUENCY = 18.0      # About one character in six is a space
+UPPERCASE_RATIO = 0.1       # Frequency of an uppercase letter relative to its lowercase one
+PUNCTUATION_FREQUENCY = 0.3 # Frequency of each digit and common punctuation character
+OTHER_ASCII_FREQUENCY = 0.01    # Frequency of the other printable ASCII characters
+UNICODE_FREQUENCY = 0.005   # Frequency of a valid non-ASCII character (e.g. accented letters)
+INVALID_FREQUENCY = 1e-7    # Frequency of a control character or a value that isn't a valid word
+
+_log_table = None           # Log frequency of the ASCII values, built on first use
+_likely_values = None       # Values of the LIKELY_CHARACTERS
+
+# region Scoring
+
+def _build_tables():
+    """
+    Build the log frequency table of the ASCII values and the list of the likely characters.
+    """
+    global _log_table, _likely_values
+    frequencies = np.full(128, INVALID_FREQUENCY)
+    frequencies[0x21:0x7F] = OTHER_ASCII_FREQUENCY
+    for char in "0123456789.,;:!?'\"-()\n":
+        frequencies[ord(char)] = PUNCTUATION_FREQUENCY
+    for char, frequency in LETTER_FREQUENCIES.items():
+        frequencies[ord(char)] = frequency
+        frequencies[ord(char.upper())] = frequency * UPPERCASE_RATIO
+    frequencies[ord(' ')] = SPACE_FREQUENCY
+
+    total = frequencies.sum()
+    _likely_values = np.argsort(frequencies)[::-1][:LIKELY_CHARACTERS].astype(np.int64)
+    _log_table = np.log(frequencies / total)
+
+def _log_frequencies(values):
+    """
+    Get the log frequency of decoded values, as plaintext characters.
+
+    Args:
+        values (numpy.ndarray): Decoded word values, of any shape
+
+    Returns:
+        numpy.ndarray: Log frequency of each value
+    """
+    is_ascii = (values >= 0) & (values < 128)
+    scores = np.where(_is_multibyte_word(values), math.log(UNICODE_FREQUENCY), math.log(INVALID_FREQUENCY))
+    return np.where(is_ascii, _log_table[np.where(is_ascii, values, 0)], scores)
+
+def _is_multibyte_word(values):
+    """
+    Check which values are a 2, 3 or 4 bytes UTF-8 character right-aligned in a word.
+
+    Args:
+        values (numpy.ndarray): Word values
+
+    Returns:
+        numpy.ndarray: True where the value is a valid non-ASCII character
+    """
+    def continuation(byte):
+        return (values >> (8 * byte)) & 0xC0 == 0x80
+
+    lead2, lead3, lead4 = values >> 8, values >> 16, values >> 24
+    two = (lead2 >= 0xC2) & (lead2 <= 0xDF) & continuation(0)
+    three = (lead3 >= 0xE0) & (lead3 <= 0xEF) & continuation(0) & continuation(1)
+    four = (lead4 >= 0xF0) & (lead4 <= 0xF4) & continuation(0) & continuation(1) & continuation(2)
+    return two | three | four
+
+def _best_shift(values):
+    """
+    Find the shift turning values into the most likely plaintext.
+    The shifts keeping every value printable ASCII are all tried when they are few, and the shifts mapping
+    the most frequent values to the most frequent characters are tried in any case.
+    The candidates are scored together on the distinct values, weighted by their count.
+
+    Args:
+        values (numpy.ndarray): Ciphered values, int64
+
+    Returns:
+        tuple: (shift (int), score (float)) shift to subtract and log likelihood of the plaintext
+    """
+    if len(values) == 0:
+        return 0, 0.0
+    unique, counts = np.unique(values, return_counts=True)
+    frequent = unique[np.argsort(counts)[::-1][:CANDIDATE_VALUES]]
+    candidates = [(frequent[:, None] - _likely_values[None, :]).ravel()]
+    low, high = unique[-1] - 0x7E, unique[0] - 0x20
+    if 0 <= high - low < ASCII_WINDOW:
+        candidates.append(np.arange(low, high + 1))
+    shifts = np.unique(np.concatenate(candidates))
+
+    scores = _log_frequencies(unique[None, :] - shifts[:, None]) @ counts
+    best = int(np.argmax(scores))
+    return int(shifts[best]), float(scores[best])
+
+# endregion
+
+# region Cracking
+
+def crack_shift(values):
+    """
+    Find the key of a shift ciphered message.
+
+    Args:
+        values (array): Ciphered values
+
+    Returns:
+        tuple: (shift (int), score (float)) key and log likelihood of the plaintext
+    """
+    return _best_shift(_as_numpy(values))
+
+def estimate_key_length(values):
+    """
+    Estimate the length of a Vigenere key with the index of coincidence.
+    The values of each column are ciphered with the same shift, so their index of coincidence is the one of
+    the plaintext for the right key length and its multiples, and lower for the other lengths.
+
+    Args:
+        values (array): Ciphered values
+
+    Returns:
+        int: Most likely key length, 1 if the message is too short
+    """
+    values = _as_numpy(values)
+    lengths = range(1, max(1, min(MAX_KEY_LENGTH, len(values) // MIN_COLUMN_SIZE)) + 1)
+    positions = np.arange(len(values))
+    indexes = []
+    for length in lengths:
+        # Count each (column, value) pair at once
+        columns = positions % length
+        pairs, counts = np.unique(values * length + columns, return_counts=True)
+        coincidences = np.bincount(pairs % length, weights=counts * (counts - 1), minlength=length)
+        sizes = np.bincount(columns, minlength=length)
+        indexes.append(np.mean(coincidences / np.maximum(sizes * (sizes - 1), 1)))
+
+    threshold = IOC_TOLERANCE * max(indexes)
+    return next(length for length, index in zip(lengths, indexes) if index >= threshold)
+
+def crack_vigenere(values):
+    """
+    Find the key of a Vigenere ciphered message: the key length is estimated, then each column is cracked
+    as a shift cipher.
+
+    Args:
+        values (array): Ciphered values
+
+    Returns:
+        tuple: (schedule (list[int]), score (float)) shift of each key character and log likelihood of the plaintext
+    """
+    array = _as_numpy(values)
+    length = estimate_key_length(array)
+    results = [_best_shift(array[column::length]) for column in range(length)]
+    period = _key_period([shift for shift, _ in results])
+    if period < length:
+        # The estimate was a multiple of the key length, the larger columns of the key itself are cracked again
+        results = [_best_shift(array[column::period]) for column in range(period)]
+    return [shift for shift, _ in results], sum(score for _, score in results)
+
+def crack(encryption_type, values):
+    """
+    Find the key of a message and decipher it.
+
+    Args:
+        encryption_type (str): "shift" or "vigenere"
+        values (array): Ciphered values
+
+    Returns:
+        tuple: (key (str), text (str)) key usable with /decrypt, or the shifts of the key characters if they
+               aren't all valid characters, and deciphered text
+
+    Raises:
+        RuntimeError: If NumPy isn't installed
+        ValueError: If the encryption type can't be cracked
+    """
+    array = _as_numpy(values)
+    match encryption_type:
+        case "shift":
+            shift, _ = _best_shift(array)
+            key, schedule = str(shift), [shift]
+        case "vigenere":
+            schedule, _ = crack_vigenere(array)
+            key = key_text(schedule) or str(schedule)
+        case _:
+            raise ValueError(f"{encryption_type} can't be cracked")
+
+    plain = array - np.resize(np.asarray(schedule, dtype=np.int64), len(array))
+    plain[(plain < 0) | (plain > 0xFFFFFFFF)] = ord('*')
+    return key, codec.decode_text(plain.astype('>u4').tobytes())
+
+def crack_messages(messages, encryption_type):
+    """
+    Crack several messages, see crack.
+
+    Args:
+        messages (list[array]): Ciphered values of each message
+        encryption_type (str): "shift" or "vigenere"
+
+    Returns:
+        list[tuple]: (key, text) of each message
+    """
+    return [crack(encryption_type, values) for values in messages]
+
+def key_text(schedule):
+    """
+    Get the Vigenere key word whose characters give a key schedule.
+
+    Args:
+        schedule (list[int]): Shift of each key character
+
+    Returns:
+        str | None: Key word, None if a shift isn't the value of a printable character other than a space
+                    (e.g. a shift of 0), the key can't be typed then
+    """
+    characters = []
+    for shift in schedule:
+        try:
+            character = shift.to_bytes(codec.WORD_SIZE, 'big').lstrip(b'\x00').decode('utf-8')
+        except (OverflowError, UnicodeDecodeError):
+            return None
+        if len(character) != 1 or not character.isprintable() or character.isspace():
+            return None
+        characters.append(character)
+    return ''.join(characters)
+
+def _key_period(schedule):
+    """
+    Find the length of the key in a key schedule cracked for a multiple of it (e.g. "keykfykey").
+    The noisy index of coincidence of the short columns can make a multiple look best.
+
+    Args:
+        schedule (list[int]): Shift found for each column
+
+    Returns:
+        int: Shortest period repeated by most of the shifts, the schedule length if there is none
+    """
+    for period in range(1, len(schedule)):
+        if len(schedule) % period:
+            continue
+        repeated = sum(max(votes.count(shift) for shift in votes)
+                       for votes in (schedule[column::period] for column in range(period)))
+        if repeated >= PERIOD_AGREEMENT * len(schedule):
+            return period
+    return len(schedule)
+
+def _as_numpy(values):
+    """
+    Get the values as a signed 64 bits NumPy array.
+
+    Raises:
+        RuntimeError: If NumPy isn't installed
+    """
+    if np is None:
+        raise RuntimeError("NumPy is needed to crack messages")
+    if _log_table is None:
+        _build_tables()
+    if isinstance(values, np.ndarray):
+        return values.astype(np.int64, copy=False)
+    if getattr(values, "typecode", None) == codec.WORD_TYPECODE:
+        return np.frombuffer(values, dtype=np.uint32).astype(np.int64)
+    return np.fromiter(values, dtype=np.int64)
+
+# endregion
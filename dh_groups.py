@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+import number_theory, offload
+from background_pool import BackgroundPool
+from metrics import metrics
+
+DH_SIZES = (16, 32, 64, 128, 256, 512)  # Selectable group sizes, in bits
+DH_BITS = 32                # Default group size, small enough for a server checking p by trial division
+POOL_SIZE = 16              # Groups kept ready per size
+LOW_WATER = 4               # A size is refilled up to POOL_SIZE when it has this many groups left
+SAVE_INTERVAL = 2.0         # Maximum time the generated groups wait to be saved during a refill, in seconds
+CACHE_DIR = os.environ.get("ISC_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "isc")
+CACHE_FILE = os.path.join(CACHE_DIR, "dh_groups.json")     # Groups kept from one session to the next
+
+_hits = metrics.counter("dh_groups_total", "Diffie-Hellman groups taken, by origin", origin="pool")
+_reuses = metrics.counter("dh_groups_total", "Diffie-Hellman groups taken, by origin", origin="reused")
+_misses = metrics.counter("dh_groups_total", "Diffie-Hellman groups taken, by origin", origin="generated")
+_generated = metrics.counter("dh_groups_generated_total", "Diffie-Hellman groups generated in the background")
+
+# region Groups
+
+def generate_group(bits):
+    """
+    Generate a Diffie-Hellman group: a safe prime and a generator of its multiplicative group.
+
+    Args:
+        bits (int): Size of the prime in bits
+
+    Returns:
+        tuple: (p, g) prime number and generator
+    """
+    p = number_theory.get_safe_prime(bits)
+    return p, number_theory.get_primitive_root(p)
+
+def is_valid_group(p, g, bits) -> bool:
+    """
+    Check a group read from the cache.
+
+    Args:
+        p (int): Prime modulus
+        g (int): Generator
+        bits (int): Expected size of the prime
+
+    Returns:
+        bool: True if p is a safe prime of the given size and g generates the group
+    """
+    q = (p - 1) // 2
+    if p.bit_length() != bits or not 1 < g < p - 1:
+        return False
+    if not (number_theory.is_prime(p) and number_theory.is_prime(q)):
+        return False
+    # The group has order 2q, g generates it if neither g^2 nor g^q is 1
+    return pow(g, 2, p) != 1 and pow(g, q, p) != 1
+
+# endregion
+
+# region Group Pool
+
+class GroupPool(BackgroundPool):
+    """
+    Pools of Diffie-Hellman groups generated in the background, one per group size, saved to disk.
+    The key exchange only takes a group from its pool. Each group is used once while the pool has more.
+    """
+
+    def __init__(self, path=CACHE_FILE, pool_size=POOL_SIZE, low_water=LOW_WATER):
+        """
+        Initialize the pool. Nothing is loaded until start() or take() is called.
+
+        Args:
+            path (str, optional): Cache file, None to keep the groups in memory only. Defaults to CACHE_FILE.
+            pool_size (int, optional): Groups kept ready per size. Defaults to POOL_SIZE.
+            low_water (int, optional): Groups left when the refill starts. Defaults to LOW_WATER.
+        """
+        super().__init__("DH GROUPS", "isc-dh-groups")
+        self.path = path
+        self.pool_size = pool_size
+        self.low_water = low_water
+
+        self._pools = {}            # bits -> deque of (p, g)
+        self._last = {}             # bits -> last group taken, reused when the pool is empty
+        self._wanted = []           # Sizes kept filled, in the order they were first used
+        self._refilling = set()     # Sizes being filled up to pool_size
+        self._dirty = False         # Pools changed since the last save
+        self._loaded = threading.Event()
+        self._counters = {"pool": 0, "reused": 0, "generated": 0, "background": 0}
+
+    def start(self, sizes=DH_SIZES):
+        """
+        Load the cache and keep group sizes filled in the background. Returns immediately.
+        Every selectable size is started by default, so no key exchange waits for a group to be generated.
+
+        Args:
+            sizes (iterable[int], optional): Group sizes to keep filled. Defaults to DH_SIZES.
+        """
+        with self._changed:
+            for bits in sizes:
+                if bits not in self._wanted:
+                    self._wanted.append(bits)
+                    self._pools.setdefault(bits, deque())
+                    self._changed.notify_all()
+            self._start_refill()
+
+    def take(self, bits=DH_BITS):
+        """
+        Get a group for a key exchange.
+        Taken from the pool if it has one, otherwise the last group of this size is used again.
+        A group is only generated here if none of this size was made yet: a size not started, or right after
+        start() with no cached group. The key exchanges take their group before the server dialogue starts.
+
+        Args:
+            bits (int, optional): Group size. Defaults to DH_BITS.
+
+        Returns:
+            tuple: (p, g) prime number and generator
+        """
+        self.start((bits,))
+        self._loaded.wait()
+        with self._changed:
+            pool = self._pools[bits]
+            if pool:
+                group, origin = pool.popleft(), "pool"
+                self._dirty = True
+            else:
+                group, origin = self._last.get(bits), "reused"
+            self._changed.notify_all()
+
+        if group is None:
+            group, origin = offload.run(generate_group, bits), "generated"
+        with self._changed:
+            self._last[bits] = group
+            self._counters[origin] += 1
+        {"pool": _hits, "reused": _reuses, "generated": _misses}[origin].inc()
+        return group
+
+    def stats(self):
+        """
+        Get the pool statistics.
+
+        Returns:
+            dict: Groups taken from the pools, reused and generated during a key exchange, generated in the
+                  background, and groups ready per size
+        """
+        with self._changed:
+            return {**self._counters, "ready": {bits: len(pool) for bits, pool in self._pools.items()}}
+
+    def _next_size(self):
+        """
+        Get the size to generate a group for, with the condition held.
+
+        Returns:
+            int | None: Group size with the fewest groups ready, so a slow size doesn't hold the others back.
+                        None if every pool is full enough.
+        """
+        sizes = []
+        for bits in self._wanted:
+            pool = self._pools[bits]
+            if len(pool) <= self.low_water:
+                self._refilling.add(bits)
+            if bits in self._refilling:
+                if len(pool) < self.pool_size:
+                    sizes.append(bits)
+                else:
+                    self._refilling.discard(bits)
+        return min(sizes, key=lambda bits: len(self._pools[bits]), default=None)
+
+    def _work(self):
+        """
+        Background thread function, loads the cache then keeps the pools filled and saved.
+        """
+        self._load()
+        self._loaded.set()
+        last_save = time.monotonic()
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._dirty or self._next_size() is not None)
+                bits = self._next_size()
+                # Saved once the refill is done, or from time to time during a long one
+                save = self._dirty and (bits is None or time.monotonic() - last_save > SAVE_INTERVAL)
+                if save:
+                    self._dirty = False
+
+            if save:
+                self._save()
+                last_save = time.monotonic()
+            if bits is not None:
+                generated = self._generate(generate_group, bits)
+                if generated is None:
+                    return
+                group, _ = generated
+                with self._changed:
+                    self._pools[bits].append(group)
+                    self._counters["background"] += 1
+                    self._dirty = True
+                _generated.inc()
+
+    def _load(self):
+        """
+        Read the cached groups, the invalid ones are dropped.
+        """
+        if self.path is None:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                cached = {int(size): [(int(p), int(g)) for p, g in groups]
+                          for size, groups in json.load(f)["groups"].items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return  # No cache yet, or unreadable
+
+        valid = {bits: [group for group in groups if is_valid_group(*group, bits)] for bits, groups in cached.items()}
+        with self._changed:
+            for bits, groups in valid.items():
+                self._pools.setdefault(bits, deque()).extend(groups)
+            self._changed.notify_all()
+
+    def _save(self):
+        """
+        Write the pools to the cache file, replacing it atomically.
+        """
+        if self.path is None:
+            return
+        with self._changed:
+            groups = {str(bits): [list(group) for group in pool] for bits, pool in self._pools.items() if pool}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temporary_path = self.path + ".tmp"
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "groups": groups}, f)
+            os.replace(temporary_path, self.path)
+        except OSError:
+            pass    # The cache is optional, the groups are generated again next session
+
+groups = GroupPool()    # Global pool used by the key exchanges
+
+# endregion
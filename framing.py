@@ -0,0 +1,179 @@
+import codec
+
+# region Frame Reassembly
+
+class FrameReader:
+    """
+    Incremental ISC frame reassembler working on a single reusable receive buffer.
+    Handles headers and payloads split across several reads as well as several frames in a single read.
+    Image payloads are received straight into their own preallocated buffer.
+    """
+
+    def __init__(self, connection, capacity=65536):
+        """
+        Initialize the reader.
+
+        Args:
+            connection (socket.socket): Connected socket to read from
+            capacity (int, optional): Initial size of the receive buffer. Defaults to 65536.
+        """
+        self.connection = connection
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._start = 0     # First byte not parsed yet
+        self._end = 0       # End of the received data
+
+        self._image: bytearray = None   # Payload of the image being received
+        self._image_view: memoryview = None
+        self._image_filled = 0          # Number of bytes of the image received
+        self._image_size = b''          # Size field of the image header
+
+    def receive(self):
+        """
+        Read the available bytes from the socket and extract every complete frame.
+        Blocks until at least one byte is received.
+
+        Returns:
+            list | None: List of (message_type (int), size (bytes), payload (bytes)) tuples,
+                         empty if no frame is complete yet, None if the connection was closed.
+                         Image payloads are bytearrays owned by the caller.
+        """
+        if self._image is not None:
+            return self._receive_image()
+
+        self._reserve()
+        received = self.connection.recv_into(self._view[self._end:])
+        if received == 0:
+            return None
+        self._end += received
+        return self._extract_frames()
+
+    def _extract_frames(self):
+        """
+        Extract every complete frame from the buffered data.
+
+        Returns:
+            list: List of (message_type (int), size (bytes), payload (bytes)) tuples
+        """
+        frames = []
+        while self._end - self._start >= codec.HEADER_SIZE:
+            if self._view[self._start:self._start + len(codec.HEADER)] != codec.HEADER:
+                self._resync()
+                continue
+
+            message_type, size = codec.parse_header(self._view[self._start:self._start + codec.HEADER_SIZE])
+            payload_start = self._start + codec.HEADER_SIZE
+            payload_end = payload_start + payload_size(message_type, size)
+            if payload_end > self._end:
+                if message_type == ord('i'):
+                    self._start_image(size, payload_start, payload_end)
+                break   # Payload not fully received yet
+
+            if message_type == ord('i'):
+                payload = bytearray(self._view[payload_start:payload_end])
+            else:
+                payload = bytes(self._view[payload_start:payload_end])
+            frames.append((message_type, bytes(size), payload))
+            self._start = payload_end
+
+        if self._start == self._end:
+            self._start = self._end = 0
+        return frames
+
+    def _start_image(self, size, payload_start, payload_end):
+        """
+        Move a partially received image payload to its own buffer, the next reads fill it directly.
+
+        Args:
+            size (memoryview): Size field of the image header
+            payload_start (int): Position of the payload in the receive buffer
+            payload_end (int): Position of the end of the payload in the receive buffer
+        """
+        self._image = bytearray(payload_end - payload_start)
+        self._image_view = memoryview(self._image)
+        self._image_filled = self._end - payload_start
+        self._image_view[:self._image_filled] = self._view[payload_start:self._end]
+        self._image_size = bytes(size)
+        self._start = self._end = 0
+
+    def _receive_image(self):
+        """
+        Read the next bytes of the image being received.
+
+        Returns:
+            list | None: The image frame if it is complete, an empty list otherwise, None if the connection was closed
+        """
+        received = self.connection.recv_into(self._image_view[self._image_filled:])
+        if received == 0:
+            return None
+        self._image_filled += received
+        if self._image_filled < len(self._image):
+            return []
+
+        frame = (ord('i'), self._image_size, self._image)
+        self._image_view.release()
+        self._image = self._image_view = None
+        return [frame]
+
+    def _resync(self):
+        """
+        Drop the bytes preceding the next frame header after a corrupted frame.
+        """
+        next_header = self._buffer.find(codec.HEADER, self._start + 1, self._end)
+        if next_header == -1:
+            # Keep the last bytes, they may be the beginning of the next header
+            self._start = max(self._start, self._end - len(codec.HEADER) + 1)
+        else:
+            self._start = next_header
+
+    def _reserve(self):
+        """
+        Make sure the buffer has free space after the received data.
+        Moves the pending bytes to the front of the buffer, or grows it if a frame doesn't fit.
+        """
+        needed = self._pending_frame_size()
+        if self._end < len(self._buffer) and self._start + needed <= len(self._buffer):
+            return
+
+        pending = self._end - self._start
+        if pending + max(needed - pending, 1) > len(self._buffer):
+            # Frame larger than the buffer, grow it
+            buffer = bytearray(max(needed, len(self._buffer) * 2))
+            buffer[:pending] = self._view[self._start:self._end]
+            self._view.release()
+            self._buffer = buffer
+            self._view = memoryview(self._buffer)
+        else:
+            self._buffer[:pending] = self._buffer[self._start:self._end]
+        self._start = 0
+        self._end = pending
+
+    def _pending_frame_size(self):
+        """
+        Get the total size of the frame currently being received.
+
+        Returns:
+            int: Size of the frame in bytes, or the header size if the header isn't complete
+        """
+        if self._end - self._start < codec.HEADER_SIZE:
+            return codec.HEADER_SIZE
+        message_type, size = codec.parse_header(self._view[self._start:self._start + codec.HEADER_SIZE])
+        return codec.HEADER_SIZE + payload_size(message_type, size)
+
+def payload_size(message_type, size):
+    """
+    Compute the payload length announced by a frame header.
+
+    Args:
+        message_type (int): Message type byte
+        size (bytes): Size field of the header
+
+    Returns:
+        int: Payload length in bytes
+    """
+    if message_type == ord('i'):
+        # Images are sent as width x height RGB pixels
+        return size[0] * size[1] * 3
+    return int.from_bytes(size, "big") * codec.WORD_SIZE
+
+# endregion
@@ -0,0 +1,38 @@
+import hashlib
+import codec
+
+CHUNK_WORDS = 4096      # Words converted to UTF-8 per update, bounds the memory used by a hash
+
+# region Hashing
+
+def sha256_payload(payload, chunk_words=CHUNK_WORDS):
+    """
+    Hash the text of an ISC payload with SHA-256, converting it to UTF-8 chunk by chunk.
+    Gives the same digest as hashing the decoded text, without building the text.
+
+    Args:
+        payload (bytes | bytearray | memoryview): Encoded payload
+        chunk_words (int, optional): Number of words converted per update. Defaults to CHUNK_WORDS.
+
+    Returns:
+        str: Hexadecimal digest
+    """
+    digest = hashlib.sha256()
+    for chunk in codec.iter_utf8(payload, chunk_words):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def sha256_payloads(payloads, chunk_words=CHUNK_WORDS):
+    """
+    Hash the text of several ISC payloads.
+
+    Args:
+        payloads (iterable): Encoded payloads
+        chunk_words (int, optional): Number of words converted per update. Defaults to CHUNK_WORDS.
+
+    Returns:
+        list[str]: Hexadecimal digests, in the same order
+    """
+    return [sha256_payload(payload, chunk_words) for payload in payloads]
+
+# endregion
@@ -0,0 +1,65 @@
+import threading
+from PyQt6.QtGui import QImage
+from signals import comm
+
+# region Image Decoder
+
+class ImageDecoder:
+    """
+    Builds the received images on a worker thread and hands them to the UI through comm.image_received.
+    Only the latest image waiting to be built is kept, so a burst of images can't pile up behind the UI.
+    """
+
+    def __init__(self):
+        """
+        Initialize the decoder. The worker thread is started with the first image.
+        """
+        self.dropped = 0                # Number of images replaced by a newer one before being built
+        self._pending = None            # (width, height, payload) of the next image to build
+        self._ready = threading.Condition()
+        self._thread: threading.Thread = None
+
+    def submit(self, width, height, payload):
+        """
+        Queue an image to be built. Thread-safe.
+
+        Args:
+            width (int): Width in pixels
+            height (int): Height in pixels
+            payload (bytes | bytearray): RGB pixels, 3 bytes per pixel, row by row
+        """
+        with self._ready:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = (width, height, payload)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, daemon=True, name="isc-image")
+                self._thread.start()
+            self._ready.notify()
+
+    def _work(self):
+        """
+        Worker thread function, builds the queued images forever.
+        """
+        while True:
+            with self._ready:
+                self._ready.wait_for(lambda: self._pending is not None)
+                width, height, payload = self._pending
+                self._pending = None
+            comm.image_received.emit(build_image(width, height, payload))
+
+def build_image(width, height, payload):
+    """
+    Wrap RGB pixels in a QImage without copying them.
+
+    Args:
+        width (int): Width in pixels
+        height (int): Height in pixels
+        payload (bytes | bytearray): RGB pixels, 3 bytes per pixel, row by row
+
+    Returns:
+        QImage: Image using the payload memory, the QImage keeps a reference to it
+    """
+    return QImage(payload, width, height, width * 3, QImage.Format.Format_RGB888)
+
+# endregion
@@ -1,12 +1,27 @@
-import window_interaction
+import os
 
 if __name__ == '__main__':
     """
     Main entry point for the application.
     Starts the GUI window and handles uncaught exceptions.
+    Set ISC_PROCESSES to run the crypto in a pool of worker processes (0 for one per CPU).
+    Set ISC_ARCHIVE_DIR to keep the received messages on disk from one session to the next.
     """
+    # Imported here so the spawned worker processes, which import this module, don't open a window
+    import window_interaction
+    import server_interaction
+    import offload
+    import dh_groups
+    import rsa_keys
 
     try:
+        if os.environ.get("ISC_PROCESSES"):
+            offload.start(int(os.environ["ISC_PROCESSES"]) or None)
+        if server_interaction.ARCHIVE_DIR:
+            server_interaction.open_archive()
+        # The Diffie-Hellman groups and RSA keys are generated before the first task needs them
+        dh_groups.groups.start()
+        rsa_keys.keys.start()
         window_interaction.load_window()
     except Exception as e:
         print(f"error : {e}")
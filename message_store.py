@@ -0,0 +1,219 @@
+import threading
+import time
+from array import array
+import codec
+
+# region Message Store
+
+class Frame:
+    """
+    Frame received from the server, kept by a MessageStore.
+    The text, codepoints and UTF-8 views of the payload are decoded on first access and kept,
+    so a message read by several commands or task steps is only decoded once.
+    """
+
+    __slots__ = ("seq", "type", "timestamp", "payload", "_text", "_codepoints", "_utf8")
+
+    def __init__(self, seq, type, timestamp, payload):
+        """
+        Initialize the frame.
+
+        Args:
+            seq (int): Sequence id, unique within the store
+            type (int): Message type byte
+            timestamp (float): Reception time (time.time())
+            payload (bytes): Encoded payload, not copied
+        """
+        self.seq = seq
+        self.type = type
+        self.timestamp = timestamp
+        self.payload = memoryview(payload)
+        self._text: str = None
+        self._codepoints: array = None
+        self._utf8: bytes = None
+
+    @property
+    def text(self) -> str:
+        """
+        Payload decoded to text, see codec.decode_text.
+        """
+        if self._text is None:
+            self._text = codec.decode_text(self.payload)
+        return self._text
+
+    @property
+    def codepoints(self) -> array:
+        """
+        Payload decoded to its integer values, see codec.decode_codepoints. Shared, must not be modified.
+        """
+        if self._codepoints is None:
+            self._codepoints = codec.decode_codepoints(self.payload)
+        return self._codepoints
+
+    @property
+    def utf8(self) -> bytes:
+        """
+        Text of the payload encoded to UTF-8, see codec.iter_utf8.
+        """
+        if self._utf8 is None:
+            if self._text is not None:
+                self._utf8 = self._text.encode('utf-8')
+            else:
+                self._utf8 = b''.join(codec.iter_utf8(self.payload))
+        return self._utf8
+
+    def copy(self, seq):
+        """
+        Get the same frame with another sequence id, for another store.
+        The payload and the views already decoded are shared.
+
+        Args:
+            seq (int): Sequence id in the other store
+
+        Returns:
+            Frame: The copy
+        """
+        frame = Frame(seq, self.type, self.timestamp, self.payload)
+        frame._text, frame._codepoints, frame._utf8 = self._text, self._codepoints, self._utf8
+        return frame
+
+    def __repr__(self):
+        return f"Frame(seq={self.seq}, type={chr(self.type)!r}, size={len(self.payload)})"
+
+class MessageStore:
+    """
+    Bounded, thread-safe message store.
+    Messages are kept in a ring buffer: once the capacity is reached, the oldest message is evicted.
+    Messages can be looked up in O(1) by sequence id or by position.
+    With an archive, every message is also written to disk and the evicted ones are read back from it.
+    """
+
+    def __init__(self, capacity=1000, archive=None):
+        """
+        Initialize the store.
+
+        Args:
+            capacity (int, optional): Maximum number of messages kept in memory. Defaults to 1000.
+            archive (MessageArchive, optional): Persistent archive, the sequence ids continue from its last message.
+                                                Defaults to None (memory only).
+        """
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+        self.capacity = capacity
+        self.archive = archive
+        self._records = [None] * capacity
+        self._first_seq = archive.next_seq if archive else 0    # Sequence id of the oldest message kept
+        self._next_seq = self._first_seq                        # Sequence id of the next message
+        self.changed = threading.Condition()    # Notified when a message is added
+
+    def append(self, payload, type=ord('s')):
+        """
+        Add a message to the store, evicting the oldest one if the store is full.
+
+        Args:
+            payload (bytes | Frame): Encoded payload, or a frame of another store, shared with its decoded views
+            type (int, optional): Message type byte, a frame keeps its own. Defaults to ord('s').
+
+        Returns:
+            Frame: The stored record
+        """
+        with self.changed:
+            if isinstance(payload, Frame):
+                record = payload.copy(self._next_seq)
+            else:
+                record = Frame(self._next_seq, type, time.time(), bytes(payload))
+            self._records[self._next_seq % self.capacity] = record
+            self._next_seq += 1
+            if self._next_seq - self._first_seq > self.capacity:
+                self._first_seq += 1
+            if self.archive is not None:
+                try:
+                    self.archive.append(record)
+                except (OSError, ValueError) as e:
+                    # Write error, or the archive was shared and its sequence ids no longer follow this store.
+                    # The archive is optional, the messages are still kept in memory.
+                    print(f"[ARCHIVE] Message #{record.seq} not archived, archiving stopped: {e!r}")
+                    self.archive = None
+            self.changed.notify_all()
+            return record
+
+    def get(self, seq):
+        """
+        Get a message by sequence id.
+
+        Args:
+            seq (int): Sequence id
+
+        Returns:
+            Frame | None: The record, None if unknown or evicted (and not archived)
+        """
+        with self.changed:
+            if self._first_seq <= seq < self._next_seq:
+                return self._records[seq % self.capacity]
+            archive = self.archive if seq < self._first_seq else None
+        return archive.get(seq) if archive is not None else None
+
+    def __getitem__(self, index):
+        """
+        Get a message by position, 0 being the oldest kept (or archived) and -1 the latest.
+
+        Args:
+            index (int): Position of the message
+
+        Returns:
+            Frame: The record
+
+        Raises:
+            IndexError: If there is no message at this position
+        """
+        with self.changed:
+            if self.archive is not None:
+                seq = (self._next_seq if index < 0 else self.archive.first_seq) + index
+            else:
+                length = self._next_seq - self._first_seq
+                if index < 0:
+                    index += length
+                if not 0 <= index < length:
+                    raise IndexError("Message index out of range")
+                return self._records[(self._first_seq + index) % self.capacity]
+        record = self.get(seq)
+        if record is None:
+            raise IndexError("Message index out of range")
+        return record
+
+    def __len__(self):
+        """
+        Get the number of messages kept in memory, the archived ones are not counted.
+        """
+        with self.changed:
+            return self._next_seq - self._first_seq
+
+    def __iter__(self):
+        with self.changed:
+            records = [self._records[seq % self.capacity] for seq in range(self._first_seq, self._next_seq)]
+        return iter(records)
+
+    def clear(self):
+        """
+        Remove every message from memory. Sequence ids keep increasing.
+        """
+        with self.changed:
+            for seq in range(self._first_seq, self._next_seq):
+                self._records[seq % self.capacity] = None
+            self._first_seq = self._next_seq
+
+    def wait_for_count(self, count, timeout=None) -> bool:
+        """
+        Wait until the store holds at least count messages.
+
+        Args:
+            count (int): Number of messages to wait for
+            timeout (float, optional): Maximum time to wait in seconds. Defaults to None (no limit).
+
+        Returns:
+            bool: True if the messages are there, False if timeout
+        """
+        with self.changed:
+            return self.changed.wait_for(lambda: self._next_seq - self._first_seq >= count, timeout)
+
+# endregion
@@ -0,0 +1,287 @@
+import bisect
+import contextlib
+import json
+import threading
+import time
+
+PREFIX = "isc_"                                                 # Prefix of the exported metric names
+LATENCY_BUCKETS = tuple(0.00005 * 2 ** i for i in range(18))   # Upper bounds in seconds, 50 us to 6.5 s
+
+# region Metric Types
+
+class Counter:
+    """
+    Monotonic counter.
+    """
+
+    def __init__(self, name, help, labels):
+        """
+        Initialize the counter at zero.
+
+        Args:
+            name (str): Metric name
+            help (str): Description of the metric
+            labels (dict): Label names and values
+        """
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """
+        Increase the counter. Thread-safe.
+
+        Args:
+            amount (int | float, optional): Increment. Defaults to 1.
+        """
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Current value of the counter
+        """
+        return {"type": "counter", "labels": self.labels, "value": self.value}
+
+    def _reset(self):
+        with self._lock:
+            self.value = 0
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets. Observing a value costs a binary search and a lock.
+    """
+
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            name (str): Metric name
+            help (str): Description of the metric
+            labels (dict): Label names and values
+            buckets (tuple, optional): Sorted upper bounds of the buckets. Defaults to LATENCY_BUCKETS.
+        """
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def observe(self, value):
+        """
+        Record a value. Thread-safe.
+
+        Args:
+            value (float): Observed value, in seconds for durations
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1     # The last count is the +Inf bucket
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    @contextlib.contextmanager
+    def time(self):
+        """
+        Context manager observing the time spent in its block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def percentile(self, fraction):
+        """
+        Estimate a percentile from the buckets.
+
+        Args:
+            fraction (float): Percentile between 0 and 1
+
+        Returns:
+            float: Upper bound of the bucket holding the percentile, the maximum for the +Inf bucket
+        """
+        with self._lock:
+            counts, count, maximum = list(self.counts), self.count, self.max
+        if count == 0:
+            return 0.0
+        rank = fraction * count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bound, maximum)
+        return maximum
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Buckets, count, sum and maximum of the histogram
+        """
+        with self._lock:
+            return {"type": "histogram", "labels": self.labels, "buckets": list(self.buckets),
+                    "counts": list(self.counts), "count": self.count, "sum": self.sum, "max": self.max}
+
+    def _reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = 0.0
+            self.max = 0.0
+
+# endregion
+
+# region Registry
+
+class Metrics:
+    """
+    Registry of the counters and histograms of the client.
+    Call sites get their metric once and keep it, updating it doesn't go through the registry.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty registry.
+        """
+        self._metrics = {}      # (name, labels) -> metric, in creation order
+        self._lock = threading.Lock()
+
+    def counter(self, name, help, **labels) -> Counter:
+        """
+        Get or create a counter.
+
+        Args:
+            name (str): Metric name, without the prefix
+            help (str): Description of the metric
+            **labels: Label names and values
+
+        Returns:
+            Counter: The counter
+        """
+        return self._get(Counter, name, help, labels)
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS, **labels) -> Histogram:
+        """
+        Get or create a histogram.
+
+        Args:
+            name (str): Metric name, without the prefix
+            help (str): Description of the metric
+            buckets (tuple, optional): Sorted upper bounds of the buckets. Defaults to LATENCY_BUCKETS.
+            **labels: Label names and values
+
+        Returns:
+            Histogram: The histogram
+        """
+        return self._get(Histogram, name, help, labels, buckets)
+
+    def _get(self, kind, name, help, labels, *args):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = kind(name, help, labels, *args)
+            return metric
+
+    def metrics(self):
+        """
+        Returns:
+            list: Every registered metric, in creation order
+        """
+        with self._lock:
+            return list(self._metrics.values())
+
+    def reset(self):
+        """
+        Set every metric back to zero.
+        """
+        for metric in self.metrics():
+            metric._reset()
+
+    def to_json(self) -> str:
+        """
+        Export the metrics as JSON.
+
+        Returns:
+            str: {"<name>": [snapshot, ...]} with one snapshot per label set
+        """
+        result = {}
+        for metric in self.metrics():
+            result.setdefault(PREFIX + metric.name, []).append(metric.snapshot())
+        return json.dumps(result, indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Export the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text
+        """
+        lines = []
+        described = set()
+        for metric in sorted(self.metrics(), key=lambda m: m.name):
+            name = PREFIX + metric.name
+            snapshot = metric.snapshot()
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {metric.help}")
+                lines.append(f"# TYPE {name} {snapshot['type']}")
+
+            if snapshot["type"] == "counter":
+                lines.append(f"{name}{_labels(metric.labels)} {snapshot['value']}")
+                continue
+
+            cumulative = 0
+            for bound, count in zip(snapshot["buckets"] + ["+Inf"], snapshot["counts"]):
+                cumulative += count
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                lines.append(f"{name}_bucket{_labels(metric.labels, le=le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(metric.labels)} {snapshot['sum']}")
+            lines.append(f"{name}_count{_labels(metric.labels)} {snapshot['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """
+        Describe the metrics that were updated, one line each.
+
+        Returns:
+            list[str]: Human readable lines, durations in milliseconds
+        """
+        lines = []
+        for metric in self.metrics():
+            name = metric.name + _labels(metric.labels)
+            if isinstance(metric, Counter):
+                if metric.value:
+                    lines.append(f"{name}: {metric.value:g}")
+            elif metric.count:
+                lines.append(f"{name}: {metric.count} x, mean {metric.sum / metric.count * 1000:.2f} ms, "
+                             f"p50 {metric.percentile(0.5) * 1000:.2f} ms, p99 {metric.percentile(0.99) * 1000:.2f} ms, "
+                             f"max {metric.max * 1000:.2f} ms")
+        return lines
+
+def _labels(labels, **extra):
+    """
+    Format labels for the Prometheus export.
+
+    Args:
+        labels (dict): Label names and values
+        **extra: Additional labels (e.g. the bucket bound)
+
+    Returns:
+        str: '{name="value",...}', empty if there is no label
+    """
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items.items()) + "}"
+
+metrics = Metrics()     # Global registry used across modules
+
+# endregion
@@ -0,0 +1,434 @@
+import argparse
+import hashlib
+import random
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+import codec, framing, ciphers, number_theory
+
+# Vocabulary of the generated messages, short words keep 10000 words within the 65535 characters of a frame
+WORDS = ("lorem", "ipsum", "dolor", "sit", "amet", "cras", "vitae", "nunc", "eget", "arcu",
+         "morbi", "sed", "leo", "nec", "dui", "fusce", "a", "est", "ut", "purus")
+VIGENERE_KEYS = ("key", "secret", "hevs", "crypto", "isc")
+MAX_CHARACTERS = 0xFFFF     # Maximum number of characters of a frame
+
+# region Mock Server
+
+class MockServer:
+    """
+    Local stand-in for the ISC server.
+    Speaks the ISC frame format and implements the task dialogues driven by server_interaction.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, segment_size=0):
+        """
+        Initialize the server. Nothing is listening until start() or serve_forever() is called.
+
+        Args:
+            host (str, optional): Address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): Port to listen on, 0 for any free port. Defaults to 0.
+            latency (float, optional): Delay added before each reply, in seconds. Defaults to 0.
+            jitter (float, optional): Random delay added on top of latency, in seconds. Defaults to 0.
+            segment_size (int, optional): If > 0, frames are written in pieces of this size. Defaults to 0.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.segment_size = segment_size
+        self.sessions = set()
+        self.sessions_lock = threading.Lock()
+
+        self._server = socketserver.ThreadingTCPServer((host, port), _Session, bind_and_activate=False)
+        self._server.allow_reuse_address = True
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self._server.server_bind()
+        self._server.server_activate()
+        self._thread = None
+
+    @property
+    def port(self):
+        """
+        Port the server is listening on.
+        """
+        return self._server.server_address[1]
+
+    def start(self):
+        """
+        Serve in a background thread.
+
+        Returns:
+            int: Port the server is listening on
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True, name="isc-mock-server")
+        self._thread.start()
+        return self.port
+
+    def serve_forever(self):
+        """
+        Serve until stop() is called.
+        """
+        self._server.serve_forever()
+
+    def stop(self):
+        """
+        Stop serving and close the listening socket.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def drop_connections(self):
+        """
+        Abort every client connection, e.g. to exercise the reconnection of the clients.
+        """
+        with self.sessions_lock:
+            sessions = list(self.sessions)
+        for session in sessions:
+            try:
+                session.request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def broadcast(self, frame):
+        """
+        Send a chat frame to every connected client.
+
+        Args:
+            frame (bytes): Encoded frame
+        """
+        with self.sessions_lock:
+            sessions = list(self.sessions)
+        for session in sessions:
+            session.send_frame(frame)
+
+class _Session(socketserver.BaseRequestHandler):
+    """
+    Connection of a single client to the mock server.
+    """
+
+    def setup(self):
+        """
+        Prepare the session and register it with the server, before handle() runs.
+        """
+        self.mock: MockServer = self.server.mock
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = framing.FrameReader(self.request)
+        self.pending = deque()
+        self.write_lock = threading.Lock()
+        with self.mock.sessions_lock:
+            self.mock.sessions.add(self)
+
+    def finish(self):
+        """
+        Unregister the session once the client disconnected.
+        """
+        with self.mock.sessions_lock:
+            self.mock.sessions.discard(self)
+
+    def handle(self):
+        """
+        Answer the client frames until it disconnects.
+        """
+        try:
+            while True:
+                frame = self._next_frame()
+                if frame is None:
+                    return
+                message_type, payload = frame
+                if message_type == ord('t'):
+                    self.mock.broadcast(codec.build_frame('t', payload))
+                elif message_type == ord('s'):
+                    text = codec.decode_text(payload)
+                    if text.startswith("task "):
+                        self._run_task(text.split(' ')[1:])
+                    else:
+                        self._reply(f"Unknown command \"{text}\"")
+        except (ConnectionError, OSError):
+            pass
+
+    # region Frames
+
+    def _next_frame(self):
+        """
+        Wait for the next frame sent by the client.
+
+        Returns:
+            tuple | None: (message_type, payload), None if the client disconnected
+        """
+        while not self.pending:
+            frames = self.reader.receive()
+            if frames is None:
+                return None
+            self.pending.extend((message_type, payload) for message_type, size, payload in frames)
+        return self.pending.popleft()
+
+    def _next_text(self):
+        """
+        Wait for the next server message sent by the client and decode it.
+
+        Returns:
+            str | None: Decoded text, None if the client disconnected
+        """
+        frame = self._next_frame()
+        while frame is not None and frame[0] != ord('s'):
+            frame = self._next_frame()
+        return None if frame is None else codec.decode_text(frame[1])
+
+    def _next_values(self):
+        """
+        Wait for the next server message sent by the client and get its values.
+
+        Returns:
+            array | None: Values of the payload, None if the client disconnected
+        """
+        frame = self._next_frame()
+        while frame is not None and frame[0] != ord('s'):
+            frame = self._next_frame()
+        return None if frame is None else codec.decode_codepoints(frame[1])
+
+    def send_frame(self, frame):
+        """
+        Send a frame, in pieces if a segment size is configured.
+
+        Args:
+            frame (bytes): Encoded frame
+        """
+        with self.write_lock:
+            if self.mock.segment_size <= 0:
+                self.request.sendall(frame)
+                return
+            for i in range(0, len(frame), self.mock.segment_size):
+                self.request.sendall(frame[i:i + self.mock.segment_size])
+
+    def _reply(self, *messages):
+        """
+        Send server messages after the configured latency.
+
+        Args:
+            *messages (str | bytes): Text messages, or already encoded payloads
+        """
+        delay = self.mock.latency + random.uniform(0, self.mock.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        # One write per reply, so the frames of a step are not held back by Nagle's algorithm
+        self.send_frame(b''.join(
+            codec.build_frame('s', message if isinstance(message, bytes) else codec.encode_text(message))
+            for message in messages))
+
+    def _verdict(self, ok):
+        """
+        Tell the client whether its answer is correct.
+
+        Args:
+            ok (bool): Result of the check
+        """
+        self._reply("Correct, task completed !" if ok else "Wrong answer, task failed.")
+
+    # endregion
+
+    # region Tasks
+
+    def _run_task(self, command):
+        """
+        Run the dialogue of a task.
+
+        Args:
+            command (list[str]): Task parameters (e.g. ["shift", "encode", "10"])
+        """
+        match command:
+            case ["shift" | "vigenere", "encode" | "decode", size] if size.isnumeric():
+                self._shift_vigenere(command[0], command[1], int(size))
+            case ["RSA", "encode", size] if size.isnumeric():
+                self._rsa_encode(int(size))
+            case ["RSA", "decode", size] if size.isnumeric():
+                self._rsa_decode(int(size))
+            case ["hash", "verify"]:
+                self._hash_verify()
+            case ["hash", "hash"]:
+                self._hash_hash()
+            case ["DifHel"]:
+                self._difhel()
+            case _:
+                self._reply(f"Unknown task \"{' '.join(command)}\"")
+
+    def _shift_vigenere(self, encryption_type, direction, size):
+        """
+        Shift or Vigenere dialogue: sends a message with its key and checks the answer of the client.
+
+        Args:
+            encryption_type (str): "shift" or "vigenere"
+            direction (str): "encode" or "decode"
+            size (int): Number of words of the message
+        """
+        if encryption_type == "shift":
+            key = str(random.randint(1, 25))
+        else:
+            key = random.choice(VIGENERE_KEYS)
+        plain = codec.decode_codepoints(codec.encode_text(random_text(size)))
+
+        if direction == "encode":
+            self._reply(f"Encode the following message with {encryption_type} using the key {key}", codec.encode_codepoints(plain))
+            expected = ciphers.shift_vigenere_crypt(encryption_type, key, plain)
+        else:
+            ciphered = ciphers.shift_vigenere_crypt(encryption_type, key, plain)
+            self._reply(f"Decode the following message with {encryption_type} using the key {key}", ciphered)
+            expected = codec.encode_codepoints(plain)
+
+        answer = self._next_values()
+        if answer is not None:
+            self._verdict(codec.encode_codepoints(answer) == expected)
+
+    def _rsa_encode(self, size):
+        """
+        RSA encode dialogue: sends a public key and a message, and checks the message encrypted by the client.
+
+        Args:
+            size (int): Number of words of the message
+        """
+        # Both primes below 2^16 so the encrypted values fit in 4 bytes
+        p = number_theory.get_next_prime(random.randint(1000, 60000))
+        q = number_theory.get_next_prime(random.randint(1000, 60000))
+        n, phi = p * q, (p - 1) * (q - 1)
+        e = 65537 if phi % 65537 else number_theory.get_coprime(phi)
+        plain = codec.decode_codepoints(codec.encode_text(random_text(size)))
+
+        self._reply(f"Encode the following message with RSA using the public key n={n}, e={e}", codec.encode_codepoints(plain))
+        answer = self._next_values()
+        if answer is not None:
+            self._verdict(list(answer) == [pow(c, e, n) for c in plain])
+
+    def _rsa_decode(self, size):
+        """
+        RSA decode dialogue: encrypts a message with the public key of the client and checks its decryption.
+
+        Args:
+            size (int): Number of words of the message
+        """
+        self._reply("Send your public key as n,e")
+        key = self._next_text()
+        if key is None:
+            return
+        try:
+            n, e = (int(x) for x in key.split(','))
+        except ValueError:
+            self._reply("Invalid public key, task failed.")
+            return
+        if n >= 1 << 32:
+            self._reply("Modulus too big, task failed.")
+            return
+
+        plain = codec.decode_codepoints(codec.encode_text(random_text(size)))
+        self._reply(codec.encode_codepoints(pow(c, e, n) for c in plain))
+        answer = self._next_values()
+        if answer is not None:
+            self._verdict(list(answer) == [c % n for c in plain])
+
+    def _hash_verify(self):
+        """
+        Hash verify dialogue: sends a message with a right or wrong SHA-256 digest and checks the verdict of the client.
+        """
+        message = random_text(random.randint(10, 200))
+        digest = hashlib.sha256(message.encode()).hexdigest()
+        valid = random.random() < 0.5
+        if not valid:
+            digest = hashlib.sha256((message + ".").encode()).hexdigest()
+
+        self._reply("Verify the SHA-256 hash of the following message", message, digest)
+        answer = self._next_text()
+        if answer is not None:
+            self._verdict(answer == str(valid).lower())
+
+    def _hash_hash(self):
+        """
+        Hash dialogue: sends a message and checks the SHA-256 digest computed by the client.
+        """
+        message = random_text(random.randint(10, 200))
+        self._reply("Hash the following message with SHA-256", message)
+        answer = self._next_text()
+        if answer is not None:
+            self._verdict(answer == hashlib.sha256(message.encode()).hexdigest())
+
+    def _difhel(self):
+        """
+        Diffie-Hellman dialogue: checks the group sent by the client, exchanges the half keys and checks the
+        shared secret.
+        """
+        self._reply("Send a prime number and a generator as p,g")
+        group = self._next_text()
+        if group is None:
+            return
+        try:
+            p, g = (int(x) for x in group.split(','))
+            accepted = number_theory.is_prime(p) and g == _check_generator(p, g)
+        except ValueError:
+            accepted = False
+        if not accepted:
+            self._reply("p and g refused, task failed.")
+            return
+
+        secret = random.randint(1, max(p - 2, 1))
+        self._reply("p and g accepted", str(pow(g, secret, p)))
+
+        client_half_key = self._next_text()
+        if client_half_key is None or not client_half_key.isnumeric():
+            return
+        self._reply("Send the shared secret")
+
+        shared = self._next_text()
+        if shared is not None:
+            self._verdict(shared == str(pow(int(client_half_key), secret, p)))
+
+    # endregion
+
+def _check_generator(p, g):
+    """
+    Check that g generates the multiplicative group modulo p.
+
+    Args:
+        p (int): Prime modulus
+        g (int): Candidate generator
+
+    Returns:
+        int | None: g if it is a generator, None otherwise
+    """
+    for factor in set(number_theory.get_prime_factors(p - 1)):
+        if pow(g, (p - 1) // factor, p) == 1:
+            return None
+    return g
+
+def random_text(words):
+    """
+    Generate a random message.
+
+    Args:
+        words (int): Number of words
+
+    Returns:
+        str: Words separated by spaces, truncated to the size of a frame
+    """
+    return ' '.join(random.choices(WORDS, k=words))[:MAX_CHARACTERS]
+
+# endregion
+
+def main(argv=None):
+    """
+    Run the mock server until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Local stand-in ISC server.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=6000, help="port to listen on, 0 for any free port")
+    parser.add_argument("--latency", type=float, default=0.0, help="delay before each reply, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random delay added to the latency, in seconds")
+    parser.add_argument("--segment-size", type=int, default=0, help="write frames in pieces of this size")
+    args = parser.parse_args(argv)
+
+    server = MockServer(args.host, args.port, args.latency, args.jitter, args.segment_size)
+    print(f"[MOCK SERVER] Listening on {args.host}:{server.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
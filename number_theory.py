@@ -0,0 +1,336 @@
+import math
+import random
+import threading
+
+SIEVE_SEGMENT = 1 << 16     # Size of the segments added to the sieve
+SIEVE_LIMIT = 1 << 22       # Numbers below this limit are checked with the sieve
+
+# Bases making Miller-Rabin deterministic for every n < 3.3 * 10^24 (so every 64 bits number)
+DETERMINISTIC_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+DETERMINISTIC_LIMIT = 3_317_044_064_679_887_385_961_981
+PROBABILISTIC_ROUNDS = 16   # Additional random bases for bigger numbers
+
+_sieve_lock = threading.Lock()
+
+# region Sieve
+
+def _base_sieve(limit):
+    """
+    Build a plain sieve of Eratosthenes.
+
+    Args:
+        limit (int): Upper bound (excluded)
+
+    Returns:
+        bytearray: sieve[i] == 1 if i is prime
+    """
+    sieve = bytearray(b'\x01') * limit
+    sieve[0:2] = b'\x00\x00'
+    for p in range(2, math.isqrt(limit - 1) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = bytes(len(range(p * p, limit, p)))
+    return sieve
+
+# _sieve[i] == 1 if i is prime, covers [0, len(_sieve)). The first segment holds every base prime of the next ones
+_sieve = _base_sieve(SIEVE_SEGMENT)
+
+def _extend_sieve(limit):
+    """
+    Extend the cached sieve segment by segment until it covers every number below limit.
+
+    Args:
+        limit (int): Upper bound (excluded) to cover
+    """
+    limit = min(limit, SIEVE_LIMIT)
+    with _sieve_lock:
+        while len(_sieve) < limit:
+            low = len(_sieve)
+            high = min(low + SIEVE_SEGMENT, SIEVE_LIMIT)
+            segment = bytearray(b'\x01') * (high - low)
+
+            # Cross out the multiples of the base primes, already known since sqrt(high) < low
+            for p in _primes_up_to(math.isqrt(high - 1)):
+                start = max(p * p, (low + p - 1) // p * p)
+                segment[start - low::p] = bytes(len(range(start - low, high - low, p)))
+            _sieve.extend(segment)
+
+def _primes_up_to(limit):
+    """
+    Iterate over the primes of the cached sieve up to limit (included).
+
+    Args:
+        limit (int): Upper bound, must already be covered by the sieve
+
+    Returns:
+        generator: Prime numbers in ascending order
+    """
+    p = _sieve.find(1, 2, limit + 1)
+    while p != -1:
+        yield p
+        p = _sieve.find(1, p + 1, limit + 1)
+
+def small_primes(limit):
+    """
+    Get the prime numbers up to limit using the cached sieve.
+
+    Args:
+        limit (int): Upper bound (included), at most SIEVE_LIMIT
+
+    Returns:
+        list[int]: Prime numbers in ascending order
+    """
+    _extend_sieve(limit + 1)
+    return list(_primes_up_to(limit))
+
+_TRIAL_PRIMES = small_primes(1000)      # Primes used for trial division before the heavier tests
+
+# endregion
+
+# region Primality
+
+def is_prime(n: int) -> bool:
+    """
+    Check if a number is prime.
+    Uses the cached sieve for small numbers and Miller-Rabin for bigger ones
+    (deterministic for 64 bits numbers, probabilistic beyond).
+
+    Args:
+        n (int): Number to check
+
+    Returns:
+        bool: True if prime, False otherwise
+    """
+    if n < SIEVE_LIMIT:
+        if n < 2:
+            return False
+        if n >= len(_sieve):
+            _extend_sieve(n + 1)
+        return _sieve[n] == 1
+
+    for p in _TRIAL_PRIMES:
+        if n % p == 0:
+            return False
+
+    bases = DETERMINISTIC_BASES
+    if n >= DETERMINISTIC_LIMIT:
+        bases += tuple(random.randrange(2, n - 1) for _ in range(PROBABILISTIC_ROUNDS))
+    return _miller_rabin(n, bases)
+
+def _miller_rabin(n, bases):
+    """
+    Run the Miller-Rabin test on an odd number.
+
+    Args:
+        n (int): Odd number to check
+        bases (iterable[int]): Witnesses to try
+
+    Returns:
+        bool: False if n is composite, True if n is (probably) prime
+    """
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+def get_next_prime(n):
+    """
+    Find the smallest prime number greater than n.
+
+    Args:
+        n (int): Lower limit
+
+    Returns:
+        int: Smallest prime > n
+    """
+    if n + 1 < SIEVE_LIMIT:
+        _extend_sieve(min(n + 2 + SIEVE_SEGMENT, SIEVE_LIMIT))
+        p = _sieve.find(1, max(n + 1, 0))
+        if p != -1:
+            return p
+        n = len(_sieve) - 1
+
+    num = n + 1 if n % 2 == 0 else n + 2   # Only odd numbers can be primes from here
+    while not is_prime(num):
+        num += 2
+    return num
+
+def get_last_prime(num):
+    """
+    Find the largest prime number lower than num.
+
+    Args:
+        num (int): Upper limit (excluded)
+
+    Returns:
+        int: Largest prime < num, or 3 if there is none above 3
+    """
+    if num <= SIEVE_LIMIT:
+        _extend_sieve(num)
+        return max(_sieve.rfind(1, 4, max(num, 4)), 3)
+
+    curr_num = num - 1 if num % 2 == 0 else num - 2
+    while not is_prime(curr_num):
+        curr_num -= 2
+    return curr_num
+
+def get_random_prime(bits):
+    """
+    Generate a random prime number of the given size.
+
+    Args:
+        bits (int): Number of bits of the prime, at least 2
+
+    Returns:
+        int: Prime number in [2^(bits-1), 2^bits)
+    """
+    while True:
+        # Set the highest bit for the size and the lowest one to get an odd number
+        candidate = random.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if is_prime(candidate):
+            return candidate
+
+def get_safe_prime(bits):
+    """
+    Generate a random safe prime p = 2q + 1, q being prime too.
+    Used for the Diffie-Hellman groups, p - 1 has no small factor but 2.
+
+    Args:
+        bits (int): Number of bits of the prime, at least 3
+
+    Returns:
+        int: Safe prime in [2^(bits-1), 2^bits)
+    """
+    while True:
+        q = random.getrandbits(bits - 1) | (1 << (bits - 2)) | 1
+        # Sieve q and 2q + 1 with the small primes before the heavier tests
+        if any(q % r in (0, r >> 1) for r in _TRIAL_PRIMES[1:] if r < q):
+            continue
+        if is_prime(q) and is_prime(2 * q + 1):
+            return 2 * q + 1
+
+def get_coprime(n):
+    """
+    Find a coprime number for n (gcd(e,n) = 1).
+    Used in RSA key generation.
+
+    Args:
+        n (int): Number to find coprime for
+
+    Returns:
+        int: A number coprime to n
+    """
+    while True:
+        e = random.randint(2, n - 1)
+        if math.gcd(e, n) == 1: return e
+
+# endregion
+
+# region Factorization
+
+def get_prime_factors(n) -> list[int]:
+    """
+    Factorize a number into its prime factors.
+    Uses trial division for the small factors and Pollard's rho for the big ones.
+
+    Args:
+        n (int): Number to factorize
+
+    Returns:
+        list[int]: List of prime factors in ascending order, with repetitions
+    """
+    prime_factors = []
+    for p in _TRIAL_PRIMES:
+        if p * p > n:
+            break
+        while n % p == 0:
+            prime_factors.append(p)
+            n //= p
+
+    remaining = [n] if n > 1 else []
+    while remaining:
+        m = remaining.pop()
+        if is_prime(m):
+            prime_factors.append(m)
+        else:
+            d = _pollard_rho(m)
+            remaining += [d, m // d]
+
+    prime_factors.sort()
+    return prime_factors
+
+def _pollard_rho(n):
+    """
+    Find a non-trivial divisor of a composite number with Brent's variant of Pollard's rho.
+
+    Args:
+        n (int): Composite number
+
+    Returns:
+        int: Divisor d of n with 1 < d < n
+    """
+    if n % 2 == 0:
+        return 2
+    while True:
+        y, c, m = random.randrange(1, n), random.randrange(1, n), 128
+        g = r = q = 1
+        x = ys = y
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+
+        if g == n:
+            # The batched gcd went too far, retry step by step from the last saved point
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+def get_primitive_root(n):
+    """
+    Find a primitive root modulo n.
+    Used in Diffie-Hellman key exchange.
+
+    Args:
+        n (int): Modulus (prime number)
+
+    Returns:
+        int: Primitive root of n
+    """
+    g = 1
+    prime_factors = set(get_prime_factors(n - 1))  # Remove duplicates
+    ok = False
+    while not ok:
+        g += 1
+        ok = True
+        for pf in prime_factors:
+            if pow(g, (n - 1) // pf, n) == 1:
+                ok = False
+                break
+    return g
+
+# endregion
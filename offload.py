@@ -0,0 +1,207 @@
+import math
+import os
+import threading
+import time
+import rsa_cipher, number_theory, hashing
+from metrics import metrics
+
+MIN_CHUNK = 1024                # Smallest number of values sent to a worker process
+HASH_OFFLOAD_BYTES = 64 << 10   # Smaller payloads are hashed in-thread, a frame holds up to 256 KiB
+RETRY_DELAY = 5.0               # Time background work waits before using the pool again after an error, in seconds
+
+_pool = None    # ProcessPoolExecutor running the offloaded work, None when the work is done in-thread
+_workers = 0
+stopped = threading.Event()     # Set by stop(), the background work using the pool ends instead of retrying
+
+# region Process Pool
+
+def start(workers=None):
+    """
+    Start the process pool and warm it up: every worker process is spawned and has imported the crypto modules
+    before the first task needs it. Does nothing if the pool is already running.
+
+    Args:
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        int: Number of worker processes
+    """
+    global _pool, _workers
+    if _pool is not None:
+        return _workers
+
+    # Imported here, most sessions never start the pool
+    import atexit
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    stopped.clear()
+    _workers = workers or os.cpu_count() or 1
+    # Spawned processes don't inherit the threads and sockets of the client
+    _pool = ProcessPoolExecutor(_workers, mp_context=multiprocessing.get_context("spawn"))
+    # Shut down before the interpreter tears down the executor's threads
+    atexit.register(stop)
+    for future in [_pool.submit(_warm_up) for _ in range(_workers)]:
+        future.result()
+    return _workers
+
+def stop():
+    """
+    Stop the process pool, the work is done in-thread again.
+    The background work using the pool (key and group refills) ends. Called at exit, can be called again.
+    """
+    global _pool, _workers
+    stopped.set()
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+        _workers = 0
+
+def enabled() -> bool:
+    """
+    Check if the process pool is running.
+
+    Returns:
+        bool: True if the work is sent to the worker processes
+    """
+    return _pool is not None
+
+def _warm_up():
+    """
+    First job of every worker process, fills the caches of the crypto modules.
+    """
+    import ciphers
+    number_theory.small_primes(1000)
+    return os.getpid()
+
+# endregion
+
+# region Offloaded Operations
+
+def _timed(function, *args):
+    """
+    Call a function and measure the time it takes, in the process running it.
+
+    Returns:
+        tuple: (result, seconds)
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def _kernel_time(function):
+    """
+    Get the histogram of the time spent in a crypto function.
+
+    Args:
+        function (callable): Function run by the module
+
+    Returns:
+        Histogram: Kernel time histogram labelled with the function name
+    """
+    return metrics.histogram("cipher_kernel_seconds", "Time spent in a crypto kernel, per call or chunk",
+                             kernel=function.__name__)
+
+def run(function, *args):
+    """
+    Run a function in a worker process, or in the calling thread if the pool isn't running.
+
+    Args:
+        function (callable): Module-level function, so it can be sent to the workers
+        *args: Arguments of the function
+
+    Returns:
+        Any: Result of the function
+    """
+    if _pool is None:
+        result, seconds = _timed(function, *args)
+    else:
+        result, seconds = _pool.submit(_timed, function, *args).result()
+    _kernel_time(function).observe(seconds)
+    return result
+
+def map_chunks(function, values, *args, chunk=None, align=1):
+    """
+    Apply a function to consecutive chunks of values, spread over the worker processes.
+
+    Args:
+        function (callable): Module-level function called as function(chunk_values, *args)
+        values (array): Values to process
+        *args: Other arguments of the function
+        chunk (int, optional): Number of values per chunk. Defaults to an even split over the workers.
+        align (int, optional): The chunk size is a multiple of align (e.g. the Vigenere key length). Defaults to 1.
+
+    Returns:
+        generator: Results of the chunks, in order. Closing it cancels the chunks not started yet.
+    """
+    if chunk is None:
+        chunk = max(math.ceil(len(values) / max(_workers, 1)), MIN_CHUNK)
+    chunk = max(chunk // align, 1) * align
+    ranges = range(0, len(values), chunk)
+
+    kernel_time = _kernel_time(function)
+    if _pool is None:
+        for start in ranges:
+            result, seconds = _timed(function, values[start:start + chunk], *args)
+            kernel_time.observe(seconds)
+            yield result
+        return
+
+    # The kernel time is measured in the workers, the results wait in the futures for their turn
+    futures = [_pool.submit(_timed, function, values[start:start + chunk], *args) for start in ranges]
+    try:
+        for future in futures:
+            result, seconds = future.result()
+            kernel_time.observe(seconds)
+            yield result
+    finally:
+        for future in futures:
+            future.cancel()
+
+def shift_vigenere_chunk(values, encryption_type, key, direction=1):
+    """
+    Shift or Vigenere cipher of a chunk, see ciphers.shift_vigenere_crypt.
+    The chunk must start on a multiple of the key length.
+    """
+    import ciphers     # Imported on first use, it loads numpy
+    return ciphers.shift_vigenere_crypt(encryption_type, key, values, direction)
+
+def rsa_chunk(values, exponent, n):
+    """
+    RSA operation on a chunk, see rsa_cipher.rsa_crypt.
+    """
+    return rsa_cipher.rsa_crypt(values, exponent, n)
+
+def rsa_decrypt_chunk(values, key):
+    """
+    RSA decryption of a chunk with the private factors of the key, see rsa_cipher.decrypt.
+    """
+    return rsa_cipher.decrypt(values, key)
+
+def crack_chunk(messages, encryption_type):
+    """
+    Cryptanalysis of a chunk of messages, see cryptanalysis.crack_messages.
+    """
+    import cryptanalysis    # Imported on first use, it loads numpy
+    return cryptanalysis.crack_messages(messages, encryption_type)
+
+def sha256_payload(payload):
+    """
+    Hash the text of an ISC payload with SHA-256, see hashing.sha256_payload.
+    Done in a worker process if the payload is big and the pool is running.
+
+    Args:
+        payload (bytes | bytearray | memoryview): Encoded payload
+
+    Returns:
+        str: Hexadecimal digest
+    """
+    if _pool is None or len(payload) < HASH_OFFLOAD_BYTES:
+        result, seconds = _timed(hashing.sha256_payload, payload)
+    else:
+        # A memoryview can't be sent to a worker process
+        result, seconds = _pool.submit(_timed, hashing.sha256_payload, bytes(payload)).result()
+    _kernel_time(hashing.sha256_payload).observe(seconds)
+    return result
+
+# endregion
@@ -0,0 +1,190 @@
+import threading
+import time
+from metrics import metrics
+
+MAX_PENDING_BYTES = 1 << 20     # Bytes queued before the senders are held back
+COALESCE_BYTES = 64 * 1024      # Maximum size of the frames written in a single call
+
+_frames_sent = metrics.counter("frames_sent_total", "Frames written to the server")
+_bytes_sent = metrics.counter("bytes_sent_total", "Bytes written to the server")
+_queue_wait = metrics.histogram("send_queue_wait_seconds", "Time a frame waits in the send queue before being written")
+_frames_refused = metrics.counter("frames_refused_total", "Frames refused because the send queue was full or closed")
+_sender_blocked = metrics.histogram("send_blocked_seconds", "Time a sender is held back by a full send queue")
+
+# region Outbound Writer
+
+class OutboundWriter:
+    """
+    Thread-safe send queue drained by a single writer thread.
+    Frames are always written completely and in order, small frames queued together are written
+    in a single call, and the senders are held back when the server doesn't read fast enough.
+    When the connection is lost the frames not written yet stay queued until a new connection is attached.
+    """
+
+    def __init__(self, connection, max_pending_bytes=MAX_PENDING_BYTES, coalesce_bytes=COALESCE_BYTES, on_error=None):
+        """
+        Initialize the writer and start its thread.
+
+        Args:
+            connection (socket.socket): Connected socket to write to, None to start paused
+            max_pending_bytes (int, optional): Bytes queued before the senders are held back. Defaults to MAX_PENDING_BYTES.
+            coalesce_bytes (int, optional): Maximum size of a single write. Defaults to COALESCE_BYTES.
+            on_error (callable, optional): Called from the writer thread with the socket and the error when a write fails
+        """
+        self.connection = connection
+        self.max_pending_bytes = max_pending_bytes
+        self.coalesce_bytes = coalesce_bytes
+        self.on_error = on_error
+
+        self._frames = []
+        self._queued_at = []            # Time each queued frame was added
+        self._pending_bytes = 0
+        self._closed = False
+        self.error: OSError = None      # Error that stopped the writer, if any
+        self._changed = threading.Condition()
+
+        self.stats = {"frames": 0, "bytes": 0, "writes": 0, "refused": 0, "blocked_time": 0.0, "max_pending_bytes": 0}
+
+        self._thread = threading.Thread(target=self._work, daemon=True, name="isc-writer")
+        self._thread.start()
+
+    @property
+    def pending_bytes(self):
+        """
+        Number of bytes queued and not written yet.
+        """
+        return self._pending_bytes
+
+    def send(self, frame, block=True, timeout=None) -> bool:
+        """
+        Queue a frame.
+
+        Args:
+            frame (bytes): Encoded frame
+            block (bool, optional): Wait for room in the queue if it is full. Defaults to True.
+            timeout (float, optional): Maximum time to wait in seconds. Defaults to None (no limit).
+
+        Returns:
+            bool: True if the frame is queued, False if the queue is full or the writer is closed
+        """
+        with self._changed:
+            if self._is_full(len(frame)) and block:
+                start = time.perf_counter()
+                self._changed.wait_for(lambda: self._closed or not self._is_full(len(frame)), timeout)
+                blocked = time.perf_counter() - start
+                self.stats["blocked_time"] += blocked
+                _sender_blocked.observe(blocked)
+
+            if self._closed or self._is_full(len(frame)):
+                self.stats["refused"] += 1
+                _frames_refused.inc()
+                return False
+
+            self._frames.append(frame)
+            self._queued_at.append(time.perf_counter())
+            self._pending_bytes += len(frame)
+            self.stats["max_pending_bytes"] = max(self.stats["max_pending_bytes"], self._pending_bytes)
+            self._changed.notify_all()
+            return True
+
+    def _is_full(self, size):
+        # A frame is always accepted by an empty queue, whatever its size
+        return self._pending_bytes > 0 and self._pending_bytes + size > self.max_pending_bytes
+
+    def flush(self, timeout=None) -> bool:
+        """
+        Wait until every queued frame is written.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds. Defaults to None (no limit).
+
+        Returns:
+            bool: True if the queue is empty
+        """
+        with self._changed:
+            if self.connection is None:
+                return self._pending_bytes == 0     # Nothing can be written until a connection is attached
+            return self._changed.wait_for(lambda: self._closed or self._pending_bytes == 0, timeout) \
+                and self._pending_bytes == 0
+
+    def attach(self, connection):
+        """
+        Write the queued frames, and the next ones, to a new connection.
+
+        Args:
+            connection (socket.socket): Connected socket to write to
+        """
+        with self._changed:
+            self.connection = connection
+            self.error = None
+            self._changed.notify_all()
+
+    def detach(self):
+        """
+        Stop writing to the current connection, the frames stay queued until a connection is attached.
+        """
+        with self._changed:
+            self.connection = None
+            self._changed.notify_all()
+
+    def close(self, flush_timeout=0.5):
+        """
+        Stop the writer, giving the queued frames a chance to be written first.
+
+        Args:
+            flush_timeout (float, optional): Maximum time to wait for the queued frames in seconds. Defaults to 0.5.
+        """
+        self.flush(flush_timeout)
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+    def _work(self):
+        """
+        Writer thread function, writes the queued frames until closed.
+        """
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._closed or (self._frames and self.connection is not None))
+                if self._closed:
+                    return
+                connection = self.connection
+
+                # Take the frames fitting in a single write
+                count, size = 1, len(self._frames[0])
+                while count < len(self._frames) and size + len(self._frames[count]) <= self.coalesce_bytes:
+                    size += len(self._frames[count])
+                    count += 1
+                frames, self._frames = self._frames[:count], self._frames[count:]
+                queued_at, self._queued_at = self._queued_at[:count], self._queued_at[count:]
+
+            now = time.perf_counter()
+            for queued in queued_at:
+                _queue_wait.observe(now - queued)
+
+            data = frames[0] if count == 1 else b''.join(frames)
+            try:
+                connection.sendall(data)
+            except OSError as e:
+                with self._changed:
+                    # Put the frames back, they are written again in full to the next connection
+                    self._frames[:0] = frames
+                    self._queued_at[:0] = queued_at
+                    if self.connection is connection:
+                        self.connection = None
+                        self.error = e
+                    self._changed.notify_all()
+                if self.on_error:
+                    self.on_error(connection, e)
+                continue
+
+            with self._changed:
+                self._pending_bytes -= size
+                self.stats["frames"] += count
+                self.stats["bytes"] += size
+                self.stats["writes"] += 1
+                self._changed.notify_all()
+            _frames_sent.inc(count)
+            _bytes_sent.inc(size)
+
+# endregion
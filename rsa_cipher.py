@@ -0,0 +1,183 @@
+import threading
+from collections import OrderedDict
+import codec, number_theory
+
+MAX_CACHED_KEYS = 8         # Number of keys keeping their results table
+
+_tables = OrderedDict()     # (exponent, n) -> {value: result}, most recently used last
+_tables_lock = threading.Lock()
+
+# region Keys
+
+class RSAKey:
+    """
+    RSA key. Holds the private factors and the CRT parameters when they are known.
+    """
+
+    def __init__(self, n, e, d=None, p=None, q=None):
+        """
+        Initialize the key.
+
+        Args:
+            n (int): Modulus
+            e (int): Public exponent
+            d (int, optional): Private exponent. Defaults to None.
+            p (int, optional): First prime factor of n. Defaults to None.
+            q (int, optional): Second prime factor of n. Defaults to None.
+        """
+        self.n = n
+        self.e = e
+        self.d = d
+        self.p = p
+        self.q = q
+        self.has_crt = d is not None and p is not None and q is not None and p != q and p * q == n
+        if self.has_crt:
+            self.dp = d % (p - 1)       # d mod (p-1)
+            self.dq = d % (q - 1)       # d mod (q-1)
+            self.qinv = pow(q, -1, p)   # q^-1 mod p
+
+    def __repr__(self):
+        return f"RSAKey(n={self.n}, e={self.e})"
+
+def generate_key(bits):
+    """
+    Generate a RSA key pair with its private factors.
+
+    Args:
+        bits (int): Size of the modulus in bits, the ciphered values must fit in a word so at most 32
+
+    Returns:
+        RSAKey: Key pair with the CRT parameters
+    """
+    while True:
+        p = number_theory.get_random_prime(bits // 2)
+        q = number_theory.get_random_prime(bits - bits // 2)
+        n = p * q
+        if p != q and n.bit_length() == bits:
+            break
+    k = (p - 1) * (q - 1)
+    e = number_theory.get_coprime(k)  # public key
+    d = pow(e, -1, k)  # private key (modular multiplicative inverse)
+    return RSAKey(n, e, d, p, q)
+
+# endregion
+
+# region Encryption/Decryption
+
+def encrypt(values, key):
+    """
+    Encrypt integer values with the public exponent of a key.
+
+    Args:
+        values (array | iterable[int]): Values to encrypt
+        key (RSAKey): Key to use
+
+    Returns:
+        bytes: Encoded payload
+    """
+    return rsa_crypt(values, key.e, key.n)
+
+def decrypt(values, key):
+    """
+    Decrypt integer values with the private exponent of a key, using the CRT when the factors are known.
+
+    Args:
+        values (array | iterable[int]): Values to decrypt
+        key (RSAKey): Key made by the client, d must be known
+
+    Returns:
+        bytes: Encoded payload
+
+    Raises:
+        ValueError: If a value isn't below the modulus, the key is too small for the values
+    """
+    if not key.has_crt:
+        return _crypt_with(values, key.d, key.n, lambda c: pow(c, key.d, key.n), check_modulus=True)
+    return _crypt_with(values, key.d, key.n, lambda c: _crt_pow(c, key), check_modulus=True)
+
+def rsa_crypt(values, exponent, n):
+    """
+    Apply RSA encryption/decryption to integer values.
+    Each distinct value is only computed once per key. The modulus may come from the server or the user,
+    values above it are reduced as pow() does.
+
+    Args:
+        values (array | iterable[int]): Values to cipher
+        exponent (int): Public (e) or private (d) exponent
+        n (int): Modulus
+
+    Returns:
+        bytes: Encoded payload
+
+    Raises:
+        OverflowError: If a result doesn't fit in a 4 bytes word
+    """
+    return _crypt_with(values, exponent, n, lambda c: pow(c, exponent, n))
+
+def _crypt_with(values, exponent, n, compute, check_modulus=False):
+    """
+    Cipher the values through the results table of the key.
+
+    Args:
+        values (array | iterable[int]): Values to cipher
+        exponent (int): Exponent of the key
+        n (int): Modulus of the key
+        compute (callable): Function ciphering a single value
+        check_modulus (bool, optional): Reject the values not below n, for the keys made by the client.
+                                        Defaults to False.
+
+    Returns:
+        bytes: Encoded payload
+
+    Raises:
+        ValueError: If check_modulus is set and a value isn't below the modulus
+    """
+    if not hasattr(values, '__len__'):
+        values = list(values)   # Values are read twice
+    table = _get_table(exponent, n)
+    missing = set(values).difference(table)
+    # Only the values not ciphered yet with this key are checked
+    if check_modulus and missing and max(missing) >= n:
+        raise ValueError(f"Value {max(missing):#x} isn't below the modulus {n:#x}, use a larger key")
+    table.update((c, compute(c)) for c in missing)
+    return codec.encode_codepoints(map(table.__getitem__, values))
+
+def _crt_pow(c, key):
+    """
+    Compute c^d mod n using the Chinese remainder theorem.
+
+    Args:
+        c (int): Value to decrypt
+        key (RSAKey): Key with CRT parameters
+
+    Returns:
+        int: c^d mod n
+    """
+    m1 = pow(c, key.dp, key.p)
+    m2 = pow(c, key.dq, key.q)
+    h = key.qinv * (m1 - m2) % key.p
+    return m2 + h * key.q
+
+def _get_table(exponent, n):
+    """
+    Get the results table of a key, creating it if needed.
+
+    Args:
+        exponent (int): Exponent of the key
+        n (int): Modulus of the key
+
+    Returns:
+        dict: Value to result table
+    """
+    with _tables_lock:
+        table = _tables.get((exponent, n))
+        if table is None:
+            table = {}
+            _tables[(exponent, n)] = table
+            if len(_tables) > MAX_CACHED_KEYS:
+                _tables.popitem(last=False)
+        else:
+            _tables.move_to_end((exponent, n))
+        return table
+
+# endregion
@@ -0,0 +1,138 @@
+import os
+from collections import deque
+import rsa_cipher
+from background_pool import BackgroundPool
+from metrics import metrics
+
+MIN_RSA_BITS = 25           # Smallest modulus above every word of a 1 to 3 bytes UTF-8 character (up to 0xEFBFBF)
+MAX_RSA_BITS = 32           # Largest modulus whose ciphered values fit in a 4 bytes word
+POOL_SIZE = 16              # Keys kept ready
+LOW_WATER = 4               # The pool is refilled up to POOL_SIZE when it has this many keys left
+
+_hits = metrics.counter("rsa_keys_total", "RSA key pairs taken, by origin", origin="pool")
+_misses = metrics.counter("rsa_keys_total", "RSA key pairs taken, by origin", origin="generated")
+_generation_time = metrics.histogram("rsa_key_generation_seconds", "Time to generate a RSA key pair in the background")
+
+# region Settings
+
+def _env_bits():
+    """
+    Read the modulus size of the generated keys from ISC_RSA_BITS.
+    An invalid value is reported and ignored, so the client still starts.
+
+    Returns:
+        int: Modulus size in bits, MAX_RSA_BITS if the variable is unset or invalid
+    """
+    value = os.environ.get("ISC_RSA_BITS")
+    if not value:
+        return MAX_RSA_BITS
+    try:
+        bits = int(value)
+        if MIN_RSA_BITS <= bits <= MAX_RSA_BITS:
+            return bits
+    except ValueError:
+        pass
+    print(f"[RSA KEYS] ISC_RSA_BITS={value!r} must be between {MIN_RSA_BITS} and {MAX_RSA_BITS}, "
+          f"{MAX_RSA_BITS} bits are used")
+    return MAX_RSA_BITS
+
+RSA_BITS = _env_bits()      # Modulus size of the generated keys
+
+# endregion
+
+# region Key Pool
+
+class KeyPool(BackgroundPool):
+    """
+    Pool of RSA key pairs generated in the background for a fixed modulus size.
+    The decode task takes a ready key, with its private factors for the CRT decryption.
+    The keys are private and only kept in memory.
+    """
+
+    def __init__(self, bits=RSA_BITS, pool_size=POOL_SIZE, low_water=LOW_WATER):
+        """
+        Initialize the pool. The keys are generated once start() or take() is called.
+
+        Args:
+            bits (int, optional): Modulus size in bits, between MIN_RSA_BITS and MAX_RSA_BITS. Defaults to RSA_BITS.
+            pool_size (int, optional): Keys kept ready. Defaults to POOL_SIZE.
+            low_water (int, optional): Keys left when the refill starts. Defaults to LOW_WATER.
+        """
+        if not MIN_RSA_BITS <= bits <= MAX_RSA_BITS:
+            raise ValueError(f"The modulus size must be between {MIN_RSA_BITS} and {MAX_RSA_BITS} bits")
+        super().__init__("RSA KEYS", "isc-rsa-keys")
+        self.bits = bits
+        self.pool_size = pool_size
+        self.low_water = low_water
+
+        self._keys = deque()
+        self._refilling = True      # Filled up to pool_size from the start
+        self._counters = {"hits": 0, "misses": 0, "generated": 0, "generation_time": 0.0, "max_generation_time": 0.0}
+
+    def start(self):
+        """
+        Start filling the pool in the background. Returns immediately.
+        """
+        with self._changed:
+            self._start_refill()
+
+    def take(self) -> rsa_cipher.RSAKey:
+        """
+        Get a key pair used by no other task.
+        Generated here only if the pool is empty.
+
+        Returns:
+            RSAKey: Key pair with its private factors
+        """
+        self.start()
+        with self._changed:
+            key = self._keys.popleft() if self._keys else None
+            self._counters["hits" if key else "misses"] += 1
+            self._changed.notify_all()
+
+        (_hits if key else _misses).inc()
+        return key or rsa_cipher.generate_key(self.bits)
+
+    def stats(self):
+        """
+        Get the pool statistics.
+
+        Returns:
+            dict: Keys taken from the pool (hits) or generated by the task (misses), keys generated in the
+                  background with their total and maximum generation time (seconds), and keys ready
+        """
+        with self._changed:
+            return {**self._counters, "ready": len(self._keys)}
+
+    def _needs_key(self):
+        """
+        Check if a key has to be generated, with the condition held.
+        """
+        if len(self._keys) <= self.low_water:
+            self._refilling = True
+        elif len(self._keys) >= self.pool_size:
+            self._refilling = False
+        return self._refilling
+
+    def _work(self):
+        """
+        Background thread function, keeps the pool filled.
+        """
+        while True:
+            with self._changed:
+                self._changed.wait_for(self._needs_key)
+
+            generated = self._generate(rsa_cipher.generate_key, self.bits)
+            if generated is None:
+                return
+            key, elapsed = generated
+            with self._changed:
+                self._keys.append(key)
+                self._counters["generated"] += 1
+                self._counters["generation_time"] += elapsed
+                self._counters["max_generation_time"] = max(self._counters["max_generation_time"], elapsed)
+            _generation_time.observe(elapsed)
+
+keys = KeyPool()    # Global pool used by the decode tasks
+
+# endregion
@@ -0,0 +1,370 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from message_store import MessageStore
+from metrics import metrics
+
+THROUGHPUT_WINDOW = 10.0    # Period over which the throughput is computed, in seconds
+
+_queue_time = metrics.histogram("task_queue_seconds", "Time a task waits in the queue before running")
+_run_time = metrics.histogram("task_run_seconds", "Time a task runs, replies from the server included")
+
+# region Scheduled Task
+
+class ScheduledTask:
+    """
+    Task submitted to a TaskScheduler.
+    Keeps its own reply store so that replies for another task can't be read by mistake.
+    """
+
+    def __init__(self, id, command, function, args, reply_capacity, dialogue=True):
+        """
+        Initialize the task.
+
+        Args:
+            id (int): Task id, unique within the scheduler
+            command (str): Command shown to the user (e.g. "task shift encode 10")
+            function (callable): Function running the task, its return value is the result
+            args (tuple): Arguments of the function
+            reply_capacity (int): Maximum number of replies kept
+            dialogue (bool, optional): True if the task talks to the server. Defaults to True.
+        """
+        self.id = id
+        self.command = command
+        self.function = function
+        self.args = args
+        self.dialogue = dialogue
+        self.state = "pending"      # States: pending, running, done, failed, cancelled
+        self.result = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.replies = MessageStore(reply_capacity)
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event()
+
+    def __repr__(self):
+        return f"ScheduledTask(id={self.id}, command={self.command!r}, state={self.state!r})"
+
+    @property
+    def cancelled(self):
+        """
+        True if the task was asked to stop.
+        """
+        return self._cancel_event.is_set()
+
+    @property
+    def finished(self):
+        """
+        True if the task won't run anymore.
+        """
+        return self._done_event.is_set()
+
+    def cancel(self):
+        """
+        Ask the task to stop. A pending task is never run, a running task stops at its next wait for replies.
+        """
+        self._cancel_event.set()
+        with self.replies.changed:
+            self.replies.changed.notify_all()   # Wake up a task waiting for replies
+
+    def wait(self, timeout=None):
+        """
+        Wait for the task to finish.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds. Defaults to None (no limit).
+
+        Returns:
+            Any: Result of the task, None if not finished, failed or cancelled
+        """
+        self._done_event.wait(timeout)
+        return self.result
+
+    def wait_replies(self, count, timeout=None) -> bool:
+        """
+        Wait until the task received at least count replies.
+
+        Args:
+            count (int): Number of replies to wait for
+            timeout (float, optional): Maximum time to wait in seconds. Defaults to None (no limit).
+
+        Returns:
+            bool: True if the replies are there, False if timeout or cancelled
+        """
+        with self.replies.changed:
+            self.replies.changed.wait_for(lambda: self.cancelled or len(self.replies) >= count, timeout)
+            return not self.cancelled and len(self.replies) >= count
+
+    def _finish(self, state, result=None):
+        self.state = state
+        self.result = result
+        self.finished_at = time.time()
+        self._done_event.set()
+
+# endregion
+
+# region Task Scheduler
+
+def _print_failure(task, error):
+    print(f"[TASK] #{task.id} {task.command} failed: {error!r}")
+
+class TaskScheduler:
+    """
+    Bounded pool of worker threads running the submitted tasks in order.
+    Tasks talking to the server own the dialogue one at a time, and the server replies
+    are routed to the task owning it. Other tasks run concurrently on the remaining workers.
+    """
+
+    def __init__(self, workers=2, max_pending=32, reply_capacity=64, on_failure=None):
+        """
+        Initialize the scheduler. The worker threads are started on the first submission.
+
+        Args:
+            workers (int, optional): Number of worker threads. Defaults to 2.
+            max_pending (int, optional): Maximum number of tasks waiting to run. Defaults to 32.
+            reply_capacity (int, optional): Maximum number of replies kept per task. Defaults to 64.
+            on_failure (callable, optional): Called with (task, exception) when a task raises.
+                                             Defaults to printing the error.
+        """
+        if workers < 1:
+            raise ValueError("At least one worker is needed")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.reply_capacity = reply_capacity
+        self.on_failure = on_failure or _print_failure
+        self._pending = deque()                 # Tasks waiting to run, in submission order
+        self._threads = []
+        self._ids = itertools.count(1)
+        self._tasks = {}                        # Pending and running tasks by id
+        self._changed = threading.Condition()   # Notified when a task is queued or finished
+        self._dialogue_owner: ScheduledTask = None
+        self._local = threading.local()
+
+        self._completions = deque()     # Finish times within the throughput window
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "rejected": 0}
+        self._max_pending = 0
+        self._run_time = 0.0
+
+    # region Submission
+
+    def submit(self, command, function, *args, dialogue=True):
+        """
+        Queue a task.
+
+        Args:
+            command (str): Command shown to the user
+            function (callable): Function running the task
+            *args: Arguments of the function
+            dialogue (bool, optional): True if the task talks to the server. Defaults to True.
+
+        Returns:
+            ScheduledTask: The queued task
+
+        Raises:
+            queue.Full: If too many tasks are pending
+        """
+        task = ScheduledTask(next(self._ids), command, function, args, self.reply_capacity, dialogue)
+        with self._changed:
+            if len(self._pending) >= self.max_pending:
+                self._counters["rejected"] += 1
+                raise queue.Full
+            self._pending.append(task)
+            self._tasks[task.id] = task
+            self._counters["submitted"] += 1
+            self._max_pending = max(self._max_pending, len(self._pending))
+            if len(self._threads) < self.workers:
+                self._start_worker()
+            self._changed.notify_all()
+        return task
+
+    def cancel(self, id=None):
+        """
+        Cancel a task, or every pending and running task.
+
+        Args:
+            id (int, optional): Id of the task. Defaults to None (every task).
+
+        Returns:
+            list[ScheduledTask]: The cancelled tasks
+        """
+        with self._changed:
+            tasks = list(self._tasks.values()) if id is None else [self._tasks[id]] if id in self._tasks else []
+            for task in tasks:
+                task.cancel()
+                if task in self._pending:
+                    self._pending.remove(task)
+                    self._finish(task, "cancelled")
+        return tasks
+
+    def tasks(self):
+        """
+        Get the pending and running tasks.
+
+        Returns:
+            list[ScheduledTask]: Tasks ordered by id
+        """
+        with self._changed:
+            return sorted(self._tasks.values(), key=lambda task: task.id)
+
+    def join(self, timeout=None) -> bool:
+        """
+        Wait until every pending and running task is finished.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds. Defaults to None (no limit).
+
+        Returns:
+            bool: True if no task is left
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: not self._tasks, timeout)
+
+    def current_task(self):
+        """
+        Get the task run by the calling thread.
+
+        Returns:
+            ScheduledTask | None: The task, None if not called from a task
+        """
+        return getattr(self._local, "task", None)
+
+    def route_reply(self, payload, type=ord('s')) -> bool:
+        """
+        Give a server reply to the task owning the dialogue.
+
+        Args:
+            payload (bytes | Frame): Encoded payload, or a received frame shared with its decoded views
+            type (int, optional): Message type byte, a frame keeps its own. Defaults to ord('s').
+
+        Returns:
+            bool: True if a task received the reply, False if no task owns the dialogue
+        """
+        owner = self._dialogue_owner
+        if owner is None:
+            return False
+        owner.replies.append(payload, type)
+        return True
+
+    # endregion
+
+    # region Workers
+
+    def _start_worker(self):
+        thread = threading.Thread(target=self._work, daemon=True, name=f"isc-task-{len(self._threads) + 1}")
+        self._threads.append(thread)
+        thread.start()
+
+    def _take(self):
+        """
+        Remove the first task able to run from the pending tasks.
+        A task talking to the server can only run once the dialogue is free, the others run right away.
+
+        Returns:
+            ScheduledTask | None: The task, None if no task can run
+        """
+        for task in self._pending:
+            if not task.dialogue or self._dialogue_owner is None:
+                self._pending.remove(task)
+                if task.dialogue:
+                    self._dialogue_owner = task
+                task.state = "running"
+                task.started_at = time.time()
+                return task
+        return None
+
+    def _work(self):
+        """
+        Worker thread function, runs the queued tasks forever.
+        """
+        while True:
+            with self._changed:
+                task = self._take()
+                while task is None:
+                    self._changed.wait()
+                    task = self._take()
+
+            self._local.task = task
+            try:
+                self._run(task)
+            finally:
+                self._local.task = None
+
+    def _run(self, task):
+        """
+        Run a task and record its outcome.
+
+        Args:
+            task (ScheduledTask): Task to run
+        """
+        try:
+            result = task.function(*task.args)
+        except Exception as e:
+            state, result = "failed", None
+            try:
+                self.on_failure(task, e)
+            except Exception as report_error:
+                print(f"[TASK] #{task.id} {task.command} failed: {e!r} ({report_error!r} when reporting it)")
+        else:
+            if task.cancelled:
+                state = "cancelled"
+            else:
+                state = "done" if result is not False else "failed"
+
+        with self._changed:
+            if self._dialogue_owner is task:
+                self._dialogue_owner = None
+            self._finish(task, state, result)
+
+    def _finish(self, task, state, result=None):
+        """
+        Record the outcome of a task, with the condition held.
+        """
+        task._finish(state, result)
+        self._tasks.pop(task.id, None)
+        self._counters["completed" if state == "done" else state] += 1
+        if task.started_at is not None:
+            self._run_time += task.finished_at - task.started_at
+            _queue_time.observe(task.started_at - task.submitted_at)
+            _run_time.observe(task.finished_at - task.started_at)
+        self._completions.append(task.finished_at)
+        self._prune_completions(task.finished_at)
+        self._changed.notify_all()
+
+    # endregion
+
+    # region Statistics
+
+    def stats(self):
+        """
+        Get the scheduler statistics.
+
+        Returns:
+            dict: Task counters, queue depth, running tasks, throughput (tasks/s over the last
+                  THROUGHPUT_WINDOW seconds) and mean run time (seconds)
+        """
+        with self._changed:
+            self._prune_completions(time.time())
+            finished = self._counters["completed"] + self._counters["failed"] + self._counters["cancelled"]
+            return {
+                **self._counters,
+                "pending": len(self._pending),
+                "max_pending": self._max_pending,
+                "running": len(self._tasks) - len(self._pending),
+                "workers": len(self._threads),
+                "throughput": len(self._completions) / THROUGHPUT_WINDOW,
+                "mean_run_time": self._run_time / finished if finished else 0.0,
+            }
+
+    def _prune_completions(self, now):
+        """
+        Drop the finish times older than the throughput window, with the condition held.
+        """
+        while self._completions and self._completions[0] < now - THROUGHPUT_WINDOW:
+            self._completions.popleft()
+
+    # endregion
+
+# endregion
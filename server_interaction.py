@@ -1,17 +1,35 @@
-import math
+import contextlib
+import os
+import queue
 import random
-import threading, time, re, socket, hashlib
-import window_interaction
-from signals import comm
+import re
+import codec, rsa_cipher, offload, hashing, dh_groups, rsa_keys
+from client import Client
+from message_store import MessageStore
+from scheduler import TaskScheduler
+from metrics import metrics
 
 # region Variables
 
-stop_event = threading.Event()      # Event to signal thread termination
-connection: socket.socket = None              # Socket connection to server
-connection_state = -1               # Connection states: -1 (not connected), 0 (failed), 1 (connected)
+client = Client(on_frame=lambda *frame: _handle_frame(*frame))  # Connection used by the commands and tasks
 last_own_sent_message = ""          # Store last message to prevent duplicates
-server_messages = []                # Store messages received from server
-saved_message = []                  # Archive received messages for later use
+SERVER_MESSAGES_CAPACITY = 64      # Maximum number of server replies kept for the running task
+SAVED_MESSAGES_CAPACITY = 1000      # Maximum number of received messages kept in memory for /decrypt
+ARCHIVE_DIR = os.environ.get("ISC_ARCHIVE_DIR")     # Directory of the persistent message archive, see open_archive()
+server_messages = MessageStore(SERVER_MESSAGES_CAPACITY)    # Store messages received from server
+saved_message = MessageStore(SAVED_MESSAGES_CAPACITY)       # Archive received messages for later use
+async_engine_enabled = os.environ.get("ISC_ENGINE") == "asyncio"   # Use the asyncio engine instead of threads
+TASK_WORKERS = 2                    # Worker threads running the tasks
+TASK_QUEUE_SIZE = 32                # Maximum number of tasks waiting to run
+CRYPT_CHUNK = 2048                  # Characters ciphered between two progress reports of /crypt and /decrypt
+SUBCOMMAND_TASKS = ("shift", "vigenere", "RSA", "hash")     # Tasks followed by a subcommand (e.g. "encode")
+task_scheduler = TaskScheduler(TASK_WORKERS, TASK_QUEUE_SIZE, SERVER_MESSAGES_CAPACITY,
+                               on_failure=lambda task, e: show_task_failure(task, e))    # Runs the /task commands
+frames_received = metrics.counter("frames_received_total", "Frames received from the server")
+bytes_received = metrics.counter("bytes_received_total", "Bytes received from the server, headers included")
+frame_decode_time = metrics.histogram("frame_decode_seconds", "Time to decode the text of a received frame")
+step_wait_time = metrics.histogram("task_step_wait_seconds", "Time a task step waits for the server replies")
+step_timeouts = metrics.counter("task_step_timeouts_total", "Task steps that got no reply from the server in time")
 
 # endregion
 
@@ -28,8 +46,7 @@ def single_char_encode(chr):
         bytes: Encoded character with padding to 4 bytes
     """
 
-    encoded = chr.encode('utf-8')
-    return (4 - len(encoded)) * b'\x00' + encoded
+    return codec.encode_text(chr)
 
 def int_encode(int, bytenum):
     """
@@ -57,14 +74,7 @@ def _str_encode(type, string):
         bytes: Complete encoded message
     """
 
-    # ISC Header + type of message + string length encoded in big-endian
-    msg = b'ISC' + type.encode('utf-8') + int_encode(len(string), 2)
-
-    # Encode each character as unicode (up to 4 bytes per char)
-    for s in string:
-        msg += single_char_encode(s)
-
-    return msg
+    return codec.encode_frame(type, string)
 
 def _decode_message(text, from_server=False):
     """
@@ -75,116 +85,104 @@ def _decode_message(text, from_server=False):
         from_server (bool, optional): If True, return integer values instead of string. Defaults to False.
 
     Returns:
-        str/list: Decoded string or list of integer values
+        str/array: Decoded string or array of integer values
     """
 
-    result = ''
-    int_data = []
-    for i in range(0, len(text), 4):
-        int_data.append(int.from_bytes(text[i:i + 4], "big"))
-        try:
-            result += text[i:i + 4].decode("utf-8")
-        except:
-            result += '*'
-
-    if from_server: return int_data
-    return result.replace("\x00", "")
+    if from_server: return codec.decode_codepoints(text)
+    return codec.decode_text(text)
 
 # endregion
 
 # region Connection Handling
 
+def set_client(new_client):
+    """
+    Use a client for the connection, the commands and the tasks.
+
+    Args:
+        new_client (Client): Client to use, its on_frame callback is replaced
+    """
+    global client
+    new_client.on_frame = _handle_frame
+    client = new_client
+
+def _async_engine():
+    """
+    Get the asyncio engine. It is imported on first use, asyncio takes a while to import.
+
+    Returns:
+        AsyncEngine: The engine
+    """
+    import async_engine
+    return async_engine.engine
+
 def open_connection():
     """
     Establish a connection to the server.
-    Updates global connection state and starts message reception thread.
+    Updates the client connection state and starts message reception.
     """
 
-    global connection_state, connection
-    connection_state = -1
-    try:
-        connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)  # Create new socket
-        connection.connect((window_interaction.host, window_interaction.port))
-    except (ConnectionRefusedError, socket.gaierror) as e:
-        print("[CONNECTION] The connection couldn't be established.")
-        connection_state = 0
-        window_interaction.window.connected()
-        exit(1)
-
-    print("[CONNECTION] Open")
-    connection_state = 1
-    window_interaction.window.connected()
+    if async_engine_enabled:
+        _async_engine().open_connection(client.host, client.port)
+        return
 
-    try:
-        stop_event.clear()
-        t = threading.Thread(target=handle_message_reception)
-        t.start()
-    except KeyboardInterrupt:
-        print("[CONNECTION] Stopped by Ctrl+C")
-        close_connection()
+    client.open_connection()
 
 def close_connection():
     """
     Close the connection to the server.
-    Signals the message reception thread to stop and closes the socket.
+    Signals the message reception to stop and closes the socket.
     """
 
-    global connection_state
-    stop_event.set()
-    if connection:  # Check if connection exists
-        try:
-            connection.shutdown(socket.SHUT_RDWR)
-            connection.close()
-        except:
-            pass  # Socket might already be closed
-    connection_state = -1
-    print("[CONNECTION] Closed")
+    if async_engine_enabled:
+        client.stop_event.set()
+        _async_engine().close_connection()
+        client.set_connection_state(-1)
+        print("[CONNECTION] Closed")
+    else:
+        client.close_connection()
 
 # endregion
 
 # region Messages Handling
 
-def handle_message_reception():
+def _handle_frame(message_type, size, data):
     """
-    Background thread function to continuously receive and process messages from server.
-    Runs until stop_event is set.
+    Process a single frame received from the server.
+
+    Args:
+        message_type (int): Message type byte
+        size (bytes): Size field of the header
+        data (bytes): Payload of the frame
     """
-    try:
-        while not stop_event.is_set():  # Continue until stop is requested
-            try:
-                firstdata = connection.recv(6)
-                if firstdata == b'':
-                    # No data received
-                    continue
-
-                message_type = firstdata[3]
-                size = firstdata[-2:]
-
-                # Handle image data (not fully implemented)
-                if message_type == ord('i'):
-                    print("Received image request")
-                    # Read image data (128x128x3 bytes)
-                    connection.recv(size[0] * size[1] * 3)
-                    continue
-
-                data = connection.recv(int.from_bytes(size, "big") * 4)
-                saved_message.append(data)
-            except (ConnectionAbortedError, OSError):
-                exit(1)
-
-            decoded_data = _decode_message(data)
-
-            if data != b'':
-                if message_type == ord('s'):
-                    server_messages.append(data)
-                    comm.chat_message.emit("<Server> " + decoded_data)
-                else:
-                    global last_own_sent_message
-                    if not len(decoded_data) == 0 and decoded_data != last_own_sent_message:
-                        last_own_sent_message = ""
-                        comm.chat_message.emit("<User> " + decoded_data)
-    except:
-        pass
+    global last_own_sent_message
+    frames_received.inc()
+    bytes_received.inc(codec.HEADER_SIZE + len(data))
+
+    # Images are decoded and shown by the UI, they are not kept with the messages.
+    # The other lines start with the sequence id of the saved message, /decrypt #<id> finds it
+    if message_type == ord('i'):
+        client.on_chat_message(f"<Server> Image received ({size[0]}x{size[1]})")
+        client.on_image(size[0], size[1], data)
+        return
+
+    frame = saved_message.append(data, message_type)
+    if data == b'':
+        return
+
+    with frame_decode_time.time():
+        decoded_data = frame.text
+
+    if message_type == ord('s'):
+        # Replies go to the task owning the dialogue, the shared store is used by the asyncio engine.
+        # They share the frame and the text already decoded.
+        if not task_scheduler.route_reply(frame):
+            server_messages.append(frame)
+        client.on_chat_message(f"#{frame.seq} <Server> {decoded_data}")
+    else:
+        if not len(decoded_data) == 0 and decoded_data != last_own_sent_message:
+            last_own_sent_message = ""
+            client.on_chat_message(f"#{frame.seq} <User> {decoded_data}")
 
 def send_message(text):
     """
@@ -197,20 +195,34 @@ def send_message(text):
     global last_own_sent_message
     if text.startswith("/"):
         match text:
+            case x if x.startswith("/tasks"):
+                show_tasks()
             case x if x.startswith("/task"):
-                threading.Thread(target=server_task_command, args=[text[1:]]).start()
+                if async_engine_enabled:
+                    _async_engine().submit_task(text[1:])
+                else:
+                    submit_task(text[1:])
+            case x if x.startswith("/cancel"):
+                cancel_tasks(text[1:])
             case x if x.startswith("/crypt"):
-                send_crypted_server_message(text[1:])
+                # The encoding is read here, the UI can't be accessed from the worker threads
+                submit_job(text, send_crypted_server_message, text[1:], client.get_encoding())
             case x if x.startswith("/decrypt"):
-                show_decrypted_server_message(text[1:])
+                submit_job(text, show_decrypted_server_message, text[1:], client.get_encoding())
+            case x if x.startswith("/crack"):
+                submit_job(text, show_cracked_messages, text[1:], client.get_encoding())
+            case x if x.startswith("/stats"):
+                show_stats(text[1:])
+            case x if x.startswith("/hash"):
+                submit_job(text, show_message_hashes, text[1:])
             case x if x.startswith("/clear"):
-                window_interaction.window._clear_chat()
+                client.on_clear_chat()
             case _:
                 show_error_message(f"Unknown command \"{text.split(' ')[0]}\"")
                 return
     elif not len(text) == 0:
-        connection.send(_str_encode('t', text))
-        comm.chat_message.emit("<You> " + text)
+        _send_frame(_str_encode('t', text))
+        client.on_chat_message("<You> " + text)
         last_own_sent_message = text
 
 def send_server_message(text):
@@ -220,15 +232,16 @@ def send_server_message(text):
     Args:
         text (str): Message text to send to server
     """
-    comm.chat_message.emit("<You to Server> " + text)
-    connection.send(_str_encode('s', text))
+    client.on_chat_message("<You to Server> " + text)
+    _send_frame(_str_encode('s', text))
 
-def send_crypted_server_message(text):
+def send_crypted_server_message(text, type=None):
     """
     Encrypt and send a message to the server.
 
     Args:
         text (str): Command and message to encrypt
+        type (str, optional): Encoding to use. Defaults to the encoding chosen in the client.
     """
     command = text.split(' ')
     del command[0]  # Remove "crypt" from command
@@ -238,51 +251,46 @@ def send_crypted_server_message(text):
         show_error_message("More arguments needed")
         return
 
-    type = window_interaction.window._get_encoding_values()[0]
+    type = type or client.get_encoding()
 
     try:
-        msg = b''
-        for s in command[0]: msg += single_char_encode(s)
-
         message_crypted = b''
-        message_to_crypt = _decode_message(msg, True)
+        message_to_crypt = _decode_message(codec.encode_text(command[0]), True)
         key = command[1]
 
         match type:
-            case "shift":
-                for i in message_to_crypt:
-                    message_crypted += int_encode(i + int(key), 4)
-            case "vigenere":
-                for i, c in enumerate(message_to_crypt):
-                    intKey = int.from_bytes(key[i % len(key)].encode())
-                    message_crypted += int_encode(c + intKey, 4)
+            case "shift" | "vigenere":
+                message_crypted = _crypt_in_chunks(
+                    message_to_crypt, offload.shift_vigenere_chunk, type, key, align=_key_align(type, key))
             case "RSA":
                 n = int(command[1])
                 e = int(command[2])
-                for c in message_to_crypt:
-                    message_crypted += int_encode(pow(c, e, n), 4)
+                message_crypted = _crypt_in_chunks(message_to_crypt, offload.rsa_chunk, e, n)
             case _:
                 show_error_message(f"{type} is not a valid encoding")
 
+        if message_crypted is None:
+            return  # Cancelled
         send_message(_decode_message(message_crypted))
 
     except:
         show_error_message(f"Invalid arguments, try again")
 
-def show_decrypted_server_message(text) :
+def show_decrypted_server_message(text, encoding=None) :
     """
     Decrypt and display a previously received message.
 
     Args:
         text (str): Command with index of message to decrypt and key
+        encoding (str, optional): Encoding to use. Defaults to the encoding chosen in the client.
     """
 
     def missing_args(encoding):
         error_msg = f"Usage ({encoding}) /decrypt "
         if encoding == "shift" or encoding == "vigenere":
-            error_msg += "<message_index> <shift_size>"
+            error_msg += "<message_index | #message_id> <shift_size>"
         elif encoding == "RSA":
-            error_msg += "<n> <e>"
+            error_msg += "<message_index | #message_id> <n> <d>"
         else:
             error_msg = f"{encoding} can't be used for decryption."
 
@@ -293,7 +301,7 @@ def show_decrypted_server_message(text) :
     del command[0]  # Remove "decrypt" from command
 
     # Get chosen encoding
-    encoding = window_interaction.window._get_encoding_values()[0]
+    encoding = encoding or client.get_encoding()
 
     # Check for additional arguments
     if len(command) < 2:
@@ -302,18 +310,13 @@ def show_decrypted_server_message(text) :
 
     try:
         message_decrypted = b''
-        message_num = int(command[0])
-        message_to_decrypt = _decode_message(saved_message[-message_num], True)
+        message_to_decrypt = _get_saved_message(command[0]).codepoints
         key = command[1]
 
         match encoding:
-            case "shift":
-                for i in message_to_decrypt:
-                    message_decrypted += int_encode(i - int(key), 4)
-            case "vigenere":
-                for i, c in enumerate(message_to_decrypt):
-                    intKey = int.from_bytes(key[i % len(key)].encode())
-                    message_decrypted += int_encode(c - intKey, 4)
+            case "shift" | "vigenere":
+                message_decrypted = _crypt_in_chunks(
+                    message_to_decrypt, offload.shift_vigenere_chunk, encoding, key, -1, align=_key_align(encoding, key))
             case "RSA":
                 if len(command) < 3:
                     missing_args(encoding)
@@ -321,16 +324,160 @@ def show_decrypted_server_message(text) :
 
                 n = int(command[1])
                 d = int(command[2])
-                for c in message_to_decrypt:
-                    message_decrypted += int_encode(pow(c, d, n), 4)
+                message_decrypted = _crypt_in_chunks(message_to_decrypt, offload.rsa_chunk, d, n)
             case _:
                 show_error_message(f"{encoding} can't be used for decryption.")
 
-        comm.decoded_message.emit(_decode_message(message_decrypted))
+        if message_decrypted is None:
+            return  # Cancelled
+        client.on_decoded_message(_decode_message(message_decrypted))
 
     except:
         show_error_message(f"Invalid arguments, try again")
 
+def show_message_hashes(text):
+    """
+    Display the SHA-256 hash of the text of saved messages in the decoded panel.
+
+    Args:
+        text (str): Command with the message references (e.g., "hash #12 1 2")
+    """
+    command = text.split(' ')[1:]
+    if not command:
+        show_error_message("Usage /hash <message> [<message> ...]")
+        return
+
+    try:
+        payloads = [bytes(_get_saved_message(reference).payload) for reference in command]
+    except (IndexError, ValueError):
+        show_error_message("Invalid arguments, try again")
+        return
+
+    # Hashed as a single batch, one round trip to a worker process when the pool is running
+    digests = offload.run(hashing.sha256_payloads, payloads)
+    if _task_cancelled():
+        return
+    client.on_decoded_message('\n'.join(f"{reference} {digest}" for reference, digest in zip(command, digests)))
+
+def show_cracked_messages(text, encoding=None):
+    """
+    Find the key of saved messages ciphered with shift or Vigenere and display them deciphered in the decoded panel.
+    The messages are spread over the worker processes when the process pool is running.
+
+    Args:
+        text (str): Command with the message references (e.g., "crack #12 1 2")
+        encoding (str, optional): Encoding of the messages. Defaults to the encoding chosen in the client.
+    """
+    command = text.split(' ')[1:]
+    encoding = encoding or client.get_encoding()
+    if not command:
+        show_error_message(f"Usage ({encoding}) /crack <message_index | #message_id> [...]")
+        return
+    if encoding not in ("shift", "vigenere"):
+        show_error_message(f"{encoding} can't be cracked.")
+        return
+
+    try:
+        messages = [_get_saved_message(reference).codepoints for reference in command]
+    except (IndexError, ValueError):
+        show_error_message("Invalid arguments, try again")
+        return
+
+    task = task_scheduler.current_task()
+    results = []
+    chunks = offload.map_chunks(offload.crack_chunk, messages, encoding, chunk=1)
+    try:
+        with contextlib.closing(chunks):
+            for result in chunks:
+                if task is not None and task.cancelled:
+                    return
+                results.extend(result)
+                if task is not None:
+                    client.on_progress(task.id, task.command, len(results) / len(messages))
+    except RuntimeError as e:
+        show_error_message(str(e))
+        return
+
+    client.on_decoded_message('\n'.join(
+        f"{reference} (key {key}) {plain}" for reference, (key, plain) in zip(command, results)))
+
+def open_archive(directory=ARCHIVE_DIR):
+    """
+    Keep the received messages in a persistent archive, so /decrypt can use them after a restart.
+    Must be called before connecting: the sequence ids continue from the last archived message.
+
+    Args:
+        directory (str, optional): Archive directory. Defaults to ARCHIVE_DIR.
+
+    Returns:
+        MessageArchive: The opened archive
+    """
+    global saved_message
+    from archive import MessageArchive     # Only needed when the archive is enabled
+    saved_message = MessageStore(SAVED_MESSAGES_CAPACITY, MessageArchive(directory))
+    return saved_message.archive
+
+def _get_saved_message(reference):
+    """
+    Get a saved message from a /decrypt argument.
+
+    Args:
+        reference (str): "#<id>" for a sequence id, or "<n>" for the n-th latest message
+
+    Returns:
+        Frame: The saved message, read from the archive if it was evicted from memory
+
+    Raises:
+        IndexError: If the message doesn't exist, or was evicted and isn't archived
+    """
+    if reference.startswith("#"):
+        record = saved_message.get(int(reference[1:]))
+        if record is None:
+            raise IndexError("Message evicted or unknown")
+        return record
+    return saved_message[-int(reference)]
+
+def _key_align(encoding, key):
+    """
+    Get the chunk alignment keeping the Vigenere key aligned from one chunk to the next.
+
+    Args:
+        encoding (str): "shift" or "vigenere"
+        key (str): Cipher key
+
+    Returns:
+        int: Chunk sizes must be a multiple of this number of characters
+    """
+    return len(key) if encoding == "vigenere" and key else 1
+
+def _crypt_in_chunks(values, function, *args, align=1):
+    """
+    Cipher a message chunk by chunk, reporting the progress of the running task and stopping if it is cancelled.
+    The chunks are spread over the worker processes when the process pool is running.
+
+    Args:
+        values (array): Values of the message
+        function (callable): Chunk function of the offload module
+        *args: Other arguments of the function
+        align (int, optional): Chunk sizes are a multiple of align. Defaults to 1.
+
+    Returns:
+        bytes | None: Encoded payload, None if cancelled
+    """
+    task = task_scheduler.current_task()
+    parts = []
+    done = 0
+    chunks = offload.map_chunks(function, values, *args, chunk=CRYPT_CHUNK, align=align)
+    with contextlib.closing(chunks):
+        for part in chunks:
+            if task is not None and task.cancelled:
+                return None
+            parts.append(part)
+            done += len(part) // codec.WORD_SIZE
+            if task is not None:
+                client.on_progress(task.id, task.command, done / len(values))
+    return b''.join(parts)
+
 def send_server_message_no_encoding(bytes):
     """
     Send raw bytes to the server without encoding.
@@ -339,13 +486,134 @@ def send_server_message_no_encoding(bytes):
     Args:
         bytes (bytes): Pre-encoded message data
     """
-    comm.chat_message.emit("<You to Server> " + _decode_message(bytes))
-    connection.send(b'ISCs' + int_encode(int(len(bytes) / 4), 2) + bytes)
+    client.on_chat_message("<You to Server> " + _decode_message(bytes))
+    _send_frame(codec.build_frame('s', bytes))
+
+def _send_frame(frame):
+    """
+    Send a complete frame through the active connection engine.
+
+    Args:
+        frame (bytes): Encoded frame
+    """
+    if async_engine_enabled:
+        _async_engine().send_frame(frame)
+    elif not client.send_frame(frame) and client.connection_state == 1:
+        client.on_chat_message("<INFO> Too much data waiting to be sent, message dropped")
 
 # endregion
 
 # region Tasks Handling
 
+def submit_task(text):
+    """
+    Queue a task command on the task scheduler.
+
+    Args:
+        text (str): Task command string (e.g., "task shift encode 10")
+    """
+    _submit(text, server_task_command, text)
+
+def submit_job(text, function, *args):
+    """
+    Queue a local command (e.g. /crypt) on the task scheduler, it runs next to the server tasks.
+
+    Args:
+        text (str): Command shown in the task list
+        function (callable): Function running the command
+        *args: Arguments of the function
+    """
+    _submit(text, function, *args, dialogue=False)
+
+def _submit(text, function, *args, dialogue=True):
+    """
+    Queue a command on the task scheduler and tell the user if it has to wait.
+
+    Args:
+        text (str): Command shown in the task list
+        function (callable): Function running the command
+        *args: Arguments of the function
+        dialogue (bool, optional): True if the command talks to the server. Defaults to True.
+    """
+    pending = task_scheduler.stats()["pending"]
+    try:
+        task = task_scheduler.submit(text, function, *args, dialogue=dialogue)
+    except queue.Full:
+        show_error_message(f"Too many pending tasks ({pending}), try again later.")
+        return
+    if pending:
+        client.on_chat_message(f"<INFO> Task #{task.id} queued, {pending} task(s) ahead")
+
+def cancel_tasks(text):
+    """
+    Cancel a pending or running task, or every one of them.
+
+    Args:
+        text (str): Command with the optional task id (e.g., "cancel 3")
+    """
+    command = text.split(' ')
+    if len(command) > 1 and not command[1].lstrip('#').isnumeric():
+        show_error_message("Usage /cancel [task_id]")
+        return
+
+    cancelled = task_scheduler.cancel(int(command[1].lstrip('#')) if len(command) > 1 else None)
+    if not cancelled:
+        client.on_chat_message("<INFO> No task to cancel")
+    for task in cancelled:
+        client.on_chat_message(f"<INFO> Task #{task.id} \"{task.command}\" cancelled")
+
+def show_tasks():
+    """
+    Display the pending and running tasks and the scheduler statistics.
+    """
+    for task in task_scheduler.tasks():
+        client.on_chat_message(f"<INFO> Task #{task.id} \"{task.command}\" {task.state}")
+    stats = task_scheduler.stats()
+    client.on_chat_message(
+        f"<INFO> {stats['pending']} pending (max {stats['max_pending']}), {stats['running']} running, "
+        f"{stats['completed']} completed, {stats['failed']} failed, {stats['cancelled']} cancelled, "
+        f"{stats['throughput']:.2f} tasks/s, {stats['mean_run_time'] * 1000:.0f} ms per task")
+
+def show_stats(text):
+    """
+    Display the connection and task metrics, or export them.
+
+    Args:
+        text (str): Command with the optional format and file (e.g., "stats prometheus metrics.prom").
+                    "stats" shows a summary in the chat, "stats json|prometheus" shows the export in the decoded
+                    panel or writes it to the file, "stats reset" sets the metrics back to zero.
+    """
+    command = text.split(' ')[1:]
+    if not command:
+        lines = metrics.summary()
+        for line in lines or ["No metrics recorded yet"]:
+            client.on_chat_message("<STATS> " + line)
+        return
+
+    match command[0]:
+        case "json":
+            export = metrics.to_json()
+        case "prometheus":
+            export = metrics.to_prometheus()
+        case "reset":
+            metrics.reset()
+            client.on_chat_message("<INFO> Metrics reset")
+            return
+        case _:
+            show_error_message("Usage /stats [json|prometheus [file]|reset]")
+            return
+
+    if len(command) < 2:
+        client.on_decoded_message(export)
+        return
+    try:
+        with open(command[1], "w", encoding="utf-8") as f:
+            f.write(export)
+    except OSError as e:
+        show_error_message(f"Couldn't write {command[1]}: {e.strerror}")
+        return
+    client.on_chat_message(f"<INFO> Metrics written to {command[1]}")
+
 def server_task_command(text):
     """
     Process task commands for cryptographic operations.
@@ -353,39 +621,57 @@ def server_task_command(text):
 
     Args:
         text (str): Task command string (e.g., "task shift encode 10")
+
+    Returns:
+        bool: True if the task completed, False otherwise
     """
     # Parse the command
     command = text.split(' ')
     del command[0]  # Remove "task" from command
 
     # Check for additional arguments
-    if len(command) == 0:
-        show_error_message("More arguments needed")
-        return
+    if missing_task_arguments(command):
+        return False
 
     # Dispatch to appropriate handler based on encryption type
     match (command[0]):
         case "shift" | "vigenere":
             if command[1] == "encode":
-                shift_vigenere_encode(command[0], command)
+                return shift_vigenere_encode(command[0], command)
             elif command[1] == "decode":
                 shift_vigenere_decode(command[0], command)
         case "RSA":
             if command[1] == "encode":
-                rsa_encode(command)
+                return rsa_encode(command)
             elif command[1] == "decode":
-                rsa_decode(command)
+                return rsa_decode(command)
         case "hash":
             if command[1] == "verify":
-                hash_command_verify(command)
+                return hash_command_verify(command)
             elif command[1] == "hash":
-                hash_command_hash(command)
+                return hash_command_hash(command)
             else:
                 show_error_message(f"Unknown command \"{command[1]}\"")
         case "DifHel":
-            difhel(command)
+            return difhel(command)
         case _:
             show_error_message(f"Unknown task \"{command[0]}\"")
+    return False
+
+def missing_task_arguments(command):
+    """
+    Check that a task command has its subcommand (e.g. "encode"), and tell the user if it doesn't.
+
+    Args:
+        command (list): Command parameters, without "task"
+
+    Returns:
+        bool: True if arguments are missing
+    """
+    if len(command) == 0 or (len(command) == 1 and command[0] in SUBCOMMAND_TASKS):
+        show_error_message("More arguments needed")
+        return True
+    return False
 
 def show_error_message(error):
     """
@@ -394,13 +680,24 @@ def show_error_message(error):
     Args:
         error (str): Error message to display
     """
-    comm.chat_message.emit(f"<Server> {error}")
+    client.on_chat_message(f"<Server> {error}")
+
+def show_task_failure(task, error):
+    """
+    Display the error of a task that raised in the chat window.
+
+    Args:
+        task (ScheduledTask): Failed task
+        error (Exception): Error raised by the task
+    """
+    print(f"[TASK] #{task.id} {task.command} failed: {error!r}")
+    show_error_message(f"Task #{task.id} {task.command} failed: {error}")
 
 def show_no_info_from_server():
     """
     Display a message indicating that no response was received from the server.
     """
-    comm.chat_message.emit("<INFO> No info received from server, try again later.")
+    client.on_chat_message("<INFO> No info received from server, try again later.")
 
 def test_input(text_array):
     """
@@ -412,16 +709,30 @@ def test_input(text_array):
     Returns:
         int: 1 if valid, 0 if invalid
     """
-    if not text_array[-1].isnumeric():
-        show_error_message("You must provide a number of words.")
-        return 0
-    if int(text_array[-1]) < 1 or int(text_array[-1]) > 10000:
-        show_error_message("Number must be 1<x<10000.")
+    if not valid_task_size(text_array):
         return 0
 
     send_server_message(f"task {' '.join(text_array)}")
     return 1
 
+def valid_task_size(text_array) -> bool:
+    """
+    Check the number of words requested by a task command.
+
+    Args:
+        text_array (list): Command parameters to validate
+
+    Returns:
+        bool: True if valid, False if invalid
+    """
+    if not text_array[-1].isnumeric():
+        show_error_message("You must provide a number of words.")
+        return False
+    if int(text_array[-1]) < 1 or int(text_array[-1]) > 10000:
+        show_error_message("Number must be 1<x<10000.")
+        return False
+    return True
+
 def wait_server_messages(number_of_messages, max_time=2) -> bool:
     """
     Wait for a specified number of server messages, clearing previous messages first.
@@ -433,7 +744,7 @@ def wait_server_messages(number_of_messages, max_time=2) -> bool:
     Returns:
         bool: True if messages received, False if timeout
     """
-    server_messages.clear()
+    _task_replies().clear()
     return wait_server_messages_no_empty(number_of_messages, max_time)
 
 def wait_server_messages_no_empty(number_of_messages, max_time=2) -> bool:
@@ -447,15 +758,95 @@ def wait_server_messages_no_empty(number_of_messages, max_time=2) -> bool:
     Returns:
         bool: True if messages received, False if timeout
     """
-    time_waited = 0
-    while len(server_messages) < number_of_messages:
-        time_waited += 0.1
-        if time_waited >= max_time:
+    task = task_scheduler.current_task()
+    with step_wait_time.time():
+        if task is None:
+            received = server_messages.wait_for_count(number_of_messages, max_time)
+        else:
+            received = task.wait_replies(number_of_messages, max_time)
+
+    if not received:
+        if task is None or not task.cancelled:
+            step_timeouts.inc()
             show_no_info_from_server()
-            return False
-        time.sleep(0.1)
+        return False
     return True
 
+def _task_replies():
+    """
+    Get the replies of the running task.
+
+    Returns:
+        MessageStore: Replies of the task run by the calling thread, the shared server messages outside of a task
+    """
+    task = task_scheduler.current_task()
+    return server_messages if task is None else task.replies
+
+def _task_cancelled():
+    """
+    Check if the running task was cancelled.
+
+    Returns:
+        bool: True if cancelled, False if not or if not running as a task (e.g. called from the CLI)
+    """
+    task = task_scheduler.current_task()
+    return task is not None and task.cancelled
+
+# endregion
+
+# region Task Computations
+
+def parse_rsa_public_key(message):
+    """
+    Extract the RSA public key sent by the server.
+
+    Args:
+        message (str): Server message containing n and e
+
+    Returns:
+        RSAKey: Public key
+    """
+    x = re.findall("[0-9]+", message)  # Extract numbers from message
+    return rsa_cipher.RSAKey(int(x[0]), int(x[1]))
+
+def generate_rsa_keys():
+    """
+    Get a RSA key pair, from the pool of keys generated in the background.
+
+    Returns:
+        RSAKey: Key pair with its private factors
+    """
+    return rsa_keys.keys.take()
+
+def generate_difhel_group(bits=dh_groups.DH_BITS):
+    """
+    Get the Diffie-Hellman public parameters, from the pool of precomputed groups.
+
+    Args:
+        bits (int, optional): Size of the prime in bits. Defaults to dh_groups.DH_BITS.
+
+    Returns:
+        tuple: (p, g) prime number and generator
+    """
+    return dh_groups.groups.take(bits)
+
+def parse_difhel_size(text_array):
+    """
+    Get the group size of a DifHel task command.
+
+    Args:
+        text_array (list): Command parameters (e.g., ["DifHel", "64"])
+
+    Returns:
+        int | None: Size of the prime in bits, dh_groups.DH_BITS if not given, None if invalid
+    """
+    if len(text_array) < 2:
+        return dh_groups.DH_BITS
+    if not text_array[1].isnumeric() or int(text_array[1]) not in dh_groups.DH_SIZES:
+        show_error_message(f"Group size must be one of {', '.join(map(str, dh_groups.DH_SIZES))} bits.")
+        return None
+    return int(text_array[1])
+
 # endregion
 
 # region Encoding Functions
@@ -466,51 +857,62 @@ def difhel(text_array):
 
     Args:
         text_array (list): Command parameters
+
+    Returns:
+        bool: True if the task completed, False otherwise
     """
-    server_messages.clear()
-    send_server_message("task " + ' '.join(text_array))
+    bits = parse_difhel_size(text_array)
+    if bits is None:
+        return False
+
+    # Take prime number p and generator g from the precomputed groups, before the server waits for them
+    p, g = generate_difhel_group(bits)
+
+    replies = _task_replies()
+    replies.clear()
+    send_server_message("task " + text_array[0])     # The group size is ours, the server doesn't know it
 
     # Wait for server response
     if not wait_server_messages_no_empty(1):
-        return
-
-    # Generate prime number p and generator g
-    p = get_last_prime(random.randint(2, 4999))
-    g = get_primitive_root(p)
+        return False
 
-    server_messages.clear()
+    replies.clear()
 
     send_server_message(f"{p},{g}")
 
     # Wait for server confirmation
     if not wait_server_messages_no_empty(2):
-        return
+        return False
 
     # Check if prime number and generator are accepted
-    if not _decode_message(server_messages[0]).__contains__("accepted"):
+    if not replies[0].text.__contains__("accepted"):
         print("Error, try again")
-        server_messages.clear()
-        return
+        replies.clear()
+        return False
 
     # Wait for server's half-key
     if not wait_server_messages_no_empty(2):
-        return
+        return False
 
-    server_half_key = int(_decode_message(server_messages[1]))
-    my_secret_key = random.randint(1, 5000)
+    server_half_key = int(replies[1].text)
+    my_secret_key = random.randint(2, p - 2)
     my_half_key = pow(g, my_secret_key, p)  # g^a mod p
 
+    replies.clear()
     send_server_message(str(my_half_key))
 
     # Wait for server to request shared secret
-    if not wait_server_messages(1):
-        return
+    if not wait_server_messages_no_empty(1):
+        return False
 
     # Calculate shared secret key
     k = pow(server_half_key, my_secret_key, p)  # B^a mod p
 
+    replies.clear()
     send_server_message(str(k))
-    server_messages.clear()
+
+    # Wait for confirmation
+    return wait_server_messages_no_empty(1)
 
 def shift_vigenere_encode(encryption_type: str, text_array: list[str]):
     """
@@ -519,32 +921,27 @@ def shift_vigenere_encode(encryption_type: str, text_array: list[str]):
     Args:
         encryption_type (str): "shift" or "vigenere"
         text_array (list[str]): Command parameters
-    """
-    if test_input(text_array) == 0: return
-
-    if not wait_server_messages(2):
-        return
-
-    message = _decode_message(server_messages[0])
-    key = message.split(' ')[-1]
-    message_to_decode = _decode_message(server_messages[1], True)
 
-    message_decoded = b''
+    Returns:
+        bool: True if the task completed, False otherwise
+    """
+    replies = _task_replies()
+    replies.clear()
+    if test_input(text_array) == 0: return False
 
-    match encryption_type:
-        case "vigenere":
-            for i, c in enumerate(message_to_decode):
-                intKey = int.from_bytes(key[i % len(key)].encode())
-                message_decoded += int_encode(c + intKey, 4)
+    if not wait_server_messages_no_empty(2):
+        return False
 
-        case "shift":
-            for i in message_to_decode:
-                message_decoded += int_encode(i + int(key), 4)
+    key = replies[0].text.split(' ')[-1]
+    message_to_decode = replies[1].codepoints
 
+    message_decoded = b''.join(offload.map_chunks(
+        offload.shift_vigenere_chunk, message_to_decode, encryption_type, key, align=_key_align(encryption_type, key)))
+    replies.clear()
     send_server_message_no_encoding(message_decoded)
 
     # Wait for confirmation
-    wait_server_messages(1)
+    return wait_server_messages_no_empty(1)
 
 def rsa_encode(text_array):
     """
@@ -552,28 +949,26 @@ def rsa_encode(text_array):
 
     Args:
         text_array (list): Command parameters
-    """
-    if test_input(text_array) == 0: return
 
-    global server_messages
-
-    if not wait_server_messages(2):
-        return
+    Returns:
+        bool: True if the task completed, False otherwise
+    """
+    replies = _task_replies()
+    replies.clear()
+    if test_input(text_array) == 0: return False
 
-    message = _decode_message(server_messages[0])
-    x = re.findall("[0-9]+", message)  # Extract numbers from message
-    n = int(x[0])
-    e = int(x[1])
-    message_to_decode = _decode_message(server_messages[1], True)
+    if not wait_server_messages_no_empty(2):
+        return False
 
-    message_decoded = b''
+    key = parse_rsa_public_key(replies[0].text)
+    message_to_decode = replies[1].codepoints
 
-    for c in message_to_decode:
-        message_decoded += int_encode(pow(c, e, n), 4)
+    message_decoded = b''.join(offload.map_chunks(offload.rsa_chunk, message_to_decode, key.e, key.n))
+    replies.clear()
     send_server_message_no_encoding(message_decoded)
 
     # Wait for confirmation
-    wait_server_messages(1)
+    return wait_server_messages_no_empty(1)
 
 # endregion
 
@@ -592,44 +987,39 @@ def shift_vigenere_decode(type, text_array):
 def rsa_decode(text_array):
     """
     Decode a message using RSA decryption.
-    Generates a key pair and decrypts the received message.
+    Takes a ready key pair and decrypts the received message.
 
     Args:
         text_array (list): Command parameters
-    """
-    if test_input(text_array) == 0: return
 
-    global server_messages
-
-    UPPER_LIMIT = 1000
+    Returns:
+        bool: True if the task completed, False otherwise
+    """
+    replies = _task_replies()
+    replies.clear()
+    if test_input(text_array) == 0: return False
 
-    # Generate RSA key pair
-    p = get_next_prime(random.randint(2, UPPER_LIMIT))
-    q = get_next_prime(random.randint(2, UPPER_LIMIT))
-    n = p * q
-    k = (p - 1) * (q - 1)
-    e = get_coprime(k)  # public key
-    d = pow(e, -1, k)  # private key (modular multiplicative inverse)
+    # Take a ready RSA key pair
+    key = generate_rsa_keys()
 
-    if not wait_server_messages(1):
-        return
+    if not wait_server_messages_no_empty(1):
+        return False
 
-    send_server_message(f"{n},{e}")
+    replies.clear()
+    send_server_message(f"{key.n},{key.e}")
 
     # Wait for encoded message
-    if not wait_server_messages(1):
-        return
+    if not wait_server_messages_no_empty(1):
+        return False
 
     # Decrypt the message
-    message_to_decode = _decode_message(server_messages[0], True)
-
-    message_decoded = b''
+    message_to_decode = replies[0].codepoints
 
-    for c in message_to_decode:
-        message_decoded += int_encode(pow(c, d, n), 4)
+    message_decoded = b''.join(offload.map_chunks(offload.rsa_decrypt_chunk, message_to_decode, key))
+    replies.clear()
     send_server_message_no_encoding(message_decoded)
 
-    wait_server_messages(1)
+    return wait_server_messages_no_empty(1)
 
 # endregion
 
@@ -641,24 +1031,28 @@ def hash_command_verify(command):
 
     Args:
         command (list): Command parameters
+
+    Returns:
+        bool: True if the task completed, False otherwise
     """
-    server_messages.clear()
+    replies = _task_replies()
+    replies.clear()
     send_server_message(f"task {' '.join(command)}")
 
     if not wait_server_messages_no_empty(3):
-        return
+        return False
 
-    message = server_messages[1]
-    hash = server_messages[2]
+    message = replies[1].payload
+    hash = replies[2].text.strip().lower()
 
-    server_messages.clear()
+    replies.clear()
 
-    # Compare the computed hash with the provided hash and convert the result to string.
-    rslt = str(hashlib.sha256(message).hexdigest() == hash)
+    # Compare the hash of the message text with the provided hash and convert the result to string.
+    rslt = str(offload.sha256_payload(message) == hash)
 
     send_server_message(rslt.lower())
 
-    wait_server_messages_no_empty(1)
+    return wait_server_messages_no_empty(1)
 
 def hash_command_hash(command):
     """
@@ -666,131 +1060,23 @@ def hash_command_hash(command):
 
     Args:
         command (list): Command parameters
-    """
-    send_server_message(f"task {' '.join(command)}")
-
-    if not wait_server_messages(2):
-        return
-
-    message_to_hash = server_messages[1]
-
-    # Generate and send SHA-256 hash
-    send_server_message(hashlib.sha256(_decode_message(message_to_hash).encode()).hexdigest())
-
-    wait_server_messages(1)
-
-# endregion
-
-# region Prime Number Utils
-
-def get_coprime(n):
-    """
-    Find a coprime number for n (gcd(e,n) = 1).
-    Used in RSA key generation.
-
-    Args:
-        n (int): Number to find coprime for
 
     Returns:
-        int: A number coprime to n
-    """
-    while True:
-        e = random.randint(2, n - 1)
-        if math.gcd(e, n) == 1: return e
-
-def is_prime(n: int) -> bool:
+        bool: True if the task completed, False otherwise
     """
-    Check if a number is prime using trial division with optimizations.
-
-    Args:
-        n (int): Number to check
+    replies = _task_replies()
+    replies.clear()
+    send_server_message(f"task {' '.join(command)}")
 
-    Returns:
-        bool: True if prime, False otherwise
-    """
-    if n <= 3:
-        return n > 1
-    if n % 2 == 0 or n % 3 == 0:
+    if not wait_server_messages_no_empty(2):
         return False
-    limit = math.isqrt(n) + 1
-    for i in range(5, limit, 6):
-        if n % i == 0 or n % (i + 2) == 0:
-            return False
-    return True
-
-def get_last_prime(num):
-    """
-    Find the largest prime number less than or equal to num.
-
-    Args:
-        num (int): Upper limit
-
-    Returns:
-        int: Largest prime <= num
-    """
-    curr_num = num - 1
-    while curr_num > 3:
-        if is_prime(curr_num):
-            return curr_num
-        curr_num -= 1
-    return 3
 
-def get_primitive_root(n):
-    """
-    Find a primitive root modulo n.
-    Used in Diffie-Hellman key exchange.
-
-    Args:
-        n (int): Modulus (prime number)
-
-    Returns:
-        int: Primitive root of n
-    """
-    g = 1
-    prime_factors = set(get_prime_factors(n - 1))  # Remove duplicates
-    ok = False
-    while not ok:
-        g += 1
-        ok = True
-        for pf in prime_factors:
-            if pow(g, (n - 1) // pf, n) == 1:
-                ok = False
-    return g
-
-def get_next_prime(n):
-    """
-    Find the smallest prime number greater than n.
-
-    Args:
-        n (int): Lower limit
+    message_to_hash = replies[1].payload
 
-    Returns:
-        int: Smallest prime > n
-    """
-    num = n + 1
-    while not is_prime(num):
-        num += 1
-    return num
-
-def get_prime_factors(n) -> list[int]:
-    """
-    Factorize a number into its prime factors.
-
-    Args:
-        n (int): Number to factorize
+    # Generate and send SHA-256 hash
+    replies.clear()
+    send_server_message(offload.sha256_payload(message_to_hash))
 
-    Returns:
-        list[int]: List of prime factors
-    """
-    curr_num = n
-    curr_divisor = 2
-    prime_factors = []
-    while curr_num != 1:
-        if curr_num % curr_divisor == 0:
-            curr_num = int(curr_num / curr_divisor)
-            prime_factors.append(curr_divisor)
-        else:
-            curr_divisor = get_next_prime(curr_divisor)
-    return prime_factors
+    return wait_server_messages_no_empty(1)
 
 # endregion
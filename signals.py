@@ -6,7 +6,9 @@ class Communicator(QObject):
     Inherits from QObject to use Qt's signal system.
     """
 
-    chat_message = pyqtSignal(str)      # Signal for sending chat messages to the UI
-    decoded_message = pyqtSignal(str)   # Signal for sending decoded messages to the UI
+    connection_result = pyqtSignal()    # Signal for notifying the UI that a connection attempt completed
+    connection_closed = pyqtSignal()    # Signal for notifying the UI that the server closed the connection
+    image_received = pyqtSignal(object) # Signal for sending received images (QImage) to the UI, passed without copy
+    task_progress = pyqtSignal(int, str, float)     # Signal for sending the progress (id, command, fraction) of a long command
 
 comm = Communicator()   # Global communicator instance for use across modules
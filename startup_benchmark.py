@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PHASES = ("import_ms", "window_ms", "first_paint_ms", "first_connect_ms", "total_ms")    # Measures of a launch
+
+# region Launch Measure
+
+def measure_launch(host, port, timeout):
+    """
+    Launch the GUI the way window_interaction.load_window() does and measure each phase.
+    Runs in a fresh process started by run_launches(), so nothing is imported yet.
+
+    Args:
+        host (str): Server address the window connects to
+        port (int): Server port
+        timeout (float): Maximum time to wait for the connection, in seconds
+
+    Returns:
+        dict: Durations of the phases in milliseconds, each one starting where the previous one ended
+    """
+    start = time.perf_counter()
+    import window_interaction
+    import server_interaction
+    from signals import comm
+    from PyQt6.QtCore import QEvent, QObject, QTimer
+    imported = time.perf_counter()
+
+    window = window_interaction.create_window()
+    created = time.perf_counter()
+
+    marks = {}
+
+    class FirstPaint(QObject):
+        def eventFilter(self, target, event):
+            if event.type() == QEvent.Type.Paint and "paint" not in marks:
+                marks["paint"] = time.perf_counter()
+            return False
+
+    def connection_result():
+        marks["connect"] = time.perf_counter()
+        window_interaction.app.quit()
+
+    paint_filter = FirstPaint()
+    window_interaction.app.installEventFilter(paint_filter)
+    comm.connection_result.connect(connection_result)
+    QTimer.singleShot(int(timeout * 1000), window_interaction.app.quit)
+
+    window.lineEdit_address.setText(host)
+    window.lineEdit_port.setText(str(port))
+    window.show()
+    window._connect_to_server()
+    window_interaction.app.exec()
+    connected = server_interaction.client.connection_state == 1
+    server_interaction.close_connection()
+
+    if "paint" not in marks or not connected:
+        raise RuntimeError("The window wasn't painted or didn't connect")
+    return {
+        "import_ms": (imported - start) * 1000,
+        "window_ms": (created - imported) * 1000,
+        "first_paint_ms": (marks["paint"] - created) * 1000,
+        "first_connect_ms": (marks["connect"] - marks["paint"]) * 1000,
+    }
+
+# endregion
+
+# region Benchmark
+
+def run_launches(host, port, launches, timeout, offscreen):
+    """
+    Launch the GUI several times, each time in a new process.
+
+    Args:
+        host (str): Server address
+        port (int): Server port
+        launches (int): Number of launches
+        timeout (float): Maximum time to wait for each connection, in seconds
+        offscreen (bool): Use the offscreen Qt platform, no display is needed
+
+    Returns:
+        list[dict]: Measures of each launch, total_ms being the time from the process start to the connection
+    """
+    env = dict(os.environ)
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+
+    results = []
+    for _ in range(launches):
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, __file__, "--measure", host, str(port), "--timeout", str(timeout)],
+            capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+        total = (time.perf_counter() - start) * 1000
+        lines = [line for line in process.stdout.splitlines() if line.startswith("{")]
+        if process.returncode != 0 or not lines:
+            raise RuntimeError(f"The launch failed:\n{process.stderr}")
+
+        measures = json.loads(lines[-1])
+        measures["total_ms"] = total    # Process exit included, close to the time to the connection
+        results.append(measures)
+    return results
+
+def print_results(results):
+    """
+    Print the median and maximum of each phase.
+
+    Args:
+        results (list[dict]): Measures of each launch
+    """
+    print(f"{'phase':<18} {'median ms':>10} {'max ms':>10}")
+    for phase in PHASES:
+        values = [r[phase] for r in results]
+        print(f"{phase:<18} {statistics.median(values):>10.1f} {max(values):>10.1f}")
+
+def main(argv=None):
+    """
+    Measure the startup of the GUI against the mock server, or an existing server.
+
+    Args:
+        argv (list[str], optional): Command line arguments. Defaults to sys.argv.
+
+    Returns:
+        int: Exit code, 1 if the median startup time is over the budget
+    """
+    parser = argparse.ArgumentParser(description="Measure the cold start of the GUI: import, first paint, first connect.")
+    parser.add_argument("-n", "--launches", type=int, default=5, help="number of launches")
+    parser.add_argument("--offscreen", action="store_true", help="use the offscreen Qt platform (no display needed)")
+    parser.add_argument("--budget-ms", type=float, help="fail if the median time to the first connection is over this")
+    parser.add_argument("--timeout", type=float, default=10.0, help="maximum time to wait for the connection, in seconds")
+    parser.add_argument("--host", help="connect to an existing server instead of starting the mock server")
+    parser.add_argument("--port", type=int, default=6000, help="port of the existing server")
+    parser.add_argument("--measure", nargs=2, metavar=("HOST", "PORT"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        print(json.dumps(measure_launch(args.measure[0], int(args.measure[1]), args.timeout)))
+        return 0
+
+    server = None
+    host, port = args.host, args.port
+    if host is None:
+        from mock_server import MockServer
+        server = MockServer()
+        port = server.start()
+        host = "127.0.0.1"
+
+    try:
+        results = run_launches(host, port, args.launches, args.timeout, args.offscreen)
+    finally:
+        if server:
+            server.stop()
+
+    print_results(results)
+    median = statistics.median(r["total_ms"] for r in results)
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f"Startup regression: median {median:.1f} ms is over the budget of {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+# endregion
+
+if __name__ == '__main__':
+    sys.exit(main())
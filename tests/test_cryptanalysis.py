@@ -0,0 +1,36 @@
+import unittest
+import cryptanalysis
+
+
+class KeyTextTest(unittest.TestCase):
+
+    def test_key_word(self):
+        self.assertEqual(cryptanalysis.key_text([ord('k'), ord('e'), ord('y')]), "key")
+        self.assertEqual(cryptanalysis.key_text([0xE282AC]), "€")
+
+    def test_zero_shift(self):
+        self.assertIsNone(cryptanalysis.key_text([ord('k'), 0, ord('y')]))
+
+    def test_unprintable_shift(self):
+        self.assertIsNone(cryptanalysis.key_text([ord('k'), ord(' ')]))
+        self.assertIsNone(cryptanalysis.key_text([ord('k'), ord('\n')]))
+        self.assertIsNone(cryptanalysis.key_text([ord('k') << 8]))
+
+    def test_invalid_shift(self):
+        self.assertIsNone(cryptanalysis.key_text([-1]))
+        self.assertIsNone(cryptanalysis.key_text([0xFF]))
+
+    def test_crack_shows_schedule(self):
+        plain = ("it was the best of times, it was the worst of times, it was the age of wisdom, it was the age of "
+                 "foolishness, it was the epoch of belief, it was the epoch of incredulity, it was the season of light, "
+                 "it was the season of darkness, it was the spring of hope, it was the winter of despair, we had "
+                 "everything before us, we had nothing before us, we were all going direct to heaven, we were all going "
+                 "direct the other way")
+        ciphered = [ord(char) + (ord('k'), 0, ord('y'))[i % 3] for i, char in enumerate(plain)]
+        key, text = cryptanalysis.crack("vigenere", ciphered)
+        self.assertEqual(key, f"[{ord('k')}, 0, {ord('y')}]")
+        self.assertEqual(text, plain)
+
+
+if __name__ == "__main__":
+    unittest.main()
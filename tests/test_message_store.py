@@ -0,0 +1,29 @@
+import shutil
+import tempfile
+import unittest
+from archive import MessageArchive
+from message_store import MessageStore
+
+
+class ArchiveErrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.archive = MessageArchive(self.directory)
+
+    def tearDown(self):
+        self.archive.close()
+        shutil.rmtree(self.directory)
+
+    def test_out_of_order_archive_is_dropped(self):
+        first, second = MessageStore(4, self.archive), MessageStore(4, self.archive)
+        first.append(b'\0\0\0a')
+        record = second.append(b'\0\0\0b')     # Numbered #0 again, the archive refuses it
+        self.assertIsNone(second.archive)
+        self.assertIs(second.get(record.seq), record)
+        self.assertEqual(second[-1].text, "b")
+        self.assertEqual(self.archive.get(0).text, "a")
+
+
+if __name__ == "__main__":
+    unittest.main()
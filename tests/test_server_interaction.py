@@ -0,0 +1,41 @@
+import unittest
+import codec
+import server_interaction
+from message_store import MessageStore
+
+
+class SavedMessageIdTest(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = []
+        self.saved_message = server_interaction.saved_message
+        self.on_chat_message = server_interaction.client.on_chat_message
+        server_interaction.saved_message = MessageStore(4)
+        server_interaction.client.on_chat_message = self.lines.append
+
+    def tearDown(self):
+        server_interaction.saved_message = self.saved_message
+        server_interaction.client.on_chat_message = self.on_chat_message
+
+    def _receive(self, message_type, text):
+        data = codec.encode_text(text)
+        server_interaction._handle_frame(ord(message_type), len(data).to_bytes(2, 'big'), data)
+        return self.lines[-1]
+
+    def test_chat_line_id_resolves_to_message(self):
+        for i in range(10):     # Earlier messages are evicted, the ids keep growing
+            line = self._receive('t', f"message {i}")
+            reference, sender, text = line.split(' ', 2)
+            self.assertEqual(sender, "<User>")
+            self.assertEqual(server_interaction._get_saved_message(reference).text, text)
+
+    def test_server_line_id_resolves_to_message(self):
+        self._receive('t', "before")
+        line = self._receive('s', "reply")
+        reference, sender, text = line.split(' ', 2)
+        self.assertEqual((sender, text), ("<Server>", "reply"))
+        self.assertEqual(server_interaction._get_saved_message(reference).text, "reply")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+# Source SHA-256: 4f9d082cf52f7b61e237de321a3bf2547b09f3d6ce127fca26f115c9b68fcffc
+# Form implementation generated from reading ui file 'ui/InternetSecuredChat_V1.ui'
+#
+# Created by: PyQt6 UI code generator 6.11.0
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic6 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        MainWindow.setObjectName("MainWindow")
+        MainWindow.resize(1129, 812)
+        MainWindow.setMouseTracking(False)
+        MainWindow.setUnifiedTitleAndToolBarOnMac(False)
+        self.centralwidget = QtWidgets.QWidget(parent=MainWindow)
+        self.centralwidget.setObjectName("centralwidget")
+        self.lineEdit_port = QtWidgets.QLineEdit(parent=self.centralwidget)
+        self.lineEdit_port.setGeometry(QtCore.QRect(670, 100, 431, 21))
+        self.lineEdit_port.setObjectName("lineEdit_port")
+        self.plainTextEdit_chat = QtWidgets.QPlainTextEdit(parent=self.centralwidget)
+        self.plainTextEdit_chat.setGeometry(QtCore.QRect(10, 70, 551, 731))
+        self.plainTextEdit_chat.setObjectName("plainTextEdit_chat")
+        self.lineEdit_address = QtWidgets.QLineEdit(parent=self.centralwidget)
+        self.lineEdit_address.setGeometry(QtCore.QRect(670, 70, 431, 21))
+        self.lineEdit_address.setObjectName("lineEdit_address")
+        self.lbl_03 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.lbl_03.setGeometry(QtCore.QRect(570, 70, 91, 21))
+        self.lbl_03.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight|QtCore.Qt.AlignmentFlag.AlignTrailing|QtCore.Qt.AlignmentFlag.AlignVCenter)
+        self.lbl_03.setObjectName("lbl_03")
+        self.lbl_04 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.lbl_04.setGeometry(QtCore.QRect(570, 100, 91, 21))
+        self.lbl_04.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight|QtCore.Qt.AlignmentFlag.AlignTrailing|QtCore.Qt.AlignmentFlag.AlignVCenter)
+        self.lbl_04.setObjectName("lbl_04")
+        self.lbl_01 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.lbl_01.setGeometry(QtCore.QRect(20, 30, 541, 21))
+        font = QtGui.QFont()
+        font.setPointSize(19)
+        font.setBold(True)
+        self.lbl_01.setFont(font)
+        self.lbl_01.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        self.lbl_01.setObjectName("lbl_01")
+        self.btn_connect = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.btn_connect.setGeometry(QtCore.QRect(670, 130, 431, 31))
+        self.btn_connect.setObjectName("btn_connect")
+        self.lbl_02 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.lbl_02.setGeometry(QtCore.QRect(580, 30, 531, 21))
+        font = QtGui.QFont()
+        font.setPointSize(19)
+        font.setBold(True)
+        self.lbl_02.setFont(font)
+        self.lbl_02.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        self.lbl_02.setObjectName("lbl_02")
+        self.lbl_05 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.lbl_05.setGeometry(QtCore.QRect(580, 190, 531, 21))
+        font = QtGui.QFont()
+        font.setPointSize(19)
+        font.setBold(True)
+        self.lbl_05.setFont(font)
+        self.lbl_05.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        self.lbl_05.setObjectName("lbl_05")
+        self.lineEdit_message = QtWidgets.QLineEdit(parent=self.centralwidget)
+        self.lineEdit_message.setGeometry(QtCore.QRect(670, 220, 431, 21))
+        self.lineEdit_message.setObjectName("lineEdit_message")
+        self.lbl_06 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.lbl_06.setGeometry(QtCore.QRect(570, 220, 91, 21))
+        self.lbl_06.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight|QtCore.Qt.AlignmentFlag.AlignTrailing|QtCore.Qt.AlignmentFlag.AlignVCenter)
+        self.lbl_06.setObjectName("lbl_06")
+        self.lbl_07 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.lbl_07.setGeometry(QtCore.QRect(580, 400, 531, 21))
+        font = QtGui.QFont()
+        font.setPointSize(19)
+        font.setBold(True)
+        self.lbl_07.setFont(font)
+        self.lbl_07.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        self.lbl_07.setObjectName("lbl_07")
+        self.lbl_08 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.lbl_08.setGeometry(QtCore.QRect(580, 430, 81, 21))
+        self.lbl_08.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight|QtCore.Qt.AlignmentFlag.AlignTrailing|QtCore.Qt.AlignmentFlag.AlignVCenter)
+        self.lbl_08.setObjectName("lbl_08")
+        self.listWidget_type = QtWidgets.QListWidget(parent=self.centralwidget)
+        self.listWidget_type.setGeometry(QtCore.QRect(670, 430, 431, 91))
+        self.listWidget_type.setObjectName("listWidget_type")
+        item = QtWidgets.QListWidgetItem()
+        self.listWidget_type.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.listWidget_type.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.listWidget_type.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.listWidget_type.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.listWidget_type.addItem(item)
+        self.sl_size = QtWidgets.QSlider(parent=self.centralwidget)
+        self.sl_size.setGeometry(QtCore.QRect(670, 620, 431, 25))
+        self.sl_size.setMinimum(1)
+        self.sl_size.setMaximum(50)
+        self.sl_size.setProperty("value", 5)
+        self.sl_size.setOrientation(QtCore.Qt.Orientation.Horizontal)
+        self.sl_size.setObjectName("sl_size")
+        self.lbl_09 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.lbl_09.setGeometry(QtCore.QRect(580, 620, 81, 21))
+        self.lbl_09.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight|QtCore.Qt.AlignmentFlag.AlignTrailing|QtCore.Qt.AlignmentFlag.AlignVCenter)
+        self.lbl_09.setObjectName("lbl_09")
+        self.lbl_10 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.lbl_10.setGeometry(QtCore.QRect(670, 610, 431, 21))
+        self.lbl_10.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        self.lbl_10.setObjectName("lbl_10")
+        self.btn_send = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.btn_send.setGeometry(QtCore.QRect(670, 650, 431, 31))
+        self.btn_send.setObjectName("btn_send")
+        self.rd_btn_encode = QtWidgets.QRadioButton(parent=self.centralwidget)
+        self.rd_btn_encode.setGeometry(QtCore.QRect(680, 550, 100, 20))
+        self.rd_btn_encode.setChecked(True)
+        self.rd_btn_encode.setObjectName("rd_btn_encode")
+        self.btn_groupe_command = QtWidgets.QButtonGroup(MainWindow)
+        self.btn_groupe_command.setObjectName("btn_groupe_command")
+        self.btn_groupe_command.addButton(self.rd_btn_encode)
+        self.lbl_11 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.lbl_11.setGeometry(QtCore.QRect(580, 550, 81, 21))
+        self.lbl_11.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight|QtCore.Qt.AlignmentFlag.AlignTrailing|QtCore.Qt.AlignmentFlag.AlignVCenter)
+        self.lbl_11.setObjectName("lbl_11")
+        self.rd_btn_decode = QtWidgets.QRadioButton(parent=self.centralwidget)
+        self.rd_btn_decode.setGeometry(QtCore.QRect(680, 580, 100, 20))
+        self.rd_btn_decode.setObjectName("rd_btn_decode")
+        self.btn_groupe_command.addButton(self.rd_btn_decode)
+        self.lbl_7 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.lbl_7.setGeometry(QtCore.QRect(570, 260, 91, 21))
+        self.lbl_7.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight|QtCore.Qt.AlignmentFlag.AlignTrailing|QtCore.Qt.AlignmentFlag.AlignVCenter)
+        self.lbl_7.setObjectName("lbl_7")
+        self.plainTextEdit_decoded = QtWidgets.QPlainTextEdit(parent=self.centralwidget)
+        self.plainTextEdit_decoded.setGeometry(QtCore.QRect(670, 260, 431, 121))
+        self.plainTextEdit_decoded.setObjectName("plainTextEdit_decoded")
+        MainWindow.setCentralWidget(self.centralwidget)
+
+        self.retranslateUi(MainWindow)
+        QtCore.QMetaObject.connectSlotsByName(MainWindow)
+
+    def retranslateUi(self, MainWindow):
+        _translate = QtCore.QCoreApplication.translate
+        MainWindow.setWindowTitle(_translate("MainWindow", "Internet Secure Chat"))
+        self.lineEdit_port.setText(_translate("MainWindow", "6000"))
+        self.lineEdit_address.setText(_translate("MainWindow", "vlbelintrocrypto.hevs.ch"))
+        self.lbl_03.setText(_translate("MainWindow", "ADDRESS :"))
+        self.lbl_04.setText(_translate("MainWindow", "PORT :"))
+        self.lbl_01.setText(_translate("MainWindow", "CHAT"))
+        self.btn_connect.setText(_translate("MainWindow", "CONNECT"))
+        self.lbl_02.setText(_translate("MainWindow", "SERVER - CONNECTION"))
+        self.lbl_05.setText(_translate("MainWindow", "SERVER - MESSAGES"))
+        self.lbl_06.setText(_translate("MainWindow", "MESSAGE :"))
+        self.lbl_07.setText(_translate("MainWindow", "SERVER - TASKS"))
+        self.lbl_08.setText(_translate("MainWindow", "TYPE :"))
+        __sortingEnabled = self.listWidget_type.isSortingEnabled()
+        self.listWidget_type.setSortingEnabled(False)
+        item = self.listWidget_type.item(0)
+        item.setText(_translate("MainWindow", "shift"))
+        item = self.listWidget_type.item(1)
+        item.setText(_translate("MainWindow", "vigenere"))
+        item = self.listWidget_type.item(2)
+        item.setText(_translate("MainWindow", "RSA"))
+        item = self.listWidget_type.item(3)
+        item.setText(_translate("MainWindow", "hash"))
+        item = self.listWidget_type.item(4)
+        item.setText(_translate("MainWindow", "DifHel"))
+        self.listWidget_type.setSortingEnabled(__sortingEnabled)
+        self.lbl_09.setText(_translate("MainWindow", "SIZE :"))
+        self.lbl_10.setText(_translate("MainWindow", "5"))
+        self.btn_send.setText(_translate("MainWindow", "SEND"))
+        self.rd_btn_encode.setText(_translate("MainWindow", "encode"))
+        self.lbl_11.setText(_translate("MainWindow", "COMMAND :"))
+        self.rd_btn_decode.setText(_translate("MainWindow", "decode"))
+        self.lbl_7.setText(_translate("MainWindow", "DECODED :"))
@@ -0,0 +1,117 @@
+import hashlib
+import importlib.util
+import io
+import os
+import sys
+
+HEADER_PREFIX = "# Source SHA-256: "     # First line of a compiled UI module, identifies the .ui it was compiled from
+
+# region Compiled UI Cache
+
+def compiled_path(ui_path):
+    """
+    Get the path of the Python module compiled from a .ui file.
+
+    Args:
+        ui_path (str): Path of the .ui file
+
+    Returns:
+        str: Path of the module, next to the .ui file (e.g. ui/InternetSecuredChat_V1_ui.py)
+    """
+    return os.path.splitext(ui_path)[0] + "_ui.py"
+
+def is_up_to_date(ui_path, module_path=None) -> bool:
+    """
+    Check if a compiled UI module matches its .ui file.
+    The content hash is compared rather than the modification times, which a checkout doesn't preserve.
+
+    Args:
+        ui_path (str): Path of the .ui file
+        module_path (str, optional): Path of the compiled module. Defaults to compiled_path(ui_path).
+
+    Returns:
+        bool: True if the module exists and was compiled from the current .ui file
+    """
+    try:
+        with open(module_path or compiled_path(ui_path), encoding="utf-8") as f:
+            header = f.readline().strip()
+    except OSError:
+        return False
+    return header == HEADER_PREFIX + _digest(ui_path)
+
+def compile_ui(ui_path, module_path=None):
+    """
+    Compile a .ui file to a Python module. The module is replaced atomically.
+
+    Args:
+        ui_path (str): Path of the .ui file
+        module_path (str, optional): Path of the compiled module. Defaults to compiled_path(ui_path).
+
+    Returns:
+        str: Path of the compiled module
+
+    Raises:
+        OSError: If the module can't be written
+    """
+    from PyQt6 import uic     # Only needed when the .ui file changed
+
+    module_path = module_path or compiled_path(ui_path)
+    source = io.StringIO()
+    with open(ui_path, encoding="utf-8") as f:
+        uic.compileUi(f, source)
+
+    temporary_path = module_path + ".tmp"
+    with open(temporary_path, "w", encoding="utf-8") as f:
+        f.write(HEADER_PREFIX + _digest(ui_path) + "\n")
+        f.write(source.getvalue())
+    os.replace(temporary_path, module_path)
+    return module_path
+
+def load_form(ui_path):
+    """
+    Get the form class of a .ui file, from its compiled module.
+    The module is compiled again first if the .ui file changed. If it can't be written, the .ui file is loaded
+    directly, which is slower.
+
+    Args:
+        ui_path (str): Path of the .ui file
+
+    Returns:
+        type: Form class with a setupUi(window) method (e.g. Ui_MainWindow)
+    """
+    module_path = compiled_path(ui_path)
+    if not is_up_to_date(ui_path, module_path):
+        try:
+            compile_ui(ui_path, module_path)
+        except OSError:
+            from PyQt6 import uic
+            return uic.loadUiType(ui_path)[0]
+
+    name = os.path.splitext(os.path.basename(module_path))[0]
+    spec = importlib.util.spec_from_file_location(name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return next(value for key, value in vars(module).items() if key.startswith("Ui_"))
+
+def _digest(ui_path):
+    """
+    Hash the content of a .ui file.
+
+    Returns:
+        str: Hexadecimal SHA-256 digest
+    """
+    with open(ui_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+# endregion
+
+if __name__ == '__main__':
+    """
+    Compile the .ui files given as arguments, or every .ui file of the ui directory, ahead of time.
+    """
+    paths = sys.argv[1:] or [os.path.join("ui", name) for name in sorted(os.listdir("ui")) if name.endswith(".ui")]
+    for path in paths:
+        if is_up_to_date(path):
+            print(f"{path}: up to date")
+        else:
+            print(f"{path}: compiled to {compile_ui(path)}")
@@ -1,25 +1,34 @@
 import threading
-from PyQt6.QtWidgets import QApplication, QMainWindow
+from PyQt6.QtWidgets import QApplication, QMainWindow, QLabel
 from PyQt6.QtCore import Qt
-from PyQt6 import uic
+from PyQt6.QtGui import QPixmap
+import offload
 import server_interaction
+import ui_cache
+from client import Client
 from signals import comm
+from batching import LineBatcher
+from images import ImageDecoder
 
-class ChatWindow(QMainWindow):
+CHAT_MAX_LINES = 10000      # Lines kept by each display, the oldest ones are removed
+UI_FILE = "ui/InternetSecuredChat_V1.ui"    # Layout of the window, used through its compiled module
+
+class ChatWindow(QMainWindow, ui_cache.load_form(UI_FILE)):
     """
     Main application window for the chat application.
-    Inherits from QMainWindow to create the GUI interface.
+    Inherits from QMainWindow and from the form class compiled from UI_FILE.
     """
 
     def __init__(self):
         """
         Initialize the chat window and set up the UI components.
+        The connection to the server is opened by load_window() once the window is shown.
         """
         super().__init__()
-        uic.loadUi("ui/InternetSecuredChat_V1.ui", self)
+        self.setupUi(self)
         self._setup_ui()
         self._connect_signals()
-        self._connect_to_server()
+        self._setup_client()
 
     def _setup_ui(self):
         """
@@ -28,6 +37,12 @@ class ChatWindow(QMainWindow):
         # Disable focus on chat zone
         self.plainTextEdit_chat.setFocusPolicy(Qt.FocusPolicy.NoFocus)
 
+        # Bound the displays and batch their updates so bursts of messages don't freeze the window
+        self.plainTextEdit_chat.setMaximumBlockCount(CHAT_MAX_LINES)
+        self.plainTextEdit_decoded.setMaximumBlockCount(CHAT_MAX_LINES)
+        self.chat_batcher = LineBatcher(self.plainTextEdit_chat.appendPlainText, parent=self)
+        self.decoded_batcher = LineBatcher(self.plainTextEdit_decoded.appendPlainText, parent=self)
+
         # Initialize the display of the size label
         self._update_size_label(self.sl_size.value())
 
@@ -48,9 +63,30 @@ class ChatWindow(QMainWindow):
         self.lineEdit_message.returnPressed.connect(self._send_message)
         self.btn_send.clicked.connect(self._send_task)
 
-        # Text display connections
-        comm.chat_message.connect(self._add_message)
-        comm.decoded_message.connect(self._add_decoded)
+        # Connection state connections
+        comm.connection_result.connect(self.connected)
+        comm.connection_closed.connect(self._connection_closed)
+        comm.image_received.connect(self._show_image)
+        comm.task_progress.connect(self._show_progress)
+
+    def _setup_client(self):
+        """
+        Create the server client, reporting its messages to the UI through the line batchers
+        and its connection events through the signals communicator.
+        Received images are built by the image decoder thread.
+        """
+        self.image_decoder = ImageDecoder()
+        self.image_view: QLabel = None
+        server_interaction.set_client(Client(
+            on_chat_message=self._add_message,
+            on_decoded_message=self._add_decoded,
+            on_connection_result=comm.connection_result.emit,
+            on_connection_closed=comm.connection_closed.emit,
+            on_clear_chat=self._clear_chat,
+            get_encoding=lambda: self._get_encoding_values()[0],
+            on_image=self.image_decoder.submit,
+            on_progress=comm.task_progress.emit,
+            ui_thread=threading.current_thread()))
 
     def _update_size_label(self, value):
         """
@@ -66,18 +102,16 @@ class ChatWindow(QMainWindow):
         Handle connection/disconnection to the chat server.
         Toggles between connecting and disconnecting based on current connection state.
         """
-        # Disconnect if already connected
-        if server_interaction.connection_state == 1:
+        # Disconnect if already connected, or stop reconnecting
+        if server_interaction.client.connection_state in (1, 2):
             self.btn_connect.setText("CONNECT")
             server_interaction.close_connection()
             self._add_message("<INFO> Disconnected from server")
 
         # Connect if not connected or connection failed
-        elif server_interaction.connection_state == -1 or server_interaction.connection_state == 0:
-            global host, port
-            host = self.lineEdit_address.text()
-            port = int(self.lineEdit_port.text())
-            server_interaction.stop_event.clear()  # Reset the Event
+        elif server_interaction.client.connection_state == -1 or server_interaction.client.connection_state == 0:
+            server_interaction.client.host = self.lineEdit_address.text()
+            server_interaction.client.port = int(self.lineEdit_port.text())
             t = threading.Thread(target=server_interaction.open_connection, daemon=True)
             t.start()
             self.btn_connect.setText("CONNECTING ...")
@@ -86,11 +120,15 @@ class ChatWindow(QMainWindow):
     def connected(self):
         """
         Update UI after connection attempt completes.
-        Called by server_interaction module when connection state changes.
+        Called through the connection_result signal when connection state changes.
         """
-        if server_interaction.connection_state == 1:
-            # Connected successfully
-            self._add_message("<INFO> Connected to server")
+        if server_interaction.client.connection_state == 2:
+            # Connection lost, the client reconnects by itself and can be stopped with the button
+            self.btn_connect.setText("RECONNECTING ... (STOP)")
+        elif server_interaction.client.connection_state == 1:
+            # Connected successfully, the client reports the reconnections itself
+            if self.btn_connect.text() != "RECONNECTING ... (STOP)":
+                self._add_message("<INFO> Connected to server")
             self.btn_connect.setText("DISCONNECT")
         else:
             # Connection Error
@@ -98,12 +136,19 @@ class ChatWindow(QMainWindow):
             self.btn_connect.setText("CONNECT")
         self.btn_connect.setEnabled(True)
 
+    def _connection_closed(self):
+        """
+        Update UI after the server closed the connection.
+        """
+        self.btn_connect.setText("CONNECT")
+        self.btn_connect.setEnabled(True)
+
     def _send_message(self):
         """
         Send a regular text message to the server.
         Checks if connected before attempting to send.
         """
-        if server_interaction.connection_state == -1 or server_interaction.connection_state == 0:
+        if server_interaction.client.connection_state == -1 or server_interaction.client.connection_state == 0:
             self._add_message("<INFO> Server not connected")
         else:
             msg = self.lineEdit_message.text()
@@ -115,7 +160,7 @@ class ChatWindow(QMainWindow):
         Send a task command to the server based on the selected encoding type and parameters.
         Tasks include encode/decode operations with various cryptographic algorithms.
         """
-        if server_interaction.connection_state == -1 or server_interaction.connection_state == 0:
+        if server_interaction.client.connection_state == -1 or server_interaction.client.connection_state == 0:
             self._add_message("<INFO> Server not connected")
         else:
             encoding = "Aucun"
@@ -139,21 +184,52 @@ class ChatWindow(QMainWindow):
 
     def _add_message(self, text):
         """
-        Add a message to the main chat display.
+        Add a message to the main chat display. Thread-safe, the display is updated by batches.
 
         Args:
             text (str): Message text to display
         """
-        self.plainTextEdit_chat.appendPlainText(text)
+        self.chat_batcher.push(text)
 
     def _add_decoded(self, text):
         """
-        Add a message to the decoded messages display area.
+        Add a message to the decoded messages display area. Thread-safe, the display is updated by batches.
 
         Args:
             text (str): Decoded message text to display
         """
-        self.plainTextEdit_decoded.appendPlainText(text)
+        self.decoded_batcher.push(text)
+
+    def _show_progress(self, id, command, fraction):
+        """
+        Show the progress of a long command in the status bar.
+        Called through the task_progress signal.
+
+        Args:
+            id (int): Task id
+            command (str): Command of the task
+            fraction (float): Part of the work done, between 0 and 1
+        """
+        if fraction >= 1:
+            self.statusBar().showMessage(f"{command}: done", 2000)
+        else:
+            self.statusBar().showMessage(f"{command}: {fraction:.0%} (/cancel {id} to stop)")
+
+    def _show_image(self, image):
+        """
+        Show the last received image in its own window.
+        Called through the image_received signal.
+
+        Args:
+            image (QImage): Received image
+        """
+        if self.image_view is None:
+            self.image_view = QLabel()
+            self.image_view.setWindowTitle("Received image")
+            self.image_view.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.image_view.setPixmap(QPixmap.fromImage(image))
+        self.image_view.resize(max(image.width(), 200), max(image.height(), 200))
+        self.image_view.show()
 
     def _change_encoding_values(self):
         """
@@ -192,20 +268,36 @@ class ChatWindow(QMainWindow):
         """
         Clear both chat display areas (main chat and decoded messages).
         """
+        self.chat_batcher.clear()
+        self.decoded_batcher.clear()
         self.plainTextEdit_chat.clear()
         self.plainTextEdit_decoded.clear()
 
-app = QApplication([])
-window = ChatWindow()
-host = "vlbelintrocrypto.hevs.ch"    # Default server host
-port = 6000                          # Default server port
+app: QApplication = None     # Application, created by create_window()
+window: ChatWindow = None    # Main window, created by create_window()
+
+def create_window():
+    """
+    Create the application and its window, once.
+
+    Returns:
+        ChatWindow: The main window
+    """
+    global app, window
+    if window is None:
+        app = QApplication.instance() or QApplication([])
+        window = ChatWindow()
+    return window
 
 def load_window():
     """
-    Initialize and display the application window.
+    Initialize and display the application window, then connect to the server.
     Handles cleanup on application exit.
     """
 
+    create_window()
     window.show()
+    window._connect_to_server()
     app.exec()
     server_interaction.close_connection()
+    offload.stop()